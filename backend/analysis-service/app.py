@@ -1,11 +1,15 @@
 import os
 import random
-import json
+import itertools
 from datetime import datetime, timedelta
 import redis
 from flask import Flask, jsonify
 from flask_cors import CORS
+from article_publisher import ArticlePublisher, StreamPublisher
 from nltk.sentiment.vader import SentimentIntensityAnalyzer
+from sentiment_batch import BatchSentimentScorer
+from sentiment_cache import SentimentCache
+from sentiment_pool import SentimentPool
 
 # --- Initialization ---
 app = Flask(__name__)
@@ -20,12 +24,56 @@ redis_client = redis.Redis(host=os.environ.get('REDIS_HOST', 'localhost'), port=
 
 sia = SentimentIntensityAnalyzer()
 
+# Memoized sentiment scores; set SENTIMENT_CACHE_REDIS=true to share them across workers
+SENTIMENT_CACHE_SIZE = int(os.environ.get('SENTIMENT_CACHE_SIZE', '100000'))
+SENTIMENT_CACHE_REDIS = os.environ.get('SENTIMENT_CACHE_REDIS', 'false').lower() == 'true'
+SENTIMENT_PRECOMPUTE = os.environ.get('SENTIMENT_PRECOMPUTE', 'true').lower() == 'true'
+# Cache misses are scored together by the vectorized scorer (same scores as polarity_scores)
+SENTIMENT_BATCH_SCORING = os.environ.get('SENTIMENT_BATCH_SCORING', 'true').lower() == 'true'
+batch_scorer = BatchSentimentScorer(sia.lexicon, sia.constants) if SENTIMENT_BATCH_SCORING else None
+# Batches of at least SENTIMENT_POOL_MIN_BATCH misses are spread over SENTIMENT_WORKERS processes (0 = in-process)
+SENTIMENT_WORKERS = int(os.environ.get('SENTIMENT_WORKERS', '0'))
+SENTIMENT_POOL_MIN_BATCH = int(os.environ.get('SENTIMENT_POOL_MIN_BATCH', '2000'))
+SENTIMENT_POOL_CHUNK_SIZE = int(os.environ.get('SENTIMENT_POOL_CHUNK_SIZE', '2000'))
+sentiment_pool = SentimentPool(
+    SENTIMENT_WORKERS,
+    local_scorer=batch_scorer.polarity_batch if batch_scorer else lambda texts: [sia.polarity_scores(text) for text in texts],
+    chunk_size=SENTIMENT_POOL_CHUNK_SIZE,
+    min_batch=SENTIMENT_POOL_MIN_BATCH,
+    batch=SENTIMENT_BATCH_SCORING
+)
+sentiment_cache = SentimentCache(
+    sia.polarity_scores,
+    max_entries=SENTIMENT_CACHE_SIZE,
+    redis_client=redis_client if SENTIMENT_CACHE_REDIS else None,
+    batch_scorer=sentiment_pool.score
+)
+
+# Articles are published through a Redis pipeline, ARTICLE_PUBLISH_CHUNK_SIZE messages per round trip
+ARTICLE_PUBLISH_CHUNK_SIZE = int(os.environ.get('ARTICLE_PUBLISH_CHUNK_SIZE', '500'))
+# ARTICLE_TRANSPORT=stream appends to a capped Redis Stream read through consumer groups (see article_consumer.py)
+# instead of the pub/sub channel, which drops messages sent while no subscriber is connected
+ARTICLE_TRANSPORT = os.environ.get('ARTICLE_TRANSPORT', 'pubsub').lower()
+ARTICLE_STREAM = os.environ.get('ARTICLE_STREAM', 'marketpulse-articles')
+ARTICLE_STREAM_MAXLEN = int(os.environ.get('ARTICLE_STREAM_MAXLEN', '100000'))
+article_publisher: ArticlePublisher
+if ARTICLE_TRANSPORT == 'stream':
+    article_publisher = StreamPublisher(redis_client, stream=ARTICLE_STREAM, maxlen=ARTICLE_STREAM_MAXLEN,
+                                        chunk_size=ARTICLE_PUBLISH_CHUNK_SIZE)
+else:
+    article_publisher = ArticlePublisher(redis_client, chunk_size=ARTICLE_PUBLISH_CHUNK_SIZE)
+
 # --- API Endpoints ---
 
 @app.route('/health')
 def health_check():
     """Health check endpoint."""
-    return jsonify({"status": "ok"})
+    return jsonify({
+        "status": "ok",
+        "sentiment_cache": sentiment_cache.stats(),
+        "sentiment_pool": sentiment_pool.stats(),
+        "article_publisher": article_publisher.stats()
+    })
 
 SYMBOLS = ["TSLA", "AAPL", "NVDA", "MSFT", "AMZN", "GOOGL", "META", "NFLX"]
 POS_TOKENS = ["surges", "jumps", "advances", "rallies", "beats", "soars"]
@@ -39,13 +87,21 @@ def build_title(bullish: bool) -> str:
     else:
         return f"{random.choice(SYMBOLS)} {random.choice(NEG_TOKENS)} {random.choice(NEG_CONTEXT)}"
 
+def all_titles():
+    """Every title build_title can produce"""
+    for tokens, contexts in ((POS_TOKENS, POS_CONTEXT), (NEG_TOKENS, NEG_CONTEXT)):
+        for symbol, token, context in itertools.product(SYMBOLS, tokens, contexts):
+            yield f"{symbol} {token} {context}"
+
+if SENTIMENT_PRECOMPUTE:
+    print(f"Precomputed sentiment for {sentiment_cache.precompute(all_titles())} titles")
+
 def synthesize(batch_size: int):
     now = datetime.utcnow()
     out = []
-    for _ in range(batch_size):
-        bullish = random.random() > 0.5
-        title = build_title(bullish)
-        score = sia.polarity_scores(title)['compound']
+    titles = [build_title(random.random() > 0.5) for _ in range(batch_size)]
+    for title, scores in zip(titles, sentiment_cache.scores_many(titles)):
+        score = scores['compound']
         if score >= 0.05:
             label = 'POSITIVE'
         elif score <= -0.05:
@@ -67,10 +123,10 @@ def synthesize(batch_size: int):
 def trigger_analysis():
     batch_size = int(os.environ.get('ARTICLE_BATCH_SIZE', '12'))
     articles = synthesize(batch_size)
-    for a in articles:
-        redis_client.publish('marketpulse-articles', json.dumps(a))
-        print(f"Published: {a['title']}")
-    return jsonify({'status': 'Analysis triggered', 'articles_published': len(articles)})
+    report = article_publisher.publish(articles)
+    print(f"Published {report['published']} articles in {report['redis_ms']} ms "
+          f"({report['round_trips']} round trips, {report['articles_per_sec']} articles/s)")
+    return jsonify({'status': 'Analysis triggered', 'articles_published': len(articles), 'publish': report})
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5001, debug=True)
@@ -0,0 +1,182 @@
+"""
+Article Consumer - Reference Redis Streams consumer for published articles
+Reads the stream written by StreamPublisher through a consumer group, so
+every entry goes to exactly one consumer of the group and throughput scales
+by starting more consumers under the same group name. Entries are read in
+batches with XREADGROUP and acknowledged with XACK only after the handler
+has processed the batch; if a consumer dies or its handler fails, the
+entries stay pending and another consumer takes them over once they have
+been idle for min_idle_ms (XPENDING + XCLAIM). Entries delivered
+max_deliveries times are moved to a dead-letter stream instead of being
+retried forever.
+
+Usage:
+    python article_consumer.py --group article-storage --consumer worker-1
+"""
+
+import argparse
+import json
+import os
+import socket
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import redis
+
+
+class ArticleConsumer:
+    """Consumes articles from a stream as one member of a consumer group
+
+    handler(articles) receives each batch as a list of article dicts; raising
+    leaves the batch pending so it is retried.
+    """
+
+    def __init__(self, redis_client, handler: Callable[[List[Dict]], None],
+                 stream: str = 'marketpulse-articles', group: str = 'article-storage', consumer: Optional[str] = None,
+                 batch_size: int = 100, block_ms: int = 2000, min_idle_ms: int = 60000,
+                 max_deliveries: int = 5, dead_letter_stream: Optional[str] = None, reclaim_interval: float = 30.0):
+        self.redis_client = redis_client
+        self.handler = handler
+        self.stream = stream
+        self.group = group
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.min_idle_ms = min_idle_ms
+        self.max_deliveries = max_deliveries
+        self.dead_letter_stream = dead_letter_stream or stream + ':dead'
+        self.reclaim_interval = reclaim_interval
+        self._stop = threading.Event()
+        self.processed = 0
+        self.batches = 0
+        self.reclaimed = 0
+        self.dead_lettered = 0
+        self.handler_errors = 0
+
+    def ensure_group(self):
+        """Create the group (and the stream) if needed; a new group starts at the oldest entry"""
+        try:
+            self.redis_client.xgroup_create(self.stream, self.group, id='0', mkstream=True)
+        except redis.ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+
+    def _process(self, entries) -> int:
+        """Hand (id, fields) entries to the handler and acknowledge them; returns the number processed"""
+        # Entries trimmed from the stream since they were read come back without fields
+        gone = [entry_id for entry_id, fields in entries if not fields]
+        if gone:
+            self.redis_client.xack(self.stream, self.group, *gone)
+        entries = [(entry_id, fields) for entry_id, fields in entries if fields]
+        if not entries:
+            return 0
+        ids = [entry_id for entry_id, _ in entries]
+        try:
+            self.handler([json.loads(fields['article']) for _, fields in entries])
+        except Exception as e:
+            self.handler_errors += 1
+            print(f"Article handler failed on {len(ids)} entries, leaving them pending: {e}")
+            return 0
+        self.redis_client.xack(self.stream, self.group, *ids)
+        self.processed += len(ids)
+        self.batches += 1
+        return len(ids)
+
+    def poll(self) -> int:
+        """Read and process one batch of new entries, blocking up to block_ms for them"""
+        response = self.redis_client.xreadgroup(self.group, self.consumer, {self.stream: '>'},
+                                                count=self.batch_size, block=self.block_ms)
+        return sum(self._process(entries) for _, entries in response or [])
+
+    def reclaim(self) -> int:
+        """Take over entries other consumers left pending for min_idle_ms and process them"""
+        pending = self.redis_client.xpending_range(self.stream, self.group, min='-', max='+',
+                                                   count=self.batch_size, idle=self.min_idle_ms)
+        if not pending:
+            return 0
+        deliveries = {entry['message_id']: entry['times_delivered'] for entry in pending}
+        claimed = self.redis_client.xclaim(self.stream, self.group, self.consumer, self.min_idle_ms,
+                                           list(deliveries))
+        entries = [(entry_id, fields) for entry_id, fields in claimed if entry_id is not None and fields]
+        # Trimmed entries are not returned (or come back empty) and can only be acknowledged
+        gone = set(deliveries) - {entry_id for entry_id, _ in entries}
+        if gone:
+            self.redis_client.xack(self.stream, self.group, *gone)
+
+        retry = []
+        for entry_id, fields in entries:
+            if deliveries[entry_id] >= self.max_deliveries:
+                pipe = self.redis_client.pipeline()
+                pipe.xadd(self.dead_letter_stream, dict(fields, source_id=entry_id, group=self.group))
+                pipe.xack(self.stream, self.group, entry_id)
+                pipe.execute()
+                self.dead_lettered += 1
+                print(f"Moved article {entry_id} to {self.dead_letter_stream} after {deliveries[entry_id]} deliveries")
+            else:
+                retry.append((entry_id, fields))
+        self.reclaimed += len(retry)
+        return self._process(retry)
+
+    def recover(self):
+        """Process entries this consumer read before a restart, which are still pending under its name"""
+        while not self._stop.is_set():
+            response = self.redis_client.xreadgroup(self.group, self.consumer, {self.stream: '0'},
+                                                    count=self.batch_size)
+            entries = response[0][1] if response else []
+            if not entries or not self._process(entries):
+                return
+
+    def run(self):
+        """Consume until stop() is called"""
+        self.ensure_group()
+        self.recover()
+        next_reclaim = 0.0
+        while not self._stop.is_set():
+            if time.monotonic() >= next_reclaim:
+                self.reclaim()
+                next_reclaim = time.monotonic() + self.reclaim_interval
+            self.poll()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> dict:
+        return {
+            'stream': self.stream,
+            'group': self.group,
+            'consumer': self.consumer,
+            'processed': self.processed,
+            'batches': self.batches,
+            'reclaimed': self.reclaimed,
+            'dead_lettered': self.dead_lettered,
+            'handler_errors': self.handler_errors
+        }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Consume published articles from a Redis Stream')
+    parser.add_argument('--stream', default=os.environ.get('ARTICLE_STREAM', 'marketpulse-articles'))
+    parser.add_argument('--group', default='article-storage')
+    parser.add_argument('--consumer', default=None, help='Unique per process (default: host-pid)')
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--min-idle-ms', type=int, default=60000)
+    args = parser.parse_args()
+
+    client = redis.Redis(host=os.environ.get('REDIS_HOST', 'localhost'), port=6379, db=0, decode_responses=True)
+    window = {'articles': 0, 'started': time.monotonic()}
+
+    def report(articles):
+        window['articles'] += len(articles)
+        elapsed = time.monotonic() - window['started']
+        if elapsed >= 5:
+            print(f"📥 {window['articles'] / elapsed:,.0f} articles/s, last: {articles[-1].get('title')}")
+            window.update(articles=0, started=time.monotonic())
+
+    consumer = ArticleConsumer(client, report, stream=args.stream, group=args.group, consumer=args.consumer,
+                               batch_size=args.batch_size, min_idle_ms=args.min_idle_ms)
+    print(f"Consuming {args.stream} as {consumer.consumer} in group {args.group}")
+    try:
+        consumer.run()
+    except KeyboardInterrupt:
+        print(consumer.stats())
@@ -0,0 +1,173 @@
+"""
+Article Publisher - Pipelined batch publishing of articles to Redis
+Publishing each article with its own PUBLISH costs one network round trip
+per message. Articles are encoded up front and sent through a
+non-transactional pipeline in chunks of chunk_size, so a trigger costs one
+round trip per chunk; subscribers still receive one message per article,
+in order. StreamPublisher appends the same messages to a capped Redis Stream
+instead, where consumer groups (article_consumer.py) read them durably.
+
+Usage (benchmark, needs a Redis server at REDIS_HOST):
+    python article_publisher.py --articles 10000 --chunk-sizes 1,100,500,2000
+    python article_publisher.py --articles 10000 --stream
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import orjson
+except ImportError:  # Optional: the standard library is slower but produces equivalent JSON
+    orjson = None  # type: ignore[assignment]
+
+
+if orjson is not None:
+    def encode(article: Dict) -> bytes:
+        return orjson.dumps(article)
+else:
+    def encode(article: Dict) -> bytes:
+        return json.dumps(article, separators=(',', ':')).encode()
+
+
+class ArticlePublisher:
+    """Publishes articles to a pub/sub channel in pipelined chunks and keeps throughput stats"""
+
+    def __init__(self, redis_client, channel: str = 'marketpulse-articles', chunk_size: int = 500):
+        self.redis_client = redis_client
+        self.channel = channel
+        self.chunk_size = max(1, chunk_size)
+        self._lock = threading.Lock()
+        self.published = 0
+        self.batches = 0
+        self.round_trips = 0
+        self.redis_seconds = 0.0
+        self.last: Optional[dict] = None
+
+    def _send(self, messages: List[bytes]) -> int:
+        """Send one chunk in a single round trip; returns the number of deliveries"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        for message in messages:
+            pipe.publish(self.channel, message)
+        return sum(pipe.execute())
+
+    def publish(self, articles: Sequence[Dict]) -> dict:
+        """Publish articles in order and return a report of what it cost"""
+        started = time.perf_counter()
+        messages = [encode(article) for article in articles]
+        encoded = time.perf_counter()
+
+        deliveries = 0
+        round_trips = 0
+        slowest = 0.0
+        for offset in range(0, len(messages), self.chunk_size):
+            sent = time.perf_counter()
+            deliveries += self._send(messages[offset:offset + self.chunk_size])
+            slowest = max(slowest, time.perf_counter() - sent)
+            round_trips += 1
+        finished = time.perf_counter()
+
+        report = {
+            'published': len(messages),
+            'round_trips': round_trips,
+            'deliveries': deliveries,  # subscriber receipts summed over messages
+            'encode_ms': round((encoded - started) * 1000, 3),
+            'redis_ms': round((finished - encoded) * 1000, 3),
+            'slowest_round_trip_ms': round(slowest * 1000, 3),
+            'articles_per_sec': round(len(messages) / (finished - started)) if messages else 0
+        }
+        with self._lock:
+            self.published += len(messages)
+            self.batches += 1
+            self.round_trips += round_trips
+            self.redis_seconds += finished - encoded
+            self.last = report
+        return report
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'transport': 'pubsub',
+                'channel': self.channel,
+                'chunk_size': self.chunk_size,
+                'encoder': 'orjson' if orjson is not None else 'json',
+                'published': self.published,
+                'batches': self.batches,
+                'round_trips': self.round_trips,
+                'redis_ms': round(self.redis_seconds * 1000, 3),
+                'last': self.last
+            }
+
+
+class StreamPublisher(ArticlePublisher):
+    """Appends articles to a Redis Stream trimmed to about maxlen entries
+
+    Each entry holds the encoded article in its 'article' field. Trimming is
+    approximate (MAXLEN ~), which lets Redis drop whole nodes cheaply.
+    """
+
+    def __init__(self, redis_client, stream: str = 'marketpulse-articles', maxlen: int = 100000,
+                 chunk_size: int = 500):
+        super().__init__(redis_client, channel=stream, chunk_size=chunk_size)
+        self.maxlen = maxlen
+
+    def _send(self, messages: List[bytes]) -> int:
+        pipe = self.redis_client.pipeline(transaction=False)
+        for message in messages:
+            pipe.xadd(self.channel, {'article': message}, maxlen=self.maxlen, approximate=True)
+        pipe.execute()
+        return len(messages)  # entries appended; consumers read them later
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats.pop('channel')
+        stats.update({'transport': 'stream', 'stream': self.channel, 'maxlen': self.maxlen})
+        return stats
+
+
+if __name__ == '__main__':
+    import redis
+
+    parser = argparse.ArgumentParser(description='Compare one PUBLISH or XADD per article with pipelined chunks')
+    parser.add_argument('--articles', type=int, default=10000)
+    parser.add_argument('--chunk-sizes', default='1,100,500,2000', help='Comma-separated chunk sizes')
+    parser.add_argument('--channel', default='marketpulse-articles-benchmark', help='Channel or stream key')
+    parser.add_argument('--stream', action='store_true', help='XADD to a stream instead of PUBLISH')
+    parser.add_argument('--maxlen', type=int, default=100000)
+    args = parser.parse_args()
+
+    client = redis.Redis(host=os.environ.get('REDIS_HOST', 'localhost'), port=6379, db=0)
+    articles = [{
+        'title': f"TSLA surges on strong demand #{i}",
+        'content': f"TSLA surges on strong demand #{i} Additional context ...",
+        'symbol': 'TSLA',
+        'sentiment_score': 51,
+        'sentiment_label': 'POSITIVE',
+        'published_at': '2026-10-18T14:30:00.123456Z'
+    } for i in range(args.articles)]
+
+    started = time.perf_counter()
+    for article in articles:
+        if args.stream:
+            client.xadd(args.channel, {'article': json.dumps(article)}, maxlen=args.maxlen, approximate=True)
+        else:
+            client.publish(args.channel, json.dumps(article))
+    baseline = time.perf_counter() - started
+    command = 'XADD' if args.stream else 'PUBLISH'
+    print(f"📣 {args.articles} articles, encoder: {'orjson' if orjson is not None else 'json (orjson not installed)'}")
+    print(f"   one {command:<7} per article: {baseline * 1000:>9.1f} ms  {args.articles / baseline:>10,.0f} articles/s")
+
+    for chunk_size in [int(size) for size in args.chunk_sizes.split(',')]:
+        publisher: ArticlePublisher
+        if args.stream:
+            publisher = StreamPublisher(client, stream=args.channel, maxlen=args.maxlen, chunk_size=chunk_size)
+        else:
+            publisher = ArticlePublisher(client, channel=args.channel, chunk_size=chunk_size)
+        report = publisher.publish(articles)
+        total = report['encode_ms'] + report['redis_ms']
+        print(f"   chunks of {chunk_size:>5}:         {total:>9.1f} ms  {report['articles_per_sec']:>10,} articles/s  "
+              f"{report['round_trips']} round trips, slowest {report['slowest_round_trip_ms']:.1f} ms  "
+              f"({baseline * 1000 / total:.1f}x)")
@@ -0,0 +1,312 @@
+"""
+Sentiment Batch - Vectorized VADER scoring for many texts at once
+Texts are tokenized once in Python and mapped through a vocabulary index to
+integer ids; lexicon valence, booster, negation and capitalization rules are
+then applied to the whole batch as NumPy arrays instead of per word.
+
+Compound scores match SentimentIntensityAnalyzer.polarity_scores to its
+4-decimal rounding (neg/neu/pos to 3 decimals), except that the seven
+SPECIAL_CASE_IDIOMS ("the bomb", "yeah right", ...) are not applied: texts
+containing them keep the plain lexicon valence. Run this module to check
+agreement and throughput against the per-text analyzer.
+
+Usage (benchmark):
+    python sentiment_batch.py --texts 20000
+"""
+
+import argparse
+import itertools
+import random
+import re
+import string
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from nltk.sentiment.vader import VaderConstants
+
+OOV = 0  # not in the vocabulary
+OOV_NT = 1  # not in the vocabulary but contains "n't", which VADER treats as a negation
+
+SPECIAL_WORDS = ('but', 'kind', 'of', 'least', 'at', 'very', 'never', 'so', 'this')
+PUNCTUATION = frozenset(string.punctuation)
+PUNCTUATION_RE = re.compile(f"[{re.escape(string.punctuation)}]")
+
+
+class BatchSentimentScorer:
+    """VADER compound (and neg/neu/pos) scores computed for a batch of texts with NumPy"""
+
+    def __init__(self, lexicon: Dict[str, float], constants: Optional[VaderConstants] = None, chunk_size: int = 4096):
+        self.constants = constants or VaderConstants()
+        self.chunk_size = chunk_size
+        self._punc = frozenset(self.constants.PUNC_LIST)
+        boosters = self.constants.BOOSTER_DICT
+        self._pairs = [tuple(phrase.split()) for phrase in boosters if ' ' in phrase]
+
+        words = list(dict.fromkeys([
+            *lexicon, *boosters, *self.constants.NEGATE, *SPECIAL_WORDS,
+            *(word for pair in self._pairs for word in pair)
+        ]))
+        words = [word for word in words if ' ' not in word]
+        self.vocab = {word: index for index, word in enumerate(words, start=2)}
+
+        size = len(words) + 2
+        self.valence = np.zeros(size)
+        self.in_lexicon = np.zeros(size, dtype=bool)
+        self.booster = np.zeros(size)
+        self.negation = np.zeros(size, dtype=bool)
+        self.negation[OOV_NT] = True
+        for word, index in self.vocab.items():
+            if word in lexicon:
+                self.valence[index] = lexicon[word]
+                self.in_lexicon[index] = True
+            self.booster[index] = boosters.get(word, 0.0)
+            self.negation[index] = word in self.constants.NEGATE or "n't" in word
+        self._ids = {word: self.vocab[word] for word in SPECIAL_WORDS}
+        self._pairs = [(self.vocab[first], self.vocab[second]) for first, second in self._pairs]
+
+    def _strip(self, token):
+        """VADER's punctuation stripping for one token (see SentiText._words_and_emoticons)
+
+        VADER replaces punc+word and word+punc by word when word appears in the
+        punctuation-free text, which holds exactly when word itself has no
+        punctuation and is longer than one character.
+        """
+        stem = token.rstrip(string.punctuation)
+        if token[len(stem):] in self._punc and len(stem) > 1 and not PUNCTUATION_RE.search(stem):
+            return stem
+        stem = token.lstrip(string.punctuation)
+        if token[:len(token) - len(stem)] in self._punc and len(stem) > 1 and not PUNCTUATION_RE.search(stem):
+            return stem
+        return token
+
+    def _encode(self, texts):
+        """Padded (ids, upper, lower, first, lengths) arrays for texts
+
+        Stripping, lowercasing and the vocabulary lookup run once per distinct
+        token of the batch; first maps each token to the position of its first
+        occurrence in the text, where VADER evaluates repeated tokens.
+        """
+        # One flat token list; per-text lists would be kept alive and make the GC rescan them
+        counts = np.fromiter(map(len, map(str.split, texts)), dtype=np.int64, count=len(texts))
+        tokens = ' '.join(texts).split()
+        distinct = list(dict.fromkeys(tokens))
+        position = dict(zip(distinct, itertools.count()))
+        raw = np.fromiter(map(position.__getitem__, tokens), dtype=np.int64, count=len(tokens))
+
+        strip = self._strip
+        words = [strip(token) if token[0] in PUNCTUATION or token[-1] in PUNCTUATION else token for token in distinct]
+        lowers = [word.lower() for word in words]
+        lookup = self.vocab.get
+        word_ids = np.array([lookup(lower) or (OOV_NT if "n't" in lower else OOV) for lower in lowers], dtype=np.int32)
+        word_upper = np.array([word.isupper() for word in words], dtype=bool)
+        word_lower = np.array([word == lower for word, lower in zip(words, lowers)], dtype=bool)
+        # VADER drops 1-character tokens before stripping punctuation
+        word_kept = np.array([len(token) > 1 for token in distinct], dtype=bool)
+        canonical = dict(zip(dict.fromkeys(words), itertools.count()))
+        word_keys = np.array([canonical[word] for word in words], dtype=np.int64)
+
+        kept = word_kept[raw] if len(raw) else np.zeros(0, dtype=bool)
+        raw = raw[kept]
+        rows = np.repeat(np.arange(len(texts)), counts)[kept]
+        lengths = np.bincount(rows, minlength=len(texts)).astype(np.int64)
+        starts = np.cumsum(lengths) - lengths
+        cols = np.arange(len(raw)) - starts[rows]
+        _, first_index, inverse = np.unique(rows * max(len(canonical), 1) + word_keys[raw],
+                                            return_index=True, return_inverse=True)
+        flat_first = first_index[inverse.reshape(-1)] - starts[rows]
+
+        width = max(int(lengths.max()) if len(lengths) else 0, 1)
+        cells = rows * width + cols
+        ids = np.zeros((len(texts), width), dtype=np.int32)
+        upper = np.zeros((len(texts), width), dtype=bool)
+        lower = np.zeros((len(texts), width), dtype=bool)
+        first = np.zeros((len(texts), width), dtype=np.int64)
+        ids.ravel()[cells] = word_ids[raw]
+        upper.ravel()[cells] = word_upper[raw]
+        lower.ravel()[cells] = word_lower[raw]
+        first.ravel()[cells] = flat_first
+        return ids, upper, lower, first, lengths
+
+    def _sentiments(self, ids, upper, lower, first, lengths):
+        """Per-token valences after every VADER rule, zero on padding"""
+        c = self.constants
+        special = self._ids
+        width = ids.shape[1]
+        cols = np.arange(width)[None, :]
+        mask = cols < lengths[:, None]
+        n_upper = (upper & mask).sum(axis=1)
+        cap_diff = (n_upper > 0) & (n_upper < lengths)
+
+        # Only lexicon words get a valence, and boosters and the "kind" of "kind of" are skipped,
+        # so the rules run on a flat array of those positions
+        flat_ids, flat_upper, flat_lower = ids.ravel(), upper.ravel(), lower.ravel()
+        positions = np.flatnonzero(self.in_lexicon[flat_ids] & (self.booster[flat_ids] == 0) & mask.ravel())
+        col = positions % width
+        word = flat_ids[positions]
+        following = np.where(col + 1 < width, flat_ids[np.minimum(positions + 1, flat_ids.size - 1)], OOV)
+        keep = ~((word == special['kind']) & (following == special['of']))
+        positions, col, word = positions[keep], col[keep], word[keep]
+        capitalized = cap_diff[positions // width]
+
+        prev, prev_upper, prev_lower = [], [], []
+        for k in (1, 2, 3):
+            valid = col >= k
+            index = np.where(valid, positions - k, 0)
+            prev.append(np.where(valid, flat_ids[index], OOV))
+            prev_upper.append(valid & flat_upper[index])
+            prev_lower.append(valid & flat_lower[index])
+        # The "never so" rules compare words case-sensitively
+        never = [(p == special['never']) & l for p, l in zip(prev, prev_lower)]
+        so_this = [((p == special['so']) | (p == special['this'])) & l for p, l in zip(prev, prev_lower)]
+
+        valence = self.valence[word]
+        valence = np.where(flat_upper[positions] & capitalized, valence + np.where(valence > 0, c.C_INCR, -c.C_INCR), valence)
+
+        for start, weight in enumerate((1.0, 0.95, 0.9)):
+            before = prev[start]
+            applies = (col > start) & ~self.in_lexicon[before]
+
+            scalar = self.booster[before] * np.where(valence < 0, -1.0, 1.0)
+            capped = (self.booster[before] != 0) & prev_upper[start] & capitalized
+            scalar = np.where(capped, scalar + np.where(valence > 0, c.C_INCR, -c.C_INCR), scalar)
+            valence = np.where(applies, valence + scalar * weight, valence)
+
+            negated = self.negation[before]
+            if start == 0:
+                valence = np.where(applies & negated, valence * c.N_SCALAR, valence)
+            elif start == 1:
+                never_so = never[1] & so_this[0]
+                valence = np.where(applies & never_so, valence * 1.5,
+                                   np.where(applies & negated, valence * c.N_SCALAR, valence))
+            else:
+                never_so = (never[2] & so_this[1]) | so_this[0]
+                valence = np.where(applies & never_so, valence * 1.25,
+                                   np.where(applies & negated, valence * c.N_SCALAR, valence))
+                # Two-word boosters ("kind of", "sort of") right before the word damp it; matched case-sensitively
+                phrase = np.zeros_like(applies)
+                for first_id, second_id in self._pairs:
+                    phrase |= (prev[2] == first_id) & prev_lower[2] & (prev[1] == second_id) & prev_lower[1]
+                    phrase |= (prev[1] == first_id) & prev_lower[1] & (prev[0] == second_id) & prev_lower[0]
+                valence = np.where(applies & phrase, valence + c.B_DECR, valence)
+
+        least = (prev[0] == special['least']) & ~self.in_lexicon[special['least']]
+        exempt = (col > 1) & ((prev[1] == special['at']) | (prev[1] == special['very']))
+        valence = np.where(least & ~exempt, valence * c.N_SCALAR, valence)
+
+        grid = np.zeros(ids.shape)
+        grid.ravel()[positions] = valence
+        # VADER scores a repeated token at its first occurrence
+        sentiments = np.take_along_axis(grid, first, axis=1)
+
+        is_but = (ids == special['but']) & mask
+        has_but = is_but.any(axis=1)[:, None]
+        but_at = is_but.argmax(axis=1)[:, None]
+        factor = np.where(cols < but_at, 0.5, np.where(cols > but_at, 1.5, 1.0))
+        sentiments = np.where(has_but, sentiments * factor, sentiments)
+        return np.where(mask, sentiments, 0.0), mask
+
+    def _punctuation(self, texts):
+        exclamations = np.minimum([text.count('!') for text in texts], 4) * 0.292
+        questions = np.array([text.count('?') for text in texts])
+        return exclamations + np.where(questions > 3, 0.96, np.where(questions > 1, questions * 0.18, 0.0))
+
+    def _scores(self, texts):
+        """Unrounded (neg, neu, pos, compound) rows, one column per text"""
+        parts = []
+        for offset in range(0, len(texts), self.chunk_size):
+            chunk = texts[offset:offset + self.chunk_size]
+            ids, upper, lower, first, lengths = self._encode(chunk)
+            sentiments, mask = self._sentiments(ids, upper, lower, first, lengths)
+            amplifier = self._punctuation(chunk)
+
+            # Summed left to right like VADER, so near-ties round the same way
+            total = np.zeros(len(chunk))
+            pos_sum = np.zeros(len(chunk))
+            neg_sum = np.zeros(len(chunk))
+            for column in sentiments.T:
+                total += column
+                pos_sum += np.where(column > 0, column + 1, 0.0)
+                neg_sum += np.where(column < 0, column - 1, 0.0)
+            neu_count = ((sentiments == 0) & mask).sum(axis=1)
+            total = total + np.sign(total) * amplifier
+            compound = total / np.sqrt(total * total + 15)
+
+            pos_sum, neg_sum = (np.where(pos_sum > -neg_sum, pos_sum + amplifier, pos_sum),
+                                np.where(pos_sum < -neg_sum, neg_sum - amplifier, neg_sum))
+            denominator = pos_sum - neg_sum + neu_count
+            scored = lengths > 0
+            denominator = np.where(scored, denominator, 1.0)
+
+            parts.append(np.stack([
+                np.abs(neg_sum / denominator),
+                np.abs(neu_count / denominator),
+                np.abs(pos_sum / denominator),
+                np.where(scored, compound, 0.0)
+            ]))
+        return np.concatenate(parts, axis=1) if parts else np.zeros((4, 0))
+
+    # Scores go through Python's round() like polarity_scores; np.round can differ on halfway values
+
+    def score_batch(self, texts: Sequence[str]) -> np.ndarray:
+        """Compound score for each text"""
+        return np.array([round(value, 4) for value in self._scores(texts)[3].tolist()])
+
+    def polarity_batch(self, texts: Sequence[str]) -> List[Dict[str, float]]:
+        """polarity_scores-style dicts for each text"""
+        neg, neu, pos, compound = self._scores(texts).tolist()
+        return [
+            {'neg': round(n, 3), 'neu': round(u, 3), 'pos': round(p, 3), 'compound': round(c, 4)}
+            for n, u, p, c in zip(neg, neu, pos, compound)
+        ]
+
+
+def sample_texts(count, lexicon, seed=7):
+    """Random headline-like texts mixing lexicon words, boosters, negations, caps and punctuation"""
+    rng = random.Random(seed)
+    constants = VaderConstants()
+    vocabulary = sorted(lexicon)
+    boosters = sorted(word for word in constants.BOOSTER_DICT if ' ' not in word)
+    negations = sorted(constants.NEGATE)
+    fillers = ['TSLA', 'AAPL', 'shares', 'the', 'market', 'after', 'on', 'at', 'least', 'but', 'kind', 'of',
+               'never', 'so', 'this', 'very', 'demand', 'outlook', 'Q3', 'earnings', 'a', 'I']
+    texts = []
+    for _ in range(count):
+        words = []
+        for _ in range(rng.randint(3, 14)):
+            pool = rng.choices((vocabulary, boosters, negations, fillers), weights=(4, 1, 1, 6))[0]
+            word = rng.choice(pool)
+            if rng.random() < 0.08:
+                word = word.upper()
+            if rng.random() < 0.08:
+                word += rng.choice(('.', ',', '!', '?', '!!', ':'))
+            words.append(word)
+        texts.append(' '.join(words))
+    return texts
+
+
+if __name__ == '__main__':
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+
+    parser = argparse.ArgumentParser(description='Compare batch scoring with per-text VADER')
+    parser.add_argument('--texts', type=int, default=20000)
+    args = parser.parse_args()
+
+    sia = SentimentIntensityAnalyzer()
+    scorer = BatchSentimentScorer(sia.lexicon)
+    texts = sample_texts(args.texts, sia.lexicon)
+
+    started = time.perf_counter()
+    expected = np.array([sia.polarity_scores(text)['compound'] for text in texts])
+    loop_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    actual = scorer.score_batch(texts)
+    batch_seconds = time.perf_counter() - started
+
+    difference = np.abs(actual - expected)
+    labels = lambda scores: np.where(scores >= 0.05, 1, np.where(scores <= -0.05, -1, 0))
+    print(f"🧮 {args.texts} texts: per-text loop {args.texts / loop_seconds:,.0f}/s, "
+          f"batch {args.texts / batch_seconds:,.0f}/s ({loop_seconds / batch_seconds:.1f}x)")
+    print(f"   compound equal to 4 decimals: {np.mean(difference < 1e-9):.2%}, "
+          f"max |diff| {difference.max():.4f}, labels agree: {np.mean(labels(actual) == labels(expected)):.2%}")
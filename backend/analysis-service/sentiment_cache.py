@@ -0,0 +1,142 @@
+"""
+Sentiment Cache - Memoized VADER scores keyed by normalized text
+Headlines repeat heavily (the synthetic title space is a few hundred strings
+and wire stories are syndicated), so scores are kept in a bounded in-process
+LRU keyed by a hash of the text, optionally backed by Redis so every worker
+shares them. Normalization only collapses whitespace: VADER splits on it,
+while case and punctuation change the score and are kept.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+def text_key(text: str) -> str:
+    normalized = ' '.join(text.split())
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class SentimentCache:
+    """LRU of polarity scores in front of scorer(text), with an optional shared Redis tier
+
+    batch_scorer(texts), if given, scores all misses of a lookup in one call.
+    """
+
+    def __init__(self, scorer: Callable[[str], Dict[str, float]], max_entries: int = 100000,
+                 redis_client=None, prefix: str = 'sentiment:vader:', ttl: int = 7 * 86400,
+                 batch_scorer: Optional[Callable[[List[str]], List[Dict[str, float]]]] = None):
+        self.scorer = scorer
+        self.batch_scorer = batch_scorer
+        self.max_entries = max_entries
+        self.redis_client = redis_client
+        self.prefix = prefix
+        self.ttl = ttl
+        self._entries: OrderedDict[str, Dict[str, float]] = OrderedDict()  # text key -> scores
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.redis_errors = 0
+        self.precomputed = 0
+
+    def _get_local(self, key):
+        with self._lock:
+            scores = self._entries.get(key)
+            if scores is not None:
+                self._entries.move_to_end(key)
+            return scores
+
+    def _set_local(self, key, scores):
+        with self._lock:
+            self._entries[key] = scores
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def scores(self, text: str) -> Dict[str, float]:
+        return self.scores_many([text])[0]
+
+    def compound(self, text: str) -> float:
+        return self.scores(text)['compound']
+
+    def scores_many(self, texts: List[str]) -> List[Dict[str, float]]:
+        """Scores for texts in order; each distinct miss is scored once, with one Redis round trip each way"""
+        keys = [text_key(text) for text in texts]
+        found, from_redis, computed = self._resolve(dict(zip(keys, texts)))
+        with self._lock:
+            # Repeats within the batch count as hits
+            self.redis_hits += from_redis
+            self.misses += computed
+            self.hits += len(texts) - from_redis - computed
+        return [found[key] for key in keys]
+
+    def _resolve(self, texts):
+        """({key: scores}, Redis hits, scorer calls) for distinct {key: text}"""
+        found = {}
+        missing = {}
+        for key, text in texts.items():
+            scores = self._get_local(key)
+            if scores is not None:
+                found[key] = scores
+            else:
+                missing[key] = text
+
+        from_redis = 0
+        if missing and self.redis_client is not None:
+            try:
+                values = self.redis_client.mget([self.prefix + key for key in missing])
+                for key, value in zip(list(missing), values):
+                    if value:
+                        found[key] = json.loads(value)
+                        self._set_local(key, found[key])
+                        del missing[key]
+                        from_redis += 1
+            except Exception as e:
+                self.redis_errors += 1
+                print(f"Sentiment cache Redis read failed: {e}")
+
+        if self.batch_scorer is not None and missing:
+            computed = dict(zip(missing, self.batch_scorer(list(missing.values()))))
+        else:
+            computed = {key: self.scorer(text) for key, text in missing.items()}
+        for key, scores in computed.items():
+            self._set_local(key, scores)
+        found.update(computed)
+        if computed and self.redis_client is not None:
+            try:
+                pipe = self.redis_client.pipeline(transaction=False)
+                for key, scores in computed.items():
+                    pipe.set(self.prefix + key, json.dumps(scores), ex=self.ttl)
+                pipe.execute()
+            except Exception as e:
+                self.redis_errors += 1
+                print(f"Sentiment cache Redis write failed: {e}")
+        return found, from_redis, len(computed)
+
+    def precompute(self, texts: Iterable[str]) -> int:
+        """Score a known text space up front so requests only ever hit the cache (not counted in hit rate)"""
+        distinct = {text_key(text): text for text in texts}
+        self._resolve(distinct)
+        self.precomputed += len(distinct)
+        return len(distinct)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.redis_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'redis_hits': self.redis_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'redis_enabled': self.redis_client is not None,
+                'redis_errors': self.redis_errors,
+                'precomputed': self.precomputed,
+                'hit_rate': round((self.hits + self.redis_hits) / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,180 @@
+"""
+Sentiment Pool - Process pool for scoring large batches of texts
+Scoring is CPU-bound, so a big batch scored in the request thread blocks the
+worker and uses one core. Large batches are split into chunks and scored by
+worker processes, each of which loads the VADER lexicon once when it starts;
+results come back in input order. Small batches are scored in-process, where
+the inter-process round trip would cost more than it saves.
+
+Usage (benchmark):
+    python sentiment_pool.py --texts 100000 --workers 1,2,4
+"""
+
+import argparse
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional, Sequence
+
+_scorer = None  # set in each worker process by _init_worker
+
+
+def _init_worker(batch: bool):
+    global _scorer
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+
+    sia = SentimentIntensityAnalyzer()
+    if batch:
+        from sentiment_batch import BatchSentimentScorer
+        _scorer = BatchSentimentScorer(sia.lexicon, sia.constants).polarity_batch
+    else:
+        _scorer = lambda texts: [sia.polarity_scores(text) for text in texts]
+
+
+def _score_chunk(texts):
+    return _scorer(texts)
+
+
+def _worker_pid(_):
+    return os.getpid()
+
+
+class SentimentPool:
+    """Scores text batches across worker processes, falling back to local_scorer for small ones
+
+    Workers use the spawn start method: the service runs request threads, and
+    forking a threaded process can leave locks held in the child.
+    """
+
+    def __init__(self, workers: int, local_scorer: Callable[[List[str]], List[Dict[str, float]]],
+                 chunk_size: int = 2000, min_batch: int = 2000, batch: bool = True):
+        self.workers = workers
+        self.local_scorer = local_scorer
+        self.chunk_size = chunk_size
+        self.min_batch = min_batch
+        self.batch = batch
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.pooled_batches = 0
+        self.pooled_texts = 0
+        self.local_texts = 0
+        self.chunks = 0
+        self.failures = 0
+        self.last_duration: Optional[float] = None
+
+    def _get_executor(self):
+        with self._lock:
+            # A pool does not survive a fork, so each gunicorn worker starts its own
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(self.batch,)
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def start(self):
+        """Start every worker now instead of on the first large batch"""
+        if self.workers > 0:
+            executor = self._get_executor()
+            list(executor.map(_worker_pid, range(self.workers)))
+
+    def score(self, texts: Sequence[str]) -> List[Dict[str, float]]:
+        """polarity_scores-style dicts for texts, in order"""
+        texts = list(texts)
+        # Spawned workers re-import the main module (under their own process name); anything
+        # it scores there stays in-process rather than starting another pool
+        if (self.workers < 1 or len(texts) < self.min_batch
+                or multiprocessing.current_process().name != 'MainProcess'):
+            self.local_texts += len(texts)
+            return self.local_scorer(texts)
+
+        started = time.monotonic()
+        # Enough chunks to keep every worker busy, none larger than chunk_size
+        size = max(1, min(self.chunk_size, math.ceil(len(texts) / self.workers)))
+        chunks = [texts[offset:offset + size] for offset in range(0, len(texts), size)]
+        try:
+            results = []
+            for scores in self._get_executor().map(_score_chunk, chunks):
+                results.extend(scores)
+        except BrokenProcessPool as e:
+            self.failures += 1
+            print(f"Sentiment pool failed ({e}), scoring {len(texts)} texts in-process")
+            with self._lock:
+                self._executor = None
+            self.local_texts += len(texts)
+            return self.local_scorer(texts)
+
+        self.pooled_batches += 1
+        self.pooled_texts += len(texts)
+        self.chunks += len(chunks)
+        self.last_duration = round(time.monotonic() - started, 4)
+        return results
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown()
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            'workers': self.workers,
+            'running': self._executor is not None and self._pid == os.getpid(),
+            'chunk_size': self.chunk_size,
+            'min_batch': self.min_batch,
+            'pooled_batches': self.pooled_batches,
+            'pooled_texts': self.pooled_texts,
+            'local_texts': self.local_texts,
+            'chunks': self.chunks,
+            'failures': self.failures,
+            'last_duration': self.last_duration
+        }
+
+
+if __name__ == '__main__':
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+    from sentiment_batch import sample_texts
+
+    parser = argparse.ArgumentParser(description='Measure sentiment scoring throughput by worker count')
+    parser.add_argument('--texts', type=int, default=100000)
+    parser.add_argument('--workers', default=','.join(str(2 ** i) for i in range(int(math.log2(os.cpu_count() or 1)) + 1)),
+                        help='Comma-separated worker counts')
+    parser.add_argument('--scorer', choices=('batch', 'vader'), default='vader')
+    parser.add_argument('--chunk-size', type=int, default=2000)
+    args = parser.parse_args()
+
+    sia = SentimentIntensityAnalyzer()
+    texts = sample_texts(args.texts, sia.lexicon)
+    if args.scorer == 'batch':
+        from sentiment_batch import BatchSentimentScorer
+        local_scorer = BatchSentimentScorer(sia.lexicon, sia.constants).polarity_batch
+    else:
+        local_scorer = lambda texts: [sia.polarity_scores(text) for text in texts]
+    print(f"🧵 {args.texts} texts, {args.scorer} scorer, {os.cpu_count()} CPUs")
+
+    baseline = None
+    reference = None
+    for workers in [int(count) for count in args.workers.split(',')]:
+        pool = SentimentPool(workers, local_scorer=local_scorer, chunk_size=args.chunk_size, min_batch=0,
+                             batch=args.scorer == 'batch')
+        pool.start()
+        started = time.perf_counter()
+        scores = pool.score(texts)
+        elapsed = time.perf_counter() - started
+        pool.shutdown()
+
+        reference = reference or scores
+        assert scores == reference, 'results differ between worker counts'
+        rate = args.texts / elapsed
+        baseline = baseline or rate
+        speedup = rate / baseline
+        print(f"   {workers:>3} workers: {rate:>10,.0f} texts/s  {speedup:5.2f}x  "
+              f"({speedup / workers:.0%} per worker)")
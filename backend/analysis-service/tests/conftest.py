@@ -0,0 +1,34 @@
+import os
+import sys
+import zipfile
+
+import nltk
+import pytest
+from nltk.sentiment.vader import SentimentIntensityAnalyzer
+
+# The service's modules are flat files next to app.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Stand-in for the downloaded VADER lexicon: lexicon words, negations and boosters that VADER special-cases
+STAND_IN_LEXICON = {
+    'good': 1.9, 'great': 3.1, 'strong': 2.3, 'upbeat': 1.6, 'win': 2.8, 'love': 3.2, 'kind': 2.4,
+    'bad': -2.5, 'weak': -1.9, 'fears': -1.8, 'loss': -1.3, 'miss': -0.6, 'no': -1.2, 'hate': -2.7
+}
+
+
+@pytest.fixture(scope='session')
+def vader(tmp_path_factory):
+    """A SentimentIntensityAnalyzer, built from STAND_IN_LEXICON when the real lexicon isn't downloaded"""
+    try:
+        return SentimentIntensityAnalyzer()
+    except LookupError:
+        pass
+    root = tmp_path_factory.mktemp('nltk_data')
+    (root / 'sentiment').mkdir()
+    with zipfile.ZipFile(root / 'sentiment' / 'vader_lexicon.zip', 'w') as archive:
+        archive.writestr('vader_lexicon/vader_lexicon.txt',
+                         '\n'.join(f"{word}\t{valence}\t0.5\t[]" for word, valence in STAND_IN_LEXICON.items()))
+    # Spawned pool workers find it through NLTK_DATA
+    os.environ['NLTK_DATA'] = str(root)
+    nltk.data.path.insert(0, str(root))
+    return SentimentIntensityAnalyzer()
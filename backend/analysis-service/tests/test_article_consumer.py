@@ -0,0 +1,82 @@
+import time
+
+import fakeredis
+
+from article_consumer import ArticleConsumer
+from article_publisher import StreamPublisher
+
+STREAM = 'articles-test'
+
+
+def publish(client, count):
+    articles = [{'title': f"TSLA surges #{i}", 'symbol': 'TSLA'} for i in range(count)]
+    StreamPublisher(client, stream=STREAM, chunk_size=2).publish(articles)
+    return articles
+
+
+def pending(client, group='storage'):
+    return client.xpending(STREAM, group)['pending']
+
+
+def reclaim(consumer):
+    time.sleep(0.005)  # let the entries reach min_idle_ms
+    return consumer.reclaim()
+
+
+def test_processed_batches_are_acknowledged():
+    client = fakeredis.FakeRedis(decode_responses=True)
+    received = []
+    consumer = ArticleConsumer(client, received.extend, stream=STREAM, group='storage', consumer='a',
+                               block_ms=1)
+    consumer.ensure_group()
+    articles = publish(client, 5)
+
+    assert consumer.poll() == 5
+    assert received == articles
+    assert pending(client) == 0
+    assert consumer.poll() == 0
+
+
+def test_failed_batch_stays_pending_and_is_retried_by_another_consumer():
+    client = fakeredis.FakeRedis(decode_responses=True)
+
+    def fail(articles):
+        raise RuntimeError('storage down')
+
+    broken = ArticleConsumer(client, fail, stream=STREAM, group='storage', consumer='a', block_ms=1)
+    broken.ensure_group()
+    articles = publish(client, 3)
+    assert broken.poll() == 0
+    assert broken.handler_errors == 1
+    assert pending(client) == 3
+
+    received = []
+    healthy = ArticleConsumer(client, received.extend, stream=STREAM, group='storage', consumer='b',
+                              block_ms=1, min_idle_ms=1)
+    assert reclaim(healthy) == 3
+    assert received == articles
+    assert healthy.reclaimed == 3
+    assert pending(client) == 0
+
+
+def test_entries_delivered_too_often_go_to_the_dead_letter_stream():
+    client = fakeredis.FakeRedis(decode_responses=True)
+
+    def fail(articles):
+        raise RuntimeError('bad article')
+
+    consumer = ArticleConsumer(client, fail, stream=STREAM, group='storage', consumer='a', block_ms=1,
+                               min_idle_ms=1, max_deliveries=3)
+    consumer.ensure_group()
+    publish(client, 1)
+    consumer.poll()  # first delivery
+    reclaim(consumer)  # second
+    reclaim(consumer)  # third, still below the limit when it was claimed
+    assert client.xlen(consumer.dead_letter_stream) == 0
+
+    assert reclaim(consumer) == 0
+    assert consumer.dead_lettered == 1
+    assert pending(client) == 0
+    [(_, fields)] = client.xrange(consumer.dead_letter_stream)
+    assert fields['group'] == 'storage'
+    assert '"TSLA surges #0"' in fields['article']
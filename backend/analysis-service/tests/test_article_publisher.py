@@ -0,0 +1,61 @@
+import json
+
+import fakeredis
+
+from article_publisher import ArticlePublisher, StreamPublisher
+
+
+def articles(count):
+    return [{'title': f"AAPL jumps #{i}", 'symbol': 'AAPL', 'sentiment_score': 40} for i in range(count)]
+
+
+class CountingRedis(fakeredis.FakeRedis):
+    """Counts pipelines, each of which is one round trip"""
+    pipelines = 0
+
+    def pipeline(self, *args, **kwargs):
+        self.pipelines += 1
+        return super().pipeline(*args, **kwargs)
+
+
+def test_publish_sends_chunks_in_one_round_trip_each_in_order():
+    client = CountingRedis()
+    pubsub = client.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe('articles-test')
+    sent = articles(7)
+
+    report = ArticlePublisher(client, channel='articles-test', chunk_size=3).publish(sent)
+
+    assert report['published'] == 7
+    assert report['round_trips'] == 3
+    assert client.pipelines == 3
+    assert report['deliveries'] == 7  # one subscriber
+    received = []
+    for _ in range(100):  # get_message also returns None for the (ignored) subscribe confirmation
+        message = pubsub.get_message(timeout=0.01)
+        if message is not None:
+            received.append(json.loads(message['data']))
+        if len(received) == len(sent):
+            break
+    assert received == sent
+
+
+def test_stream_publisher_appends_every_article_and_trims():
+    client = CountingRedis()
+    publisher = StreamPublisher(client, stream='articles-test', maxlen=1000, chunk_size=4)
+    sent = articles(10)
+
+    report = publisher.publish(sent)
+
+    assert report['round_trips'] == client.pipelines == 3
+    entries = client.xrange('articles-test')
+    assert [json.loads(fields[b'article']) for _, fields in entries] == sent
+    assert publisher.stats()['published'] == 10
+    assert publisher.stats()['last'] == report
+
+
+def test_empty_publish_makes_no_round_trips():
+    client = CountingRedis()
+    report = ArticlePublisher(client).publish([])
+    assert report['round_trips'] == 0
+    assert client.pipelines == 0
@@ -0,0 +1,31 @@
+from sentiment_batch import BatchSentimentScorer, sample_texts
+
+EDGE_CASES = [
+    '',
+    'TSLA',
+    'The outlook is NOT good!!',
+    'kind of weak but strong demand',
+    'never so good, never this bad',
+    'at least no loss? really??',
+    'GREAT GREAT quarter',
+    "shares don't win, they miss.",
+    'very good but very bad but good',
+]
+
+
+def test_vectorized_scores_match_polarity_scores(vader):
+    idioms = vader.constants.SPECIAL_CASE_IDIOMS
+    # The vectorized scorer does not apply VADER's idiom special cases
+    texts = [text for text in sample_texts(2000, vader.lexicon)
+             if not any(idiom in text.lower() for idiom in idioms)] + EDGE_CASES
+    scorer = BatchSentimentScorer(vader.lexicon, vader.constants, chunk_size=512)
+
+    expected = [vader.polarity_scores(text) for text in texts]
+    assert scorer.polarity_batch(texts) == expected
+    assert scorer.score_batch(texts).tolist() == [scores['compound'] for scores in expected]
+
+
+def test_empty_batch():
+    scorer = BatchSentimentScorer({'good': 1.9})
+    assert scorer.polarity_batch([]) == []
+    assert len(scorer.score_batch([])) == 0
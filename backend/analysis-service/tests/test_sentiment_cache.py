@@ -0,0 +1,63 @@
+import fakeredis
+
+from sentiment_cache import SentimentCache
+
+
+class CountingScorer:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        return {'neg': 0.0, 'neu': 1.0, 'pos': 0.0, 'compound': len(text) / 100}
+
+
+def test_repeated_texts_hit_and_whitespace_is_normalized():
+    scorer = CountingScorer()
+    cache = SentimentCache(scorer, max_entries=10)
+
+    first = cache.scores('TSLA  surges on strong demand')
+    assert cache.scores('TSLA surges on strong demand ') == first
+    assert cache.scores_many(['AAPL beats', 'AAPL beats']) == [cache.scores('AAPL beats')] * 2
+    assert scorer.calls == ['TSLA  surges on strong demand', 'AAPL beats']
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (3, 2)
+
+
+def test_least_recently_used_entry_is_evicted():
+    scorer = CountingScorer()
+    cache = SentimentCache(scorer, max_entries=2)
+    cache.scores('a1')
+    cache.scores('b2')
+    cache.scores('a1')  # b2 is now the least recently used
+    cache.scores('c3')
+
+    assert cache.stats()['evictions'] == 1
+    cache.scores('a1')
+    cache.scores('c3')
+    assert scorer.calls == ['a1', 'b2', 'c3']
+    cache.scores('b2')
+    assert scorer.calls == ['a1', 'b2', 'c3', 'b2']
+
+
+def test_redis_tier_is_shared_between_caches():
+    client = fakeredis.FakeRedis(decode_responses=True)
+    scorer = CountingScorer()
+    SentimentCache(scorer, redis_client=client).scores('NVDA rallies')
+    other = SentimentCache(scorer, redis_client=client)
+
+    assert other.scores('NVDA rallies')['compound'] == 0.12
+    assert scorer.calls == ['NVDA rallies']
+    assert other.stats()['redis_hits'] == 1
+
+
+def test_batch_scorer_scores_distinct_misses_once():
+    batches = []
+
+    def batch_scorer(texts):
+        batches.append(texts)
+        return [{'compound': 0.5} for _ in texts]
+
+    cache = SentimentCache(CountingScorer(), batch_scorer=batch_scorer)
+    cache.scores_many(['x1', 'y2', 'x1'])
+    assert batches == [['x1', 'y2']]
@@ -0,0 +1,28 @@
+from sentiment_batch import BatchSentimentScorer, sample_texts
+from sentiment_pool import SentimentPool
+
+
+def test_pooled_scores_match_in_process(vader):
+    texts = sample_texts(300, vader.lexicon)
+    expected = [vader.polarity_scores(text) for text in texts]
+    pool = SentimentPool(2, local_scorer=lambda batch: [vader.polarity_scores(text) for text in batch],
+                         chunk_size=70, min_batch=100, batch=False)
+    try:
+        assert pool.score(texts) == expected
+        assert pool.stats()['pooled_texts'] == 300
+        assert pool.stats()['chunks'] == 5
+        # Below min_batch the local scorer answers
+        assert pool.score(texts[:10]) == expected[:10]
+        assert pool.stats()['local_texts'] == 10
+    finally:
+        pool.shutdown()
+
+
+def test_pooled_batch_scorer_matches_local_batch_scorer(vader):
+    texts = sample_texts(300, vader.lexicon, seed=11)
+    local = BatchSentimentScorer(vader.lexicon, vader.constants).polarity_batch
+    pool = SentimentPool(2, local_scorer=local, chunk_size=100, min_batch=0, batch=True)
+    try:
+        assert pool.score(texts) == local(texts)
+    finally:
+        pool.shutdown()
@@ -7,15 +7,20 @@ Optimized for AWS deployment with production configurations
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 import requests
-import json
 import time
 import os
 import logging
 from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import redis
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
 import threading
+from circuit_breaker import BreakerRegistry, CircuitOpenError, RateLimitedError, OPEN, STATE_VALUES
+from http_cache import CompressedBodyCache, ConditionalResponder
+from mock_quotes import generate_quotes, mock_quote
+from serialization import dumps, envelope, loads, raw_object
+from singleflight import SingleFlight, RedisSingleFlight
+from tiered_cache import TieredCache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -39,32 +44,74 @@ CORS(app,
      allow_headers=['Content-Type', 'Authorization', 'Accept', 'X-Requested-With'])
 
 # Redis configuration for production
+REDIS_OPTIONS = {
+    'host': os.getenv('REDIS_HOST', 'redis'),
+    'port': int(os.getenv('REDIS_PORT', 6379)),
+    'password': os.getenv('REDIS_PASSWORD'),
+    'socket_connect_timeout': 5,
+    'socket_timeout': 5,
+    'retry_on_timeout': True
+}
 try:
-    redis_client = redis.Redis(
-        host=os.getenv('REDIS_HOST', 'redis'),
-        port=int(os.getenv('REDIS_PORT', 6379)),
-        password=os.getenv('REDIS_PASSWORD'),
-        decode_responses=True,
-        socket_connect_timeout=5,
-        socket_timeout=5,
-        retry_on_timeout=True
-    )
+    redis_client = redis.Redis(decode_responses=True, **REDIS_OPTIONS)
     redis_client.ping()
+    # Quotes are cached as serialized bytes and served as-is, so the cache's client skips decoding
+    cache_client = redis.Redis(decode_responses=False, **REDIS_OPTIONS)
     logger.info("✅ Redis connection established")
 except Exception as e:
     logger.warning(f"⚠️ Redis connection failed: {e}")
     redis_client = None
+    cache_client = None
 
 # Prometheus metrics
 REQUEST_COUNT = Counter('stock_data_requests_total', 'Total requests', ['method', 'endpoint', 'status'])
 REQUEST_DURATION = Histogram('stock_data_request_duration_seconds', 'Request duration')
 API_CALLS = Counter('stock_data_api_calls_total', 'API calls', ['provider', 'status'])
 CACHE_HITS = Counter('stock_data_cache_hits_total', 'Cache hits', ['type'])
+BREAKER_STATE = Gauge('stock_data_provider_circuit_state', 'Provider circuit breaker state (0=closed, 1=half-open, 2=open)', ['provider'])
+BREAKER_SUCCESS_RATE = Gauge('stock_data_provider_success_rate', 'Provider success rate over the breaker window', ['provider'])
+BREAKER_TRIPS = Gauge('stock_data_provider_circuit_trips', 'Times the provider circuit breaker has opened', ['provider'])
 
 # Configuration
 CACHE_DURATION = int(os.getenv('CACHE_DURATION', 30))
 MAX_WORKERS = int(os.getenv('MAX_WORKERS', 5))
 TIMEOUT = int(os.getenv('TIMEOUT', 10))
+# Budget for filling a multi-symbol request before the rest falls back to mock data
+BATCH_TIMEOUT = int(os.getenv('BATCH_TIMEOUT', 15))
+REDIS_SINGLE_FLIGHT = os.getenv('REDIS_SINGLE_FLIGHT', 'true').lower() == 'true'
+
+# Stale-while-revalidate: quotes stay in Redis for MAX_STALENESS seconds past
+# CACHE_DURATION and are served (flagged isStale) while a background refresh runs
+STALE_WHILE_REVALIDATE = os.getenv('STALE_WHILE_REVALIDATE', 'true').lower() == 'true'
+MAX_STALENESS = int(os.getenv('MAX_STALENESS', 120))
+REDIS_CACHE_TTL = CACHE_DURATION + (MAX_STALENESS if STALE_WHILE_REVALIDATE else 0)
+# Per-worker L1 in front of Redis; writes are broadcast so other workers stay in sync
+L1_CACHE_TTL = float(os.getenv('L1_CACHE_TTL', 2))
+L1_CACHE_MAX_ENTRIES = int(os.getenv('L1_CACHE_MAX_ENTRIES', 5000))
+CACHE_UPDATES_CHANNEL = os.getenv('CACHE_UPDATES_CHANNEL', 'stock-cache-updates')
+
+# ETags, 304s and gzip/brotli for the quote endpoints; compressed bodies are cached by content hash
+COMPRESSION_CACHE_BYTES = int(os.getenv('COMPRESSION_CACHE_BYTES', 8 * 1024 * 1024))
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 512))
+responder = ConditionalResponder(CompressedBodyCache(max_bytes=COMPRESSION_CACHE_BYTES, min_size=COMPRESSION_MIN_SIZE))
+
+quote_cache = TieredCache(
+    cache_client,
+    redis_ttl=REDIS_CACHE_TTL,
+    fresh_ttl=CACHE_DURATION,
+    l1_ttl=L1_CACHE_TTL,
+    l1_max_entries=L1_CACHE_MAX_ENTRIES,
+    channel=CACHE_UPDATES_CHANNEL
+)
+
+# Per-provider circuit breakers; provider order adapts to recent success rate and latency
+breakers = BreakerRegistry(
+    window=int(os.getenv('BREAKER_WINDOW_SECONDS', 60)),
+    failure_threshold=float(os.getenv('BREAKER_FAILURE_THRESHOLD', 0.5)),
+    open_duration=int(os.getenv('BREAKER_OPEN_SECONDS', 30))
+)
+PROVIDER_CHAIN = ['twelve_data', 'alpha_vantage', 'finnhub', 'polygon']
+BATCH_PROVIDERS = ['twelve_data', 'alpha_vantage', 'finnhub']
 
 class StockDataService:
     def __init__(self):
@@ -75,6 +122,8 @@ class StockDataService:
                     'price': '/price',
                     'quote': '/quote'
                 },
+                # Symbols per multi-symbol /quote request
+                'max_batch_size': int(os.getenv('TWELVE_DATA_MAX_BATCH', 120)),
                 'apikey': os.getenv('TWELVE_DATA_API_KEY', 'demo')
             },
             'alpha_vantage': {
@@ -99,48 +148,132 @@ class StockDataService:
                 'apikey': os.getenv('POLYGON_API_KEY', 'demo')
             }
         }
+        # Coalesce concurrent misses within this worker, and across pods via a Redis lock
+        self.inflight = SingleFlight()
+        self.redis_inflight = None
+        if redis_client and REDIS_SINGLE_FLIGHT:
+            self.redis_inflight = RedisSingleFlight(redis_client, lock_ttl=TIMEOUT * 2, wait_timeout=TIMEOUT)
+        # Symbols with a background stale-while-revalidate refresh in progress
+        self._revalidating = set()
+        self._revalidating_lock = threading.Lock()
+
+    def _call(self, provider, symbol):
+        """Call a provider through its circuit breaker"""
+        return breakers.call(provider, getattr(self, f'get_from_{provider}'), symbol)
+
+    def _write_cached(self, symbol, data):
+        """Store a quote in both cache tiers together with the time it was fetched"""
+        quote_cache.set(symbol, data)
+
+    def _write_cached_many(self, quotes):
+        """Store several quotes in one pipelined round trip"""
+        quote_cache.set_many(quotes)
+
+    def _read_cached_many(self, symbols, raw=False):
+        """{symbol: (data, age, tier)} for cached symbols, with one MGET for L1 misses"""
+        return quote_cache.get_many(symbols, raw=raw)
+
+    def _read_cached_with_age(self, symbol, raw=False):
+        """Read a quote, its age in seconds and the tier it came from, or (None, None, None)
+
+        With raw=True the quote is the cached JSON bytes, ready to be written into a response.
+        """
+        return quote_cache.get(symbol, raw=raw)
+
+    def _read_cached(self, symbol):
+        """Read a fresh quote from Redis, or None when missing, stale or Redis is unavailable"""
+        cached_data, age, _ = self._read_cached_with_age(symbol)
+        if cached_data is None or age >= CACHE_DURATION:
+            return None
+        return cached_data
+
+    def _revalidate(self, symbols):
+        """Refresh stale symbols in the background, at most one refresh per symbol at a time"""
+        with self._revalidating_lock:
+            symbols = [symbol for symbol in symbols if symbol not in self._revalidating]
+            self._revalidating.update(symbols)
+        if not symbols:
+            return
+
+        def run():
+            try:
+                if len(symbols) == 1:
+                    self.inflight.do(symbols[0], self._fetch_coalesced, symbols[0])
+                else:
+                    self._fetch_batch_upstream(symbols)
+            except Exception as e:
+                logger.warning(f"Background revalidation failed for {', '.join(symbols)}: {e}")
+            finally:
+                with self._revalidating_lock:
+                    self._revalidating.difference_update(symbols)
+
+        threading.Thread(target=run, name='quote-revalidate', daemon=True).start()
 
-    def get_stock_price(self, symbol):
-        """Get real stock price with caching and metrics"""
+    def get_stock_price(self, symbol, raw=False):
+        """Get real stock price with caching and metrics
+
+        With raw=True the quote is returned as JSON bytes; fresh cache hits are the cached bytes, never decoded.
+        """
         start_time = time.time()
         
         try:
-            # Check Redis cache first
-            cache_key = f"stock:{symbol}"
-            if redis_client:
-                try:
-                    cached_data = redis_client.get(cache_key)
-                    if cached_data:
-                        CACHE_HITS.labels(type='redis').inc()
-                        logger.info(f"📦 Cache hit for {symbol}")
-                        return json.loads(cached_data)
-                except Exception as e:
-                    logger.warning(f"Redis cache error: {e}")
+            # Check the in-process and Redis caches first
+            cached_data, age, tier = self._read_cached_with_age(symbol, raw=raw)
+            if cached_data is not None:
+                if age < CACHE_DURATION:
+                    CACHE_HITS.labels(type=tier).inc()
+                    logger.info(f"📦 Cache hit for {symbol} ({tier})")
+                    return cached_data
+                if STALE_WHILE_REVALIDATE and age < CACHE_DURATION + MAX_STALENESS:
+                    CACHE_HITS.labels(type=f'{tier}_stale').inc()
+                    logger.info(f"📦 Stale cache hit for {symbol} ({age:.0f}s old), revalidating")
+                    self._revalidate([symbol])
+                    data = loads(cached_data) if raw else cached_data
+                    return self._encoded({**data, 'isStale': True, 'cacheAge': round(age, 1)}, raw)
 
-            # Try multiple APIs with parallel execution
-            apis_to_try = [
-                self.get_from_twelve_data,
-                self.get_from_alpha_vantage,
-                self.get_from_finnhub,
-                self.get_from_polygon
-            ]
+            CACHE_HITS.labels(type='miss').inc()
+            return self._encoded(self.inflight.do(symbol, self._fetch_coalesced, symbol), raw)
 
-            for api_func in apis_to_try:
+        except Exception as e:
+            logger.error(f"❌ Error getting stock data for {symbol}: {str(e)}")
+            return self._encoded(self.get_enhanced_mock_data(symbol), raw)
+        finally:
+            REQUEST_DURATION.observe(time.time() - start_time)
+
+    @staticmethod
+    def _encoded(data, raw):
+        return dumps(data) if raw else data
+
+    def _fetch_coalesced(self, symbol):
+        """Fetch under the cross-pod lock when Redis is available"""
+        if self.redis_inflight:
+            return self.redis_inflight.do(
+                f"stock:{symbol}",
+                lambda: self._fetch_stock_price(symbol),
+                lambda: self._read_cached(symbol)
+            )
+        return self._fetch_stock_price(symbol)
+
+    def _fetch_stock_price(self, symbol):
+        """Run the provider chain for a symbol and cache the first real quote"""
+        try:
+            # Try multiple APIs, healthiest provider first
+            apis_to_try = breakers.order(PROVIDER_CHAIN)
+
+            for provider in apis_to_try:
                 try:
-                    data = api_func(symbol)
+                    data = self._call(provider, symbol)
                     if data and data.get('price', 0) > 0:
                         # Cache in Redis
-                        if redis_client:
-                            try:
-                                redis_client.setex(cache_key, CACHE_DURATION, json.dumps(data))
-                            except Exception as e:
-                                logger.warning(f"Redis cache set error: {e}")
-                        
+                        self._write_cached(symbol, data)
+
                         API_CALLS.labels(provider=data.get('dataSource', 'unknown'), status='success').inc()
                         logger.info(f"✅ Real data for {symbol}: ${data['price']} ({data['dataSource']})")
                         return data
+                except CircuitOpenError:
+                    continue
                 except Exception as e:
-                    API_CALLS.labels(provider=api_func.__name__, status='error').inc()
+                    API_CALLS.labels(provider=provider, status='error').inc()
                     logger.warning(f"❌ API failed for {symbol}: {str(e)}")
                     continue
 
@@ -151,69 +284,121 @@ class StockDataService:
         except Exception as e:
             logger.error(f"❌ Error getting stock data for {symbol}: {str(e)}")
             return self.get_enhanced_mock_data(symbol)
-        finally:
-            REQUEST_DURATION.observe(time.time() - start_time)
 
-    def get_multiple_stock_prices(self, symbols):
-        """Get multiple stock prices efficiently with batch processing"""
+    def get_multiple_stock_prices(self, symbols, raw=False):
+        """Get multiple stock prices efficiently with batch processing
+
+        With raw=True each quote is returned as JSON bytes, fresh cache hits without decoding.
+        """
         start_time = time.time()
         
         try:
             logger.info(f"📊 Fetching data for {len(symbols)} stocks: {', '.join(symbols)}")
-            
-            # Try batch APIs first (more efficient)
-            batch_apis = [
-                lambda syms: self.get_from_twelve_data_batch(syms),
-                lambda syms: self.get_from_alpha_vantage_batch(syms),
-                lambda syms: self.get_from_finnhub_batch(syms)
-            ]
-            
-            for batch_api in batch_apis:
-                try:
-                    results = batch_api(symbols)
-                    if results and len(results) > 0:
-                        logger.info(f"✅ Batch API success: {len(results)} stocks")
-                        
-                        # Cache results in Redis
-                        if redis_client:
-                            for symbol, data in results.items():
-                                cache_key = f"stock:{symbol}"
-                                try:
-                                    redis_client.setex(cache_key, CACHE_DURATION, json.dumps(data))
-                                except Exception as e:
-                                    logger.warning(f"Redis cache set error: {e}")
-                        
-                        return results
-                except Exception as e:
-                    logger.warning(f"❌ Batch API failed: {str(e)}")
-                    continue
-            
-            # Fallback to individual calls if batch APIs fail
-            logger.warning("⚠️ Batch APIs failed, trying individual calls")
+            symbols = list(dict.fromkeys(symbols))
+
+            # L1 first, then one MGET for the rest; only misses go upstream
             results = {}
-            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-                future_to_symbol = {
-                    executor.submit(self.get_stock_price, symbol): symbol 
-                    for symbol in symbols
-                }
-                
-                for future in as_completed(future_to_symbol):
-                    symbol = future_to_symbol[future]
-                    try:
-                        data = future.result()
-                        results[symbol] = data
-                    except Exception as e:
-                        logger.error(f"❌ Individual call failed for {symbol}: {str(e)}")
-                        results[symbol] = self.get_enhanced_mock_data(symbol)
-            
-            return results
+            stale = []
+            tier_hits = {}
+            for symbol, (data, age, tier) in self._read_cached_many(symbols, raw=raw).items():
+                if age < CACHE_DURATION:
+                    results[symbol] = data
+                elif STALE_WHILE_REVALIDATE and age < CACHE_DURATION + MAX_STALENESS:
+                    data = loads(data) if raw else data
+                    results[symbol] = self._encoded({**data, 'isStale': True, 'cacheAge': round(age, 1)}, raw)
+                    stale.append(symbol)
+                    tier = f'{tier}_stale'
+                else:
+                    continue
+                tier_hits[tier] = tier_hits.get(tier, 0) + 1
+
+            for tier, count in tier_hits.items():
+                CACHE_HITS.labels(type=tier).inc(count)
+            fresh_hits = len(results) - len(stale)
+            if stale:
+                self._revalidate(stale)
+
+            misses = [symbol for symbol in symbols if symbol not in results]
+            if misses:
+                CACHE_HITS.labels(type='miss').inc(len(misses))
+            logger.info(f"📦 Cache: {fresh_hits} fresh, {len(stale)} stale, {len(misses)} misses")
+            if misses:
+                for symbol, data in self._fetch_batch_upstream(misses).items():
+                    results[symbol] = self._encoded(data, raw)
+
+            return {symbol: results[symbol] for symbol in symbols}
             
         except Exception as e:
             logger.error(f"❌ Error getting multiple stock data: {str(e)}")
-            return {symbol: self.get_enhanced_mock_data(symbol) for symbol in symbols}
+            quotes = generate_quotes(symbols)
+            return {symbol: dumps(data) for symbol, data in quotes.items()} if raw else quotes
         finally:
             REQUEST_DURATION.observe(time.time() - start_time)
 
+    def _fetch_batch_upstream(self, symbols):
+        """Merge quotes from each provider in turn, writing each stage back in one pipeline
+
+        Every stage only sees the symbols earlier stages could not fill: batch
+        providers in health order, then single-quote providers. Whatever is
+        still missing when providers run out or the BATCH_TIMEOUT budget is
+        spent gets enhanced mock data (isRealTime false), so no requested
+        symbol is dropped.
+        """
+        deadline = time.monotonic() + BATCH_TIMEOUT
+        results = {}
+        missing = list(symbols)
+        stages = breakers.order(BATCH_PROVIDERS) + [p for p in breakers.order(PROVIDER_CHAIN) if p not in BATCH_PROVIDERS]
+
+        for provider in stages:
+            if not missing:
+                break
+            if time.monotonic() >= deadline:
+                logger.warning(f"⏱️ Batch budget spent with {len(missing)} stocks missing")
+                break
+            if breakers.get(provider).state == OPEN:
+                logger.info(f"⏭️ Skipping {provider}, circuit open")
+                continue
+            try:
+                if provider in BATCH_PROVIDERS:
+                    fetched = getattr(self, f'get_from_{provider}_batch')(missing)
+                else:
+                    fetched = self._fetch_per_symbol(provider, missing)
+            except Exception as e:
+                logger.warning(f"❌ Batch API failed: {str(e)}")
+                continue
+
+            fetched = {symbol: data for symbol, data in fetched.items() if symbol in missing}
+            if fetched:
+                API_CALLS.labels(provider=provider, status='success').inc(len(fetched))
+                self._write_cached_many(fetched)
+                results.update(fetched)
+            missing = [symbol for symbol in missing if symbol not in results]
+            logger.info(f"✅ {provider} filled {len(fetched)} stocks, {len(missing)} still missing")
+
+        if missing:
+            logger.warning(f"⚠️ No real data for {len(missing)} stocks, using enhanced mock data")
+            results.update(generate_quotes(missing))
+        return results
+
+    def _fetch_per_symbol(self, provider, symbols, max_workers=MAX_WORKERS):
+        """Fan out one breaker-guarded call per symbol, keeping only valid quotes"""
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_to_symbol = {
+                executor.submit(self._call, provider, symbol): symbol
+                for symbol in symbols
+            }
+
+            for future in as_completed(future_to_symbol):
+                symbol = future_to_symbol[future]
+                try:
+                    data = future.result()
+                    if data and data.get('price', 0) > 0:
+                        results[symbol] = data
+                except Exception as e:
+                    logger.warning(f"❌ {provider} failed for {symbol}: {str(e)}")
+        return results
+
     def get_from_twelve_data(self, symbol):
         """Get data from Twelve Data API"""
         try:
@@ -247,29 +432,69 @@ class StockDataService:
         except Exception as e:
             raise Exception(f'Twelve Data API error: {str(e)}')
 
+    def _parse_twelve_data_batch(self, data):
+        if data.get('status') == 'error':
+            if data.get('code') == 429:
+                raise RateLimitedError(data.get('message', 'Rate limited by Twelve Data'))
+            raise Exception(data.get('message', 'Twelve Data quote error'))
+
+        # A single-symbol request returns the quote itself rather than a map
+        quotes = {data['symbol']: data} if 'symbol' in data else data
+
+        results = {}
+        for symbol, quote in quotes.items():
+            if not isinstance(quote, dict) or quote.get('status') == 'error' or not quote.get('close'):
+                continue
+            results[symbol] = {
+                'symbol': symbol,
+                'price': float(quote['close']),
+                'change': float(quote.get('change') or 0),
+                'changePercent': float(quote.get('percent_change') or 0),
+                'volume': int(float(quote.get('volume') or 0)),
+                'high': float(quote.get('high') or 0),
+                'low': float(quote.get('low') or 0),
+                'open': float(quote.get('open') or 0),
+                'previousClose': float(quote.get('previous_close') or 0),
+                'timestamp': datetime.now().isoformat(),
+                'dataSource': 'twelve-data',
+                'isRealTime': True
+            }
+        return results
+
+    def _get_twelve_data_quotes(self, symbols):
+        """One multi-symbol /quote request; symbols Twelve Data doesn't know are left out"""
+        url = f"{self.apis['twelve_data']['base_url']}{self.apis['twelve_data']['endpoints']['quote']}"
+        params = {'symbol': ','.join(symbols), 'apikey': self.apis['twelve_data']['apikey']}
+        response = requests.get(url, params=params, timeout=TIMEOUT)
+        if response.status_code == 429:
+            raise RateLimitedError('Rate limited by Twelve Data')
+        response.raise_for_status()
+        return self._parse_twelve_data_batch(response.json())
+
     def get_from_twelve_data_batch(self, symbols):
-        """Get multiple stocks from Twelve Data API in batch"""
-        try:
-            results = {}
-            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-                future_to_symbol = {
-                    executor.submit(self.get_from_twelve_data, symbol): symbol 
-                    for symbol in symbols
-                }
-                
-                for future in as_completed(future_to_symbol):
-                    symbol = future_to_symbol[future]
-                    try:
-                        data = future.result()
-                        if data and data.get('price', 0) > 0:
-                            results[symbol] = data
-                    except Exception as e:
-                        logger.warning(f"❌ Twelve Data batch failed for {symbol}: {str(e)}")
-                        continue
-            
-            return results
-        except Exception as e:
-            raise Exception(f'Twelve Data batch API error: {str(e)}')
+        """Get multiple stocks from Twelve Data's multi-symbol /quote endpoint
+
+        One request per chunk of max_batch_size symbols; a failed chunk falls
+        back to per-symbol calls unless Twelve Data is rate limiting us.
+        """
+        size = self.apis['twelve_data']['max_batch_size']
+        chunks = [symbols[i:i + size] for i in range(0, len(symbols), size)]
+
+        def fetch_chunk(chunk):
+            try:
+                return breakers.call('twelve_data', self._get_twelve_data_quotes, chunk)
+            except (CircuitOpenError, RateLimitedError) as e:
+                logger.warning(f"❌ Twelve Data batch request failed for {len(chunk)} symbols: {str(e)}")
+                return {}
+            except Exception as e:
+                logger.warning(f"❌ Twelve Data batch request failed, falling back to per-symbol calls: {str(e)}")
+                return self._fetch_per_symbol('twelve_data', chunk)
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(len(chunks), MAX_WORKERS))) as executor:
+            for fetched in executor.map(fetch_chunk, chunks):
+                results.update(fetched)
+        return results
 
     def get_from_alpha_vantage(self, symbol):
         """Get data from Alpha Vantage API"""
@@ -284,6 +509,9 @@ class StockDataService:
             response.raise_for_status()
             
             data = response.json()
+            # Over-quota (or demo key) responses come back as 200 with a note instead of a quote
+            if data.get('Note') or data.get('Information'):
+                raise RateLimitedError(data.get('Note') or data.get('Information'))
             if data.get('Global Quote'):
                 quote = data['Global Quote']
                 price = float(quote['05. price'])
@@ -311,24 +539,7 @@ class StockDataService:
     def get_from_alpha_vantage_batch(self, symbols):
         """Get multiple stocks from Alpha Vantage API in batch"""
         try:
-            results = {}
-            with ThreadPoolExecutor(max_workers=3) as executor:  # Rate limit friendly
-                future_to_symbol = {
-                    executor.submit(self.get_from_alpha_vantage, symbol): symbol 
-                    for symbol in symbols
-                }
-                
-                for future in as_completed(future_to_symbol):
-                    symbol = future_to_symbol[future]
-                    try:
-                        data = future.result()
-                        if data and data.get('price', 0) > 0:
-                            results[symbol] = data
-                    except Exception as e:
-                        logger.warning(f"❌ Alpha Vantage batch failed for {symbol}: {str(e)}")
-                        continue
-            
-            return results
+            return self._fetch_per_symbol('alpha_vantage', symbols, max_workers=3)  # Rate limit friendly
         except Exception as e:
             raise Exception(f'Alpha Vantage batch API error: {str(e)}')
 
@@ -367,24 +578,7 @@ class StockDataService:
     def get_from_finnhub_batch(self, symbols):
         """Get multiple stocks from Finnhub API in batch"""
         try:
-            results = {}
-            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-                future_to_symbol = {
-                    executor.submit(self.get_from_finnhub, symbol): symbol 
-                    for symbol in symbols
-                }
-                
-                for future in as_completed(future_to_symbol):
-                    symbol = future_to_symbol[future]
-                    try:
-                        data = future.result()
-                        if data and data.get('price', 0) > 0:
-                            results[symbol] = data
-                    except Exception as e:
-                        logger.warning(f"❌ Finnhub batch failed for {symbol}: {str(e)}")
-                        continue
-            
-            return results
+            return self._fetch_per_symbol('finnhub', symbols)
         except Exception as e:
             raise Exception(f'Finnhub batch API error: {str(e)}')
 
@@ -427,59 +621,28 @@ class StockDataService:
             raise Exception(f'Polygon API error: {str(e)}')
 
     def get_enhanced_mock_data(self, symbol):
-        """Generate enhanced mock data with realistic fluctuations"""
-        base_prices = {
-            'AAPL': 178.23, 'MSFT': 378.45, 'GOOGL': 145.67, 'TSLA': 234.56, 'NVDA': 168.45,
-            'AMZN': 145.32, 'META': 320.15, 'NFLX': 425.67, 'AMD': 98.45, 'INTC': 45.67,
-            'SPY': 415.23, 'QQQ': 365.45, 'DIA': 340.12, 'BTC-USD': 45000.00, 'ETH-USD': 3200.00
-        }
-        
-        volatilities = {
-            'AAPL': 2.5, 'MSFT': 2.0, 'GOOGL': 2.8, 'TSLA': 8.0, 'NVDA': 5.0,
-            'AMZN': 3.5, 'META': 4.0, 'NFLX': 3.0, 'AMD': 4.5, 'INTC': 2.5,
-            'SPY': 15.0, 'QQQ': 25.0, 'DIA': 50.0, 'BTC-USD': 500.0, 'ETH-USD': 50.0
-        }
-        
-        base_price = base_prices.get(symbol, 100 + hash(symbol) % 200)
-        volatility = volatilities.get(symbol, 2.0)
-        
-        current_hour = datetime.now().hour
-        market_open = 9 <= current_hour <= 16
-        
-        adjusted_volatility = volatility * (1.5 if market_open else 0.3)
-        trend_factor = hash(symbol + str(datetime.now().strftime('%Y%m%d'))) % 100 / 100 - 0.5
-        change = (hash(symbol + str(int(time.time() / 60))) % 100 / 100 - 0.5 + trend_factor) * adjusted_volatility
-        new_price = max(0.01, base_price + change)
-        change_percent = (change / base_price) * 100
-        
-        return {
-            'symbol': symbol,
-            'price': round(new_price, 2),
-            'change': round(change, 2),
-            'changePercent': round(change_percent, 2),
-            'volume': int(base_price * 1000 * (1 + hash(symbol) % 50 / 100)),
-            'high': round(new_price + abs(change) * 0.5, 2),
-            'low': round(new_price - abs(change) * 0.5, 2),
-            'open': round(base_price, 2),
-            'previousClose': round(base_price, 2),
-            'timestamp': datetime.now().isoformat(),
-            'dataSource': 'enhanced-mock',
-            'isRealTime': False
-        }
+        """Generate enhanced mock data with realistic fluctuations
+
+        Stable across workers and pods for a given symbol and minute (no salted hash())
+        """
+        return mock_quote(symbol)
 
 # Initialize the service
 stock_service = StockDataService()
 
+@app.before_request
+def start_background_jobs():
+    """Subscribe to cache updates lazily so each gunicorn worker gets its own listener"""
+    quote_cache.ensure_subscribed()
+
 @app.route('/api/stock/<symbol>', methods=['GET'])
 def get_stock_price(symbol):
     """Get stock price for a specific symbol"""
     try:
         REQUEST_COUNT.labels(method='GET', endpoint='/api/stock', status='success').inc()
-        data = stock_service.get_stock_price(symbol.upper())
-        return jsonify({
-            'success': True,
-            'data': data
-        })
+        # Cached quotes arrive as JSON bytes and are spliced into the body without a decode/encode round trip
+        data = stock_service.get_stock_price(symbol.upper(), raw=True)
+        return responder.respond(request, envelope(data))
     except Exception as e:
         REQUEST_COUNT.labels(method='GET', endpoint='/api/stock', status='error').inc()
         logger.error(f"Error getting stock price for {symbol}: {str(e)}")
@@ -489,22 +652,25 @@ def get_stock_price(symbol):
             'data': stock_service.get_enhanced_mock_data(symbol.upper())
         }), 500
 
-@app.route('/api/stocks', methods=['POST'])
+@app.route('/api/stocks', methods=['GET', 'POST'])
 def get_multiple_stocks():
-    """Get stock prices for multiple symbols using batch API calls"""
+    """Get stock prices for multiple symbols using batch API calls
+
+    GET /api/stocks?symbols=AAPL,MSFT is the cacheable form: it answers If-None-Match with 304.
+    """
     try:
-        REQUEST_COUNT.labels(method='POST', endpoint='/api/stocks', status='success').inc()
-        symbols = request.json.get('symbols', [])
+        REQUEST_COUNT.labels(method=request.method, endpoint='/api/stocks', status='success').inc()
+        if request.method == 'GET':
+            symbols = [symbol.strip() for symbol in request.args.get('symbols', '').split(',') if symbol.strip()]
+        else:
+            symbols = request.json.get('symbols', [])
         logger.info(f"📊 Received request for {len(symbols)} stocks: {', '.join(symbols)}")
         
-        results = stock_service.get_multiple_stock_prices([symbol.upper() for symbol in symbols])
+        results = stock_service.get_multiple_stock_prices([symbol.upper() for symbol in symbols], raw=True)
         
-        return jsonify({
-            'success': True,
-            'data': results
-        })
+        return responder.respond(request, envelope(raw_object(results)))
     except Exception as e:
-        REQUEST_COUNT.labels(method='POST', endpoint='/api/stocks', status='error').inc()
+        REQUEST_COUNT.labels(method=request.method, endpoint='/api/stocks', status='error').inc()
         logger.error(f"❌ Error in batch API: {str(e)}")
         return jsonify({
             'success': False,
@@ -545,6 +711,11 @@ def health_check():
 @app.route('/metrics', methods=['GET'])
 def metrics():
     """Prometheus metrics endpoint"""
+    for provider, snapshot in breakers.snapshot().items():
+        BREAKER_STATE.labels(provider=provider).set(STATE_VALUES[snapshot['state']])
+        BREAKER_TRIPS.labels(provider=provider).set(snapshot['trips'])
+        if snapshot['success_rate'] is not None:
+            BREAKER_SUCCESS_RATE.labels(provider=provider).set(snapshot['success_rate'])
     return generate_latest(), 200, {'Content-Type': CONTENT_TYPE_LATEST}
 
 @app.route('/api/status', methods=['GET'])
@@ -559,8 +730,18 @@ def status():
             'environment': os.getenv('FLASK_ENV', 'development'),
             'redis_connected': redis_client and redis_client.ping(),
             'cache_duration': CACHE_DURATION,
+            'stale_while_revalidate': STALE_WHILE_REVALIDATE,
+            'max_staleness': MAX_STALENESS,
+            'cache': quote_cache.stats(),
+            'http_cache': responder.stats(),
             'max_workers': MAX_WORKERS,
-            'timeout': TIMEOUT
+            'timeout': TIMEOUT,
+            'provider_order': breakers.order(PROVIDER_CHAIN),
+            'circuit_breakers': breakers.snapshot(),
+            'single_flight': {
+                'local': stock_service.inflight.stats(),
+                'redis': stock_service.redis_inflight.stats() if stock_service.redis_inflight else None
+            }
         })
     except Exception as e:
         logger.error(f"Status check error: {str(e)}")
@@ -4,161 +4,543 @@ Stock Data Service - Backend proxy to avoid CORS issues
 Fetches real stock data from multiple APIs and serves it to the frontend
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 import requests
+from requests.adapters import HTTPAdapter
+import asyncio
+import threading
 import json
+import math
 import time
 import os
 from datetime import datetime, timedelta
+from bar_aggregator import BAR_INTERVALS, BarAggregator
+from circuit_breaker import BreakerRegistry, CircuitOpenError, RateLimitedError, OPEN
+from fetch_engine import AsyncFetchEngine, parse_retry_after
+from hedging import ProviderLatency, hedged_race
+from http_cache import CompressedBodyCache, ConditionalResponder
+from indicators import IndicatorEngine
+from history_store import INTERVALS as HISTORY_INTERVALS, HistoryCompactor, HistoryStore, valid_symbol
+from mock_quotes import generate_quotes, mock_quote
+from quote_cache import QuoteCache
+from quote_stream import QuoteStream
+from refresher import HotSymbolTracker, QuoteRefresher
+from serialization import dumps
+from singleflight import SingleFlight
+from snapshot import SnapshotJob
 
 app = Flask(__name__)
 CORS(app, origins=['http://localhost:3000', 'http://localhost:3001', 'http://localhost:3002', 'http://localhost:3005'], 
      methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'],
      allow_headers=['Content-Type', 'Authorization', 'Accept'])
 
-# Cache for stock data (30 seconds)
-stock_cache = {}
-CACHE_DURATION = 30
+# Cache for stock data (30 seconds), bounded by entry count and approximate size
+CACHE_DURATION = int(os.getenv('CACHE_DURATION', 30))
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 5000))
+CACHE_MAX_BYTES = int(os.getenv('CACHE_MAX_BYTES', 16 * 1024 * 1024))
+
+# Stale-while-revalidate: expired quotes younger than CACHE_DURATION + MAX_STALENESS
+# are served immediately (flagged isStale) while a refresh runs in the background
+STALE_WHILE_REVALIDATE = os.getenv('STALE_WHILE_REVALIDATE', 'true').lower() == 'true'
+MAX_STALENESS = int(os.getenv('MAX_STALENESS', 120))
+
+stock_cache = QuoteCache(
+    ttl=CACHE_DURATION,
+    max_entries=CACHE_MAX_ENTRIES,
+    max_bytes=CACHE_MAX_BYTES,
+    max_stale=MAX_STALENESS if STALE_WHILE_REVALIDATE else 0
+)
+
+# Upstream HTTP: per-request timeout, overall deadline for multi-symbol fetches,
+# and keep-alive pool size per provider host
+TIMEOUT = int(os.getenv('TIMEOUT', 10))
+BATCH_TIMEOUT = int(os.getenv('BATCH_TIMEOUT', 15))
+MAX_CONNECTIONS_PER_HOST = int(os.getenv('MAX_CONNECTIONS_PER_HOST', 50))
+fetch_engine = AsyncFetchEngine(
+    timeout=TIMEOUT,
+    max_connections_per_host=MAX_CONNECTIONS_PER_HOST,
+    provider_limits={'alpha_vantage': 3}  # Rate limit friendly
+)
+
+# Hedged requests: race the next provider once the current one passes its
+# observed latency percentile, instead of waiting out the full TIMEOUT
+HEDGED_REQUESTS = os.getenv('HEDGED_REQUESTS', 'false').lower() == 'true'
+provider_latency = ProviderLatency(
+    percentile=float(os.getenv('HEDGE_PERCENTILE', 95)),
+    min_delay=float(os.getenv('HEDGE_MIN_DELAY_MS', 50)) / 1000,
+    max_delay=float(os.getenv('HEDGE_MAX_DELAY_MS', 2000)) / 1000
+)
+
+# Per-provider circuit breakers: stop calling a provider that keeps failing or
+# rate limiting us, and probe it again after a backoff
+breakers = BreakerRegistry(
+    window=int(os.getenv('BREAKER_WINDOW_SECONDS', 60)),
+    failure_threshold=float(os.getenv('BREAKER_FAILURE_THRESHOLD', 0.5)),
+    open_duration=int(os.getenv('BREAKER_OPEN_SECONDS', 30))
+)
+
+# Default provider order (Yahoo Finance first - no API key needed); at request
+# time the order adapts to recent success rate and latency via breakers.order()
+PROVIDER_CHAIN = ['yahoo_finance', 'twelve_data', 'alpha_vantage', 'finnhub', 'polygon']
+BATCH_PROVIDERS = ['yahoo_finance', 'twelve_data', 'alpha_vantage', 'finnhub']
+
+# Major indices served by /api/indices, always kept warm by the refresher
+INDEX_SYMBOLS = {
+    '^GSPC': 'S&P 500',
+    '^IXIC': 'NASDAQ',
+    '^DJI': 'DOW'
+}
+
+# Background refresh of the most requested symbols shortly before their cache entries expire
+QUOTE_REFRESHER = os.getenv('QUOTE_REFRESHER', 'true').lower() == 'true'
+REFRESH_TOP_N = int(os.getenv('REFRESH_TOP_N', 50))
+REFRESH_INTERVAL = float(os.getenv('REFRESH_INTERVAL', 5))
+REFRESH_LEAD_TIME = float(os.getenv('REFRESH_LEAD_TIME', 5))
+
+# ETags, 304s and gzip/brotli for the quote endpoints; compressed bodies are cached by content hash
+COMPRESSION_CACHE_BYTES = int(os.getenv('COMPRESSION_CACHE_BYTES', 8 * 1024 * 1024))
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 512))
+responder = ConditionalResponder(CompressedBodyCache(max_bytes=COMPRESSION_CACHE_BYTES, min_size=COMPRESSION_MIN_SIZE))
+
+# /api/indices is served from a snapshot rebuilt in the background
+INDICES_REFRESH_INTERVAL = float(os.getenv('INDICES_REFRESH_INTERVAL', 10))
+
+# Shown for a US index when no quote is available
+FALLBACK_US_INDICES = {
+    'S&P 500': {'name': 'S&P 500', 'value': '4,567.89', 'change': '+12.34', 'percent': '+0.27%', 'trend': 'up'},
+    'NASDAQ': {'name': 'NASDAQ', 'value': '14,234.56', 'change': '+45.67', 'percent': '+0.32%', 'trend': 'up'},
+    'DOW': {'name': 'DOW', 'value': '34,567.89', 'change': '-23.45', 'percent': '-0.07%', 'trend': 'down'}
+}
+
+# Markets without a live feed yet, served as-is
+STATIC_INDICES = {
+    'Europe': [
+        {'name': 'FTSE 100', 'value': '7,456.78', 'change': '+23.45', 'percent': '+0.32%', 'trend': 'up'},
+        {'name': 'DAX', 'value': '15,678.90', 'change': '-12.34', 'percent': '-0.08%', 'trend': 'down'},
+        {'name': 'CAC 40', 'value': '7,234.56', 'change': '+34.56', 'percent': '+0.48%', 'trend': 'up'}
+    ],
+    'Asia': [
+        {'name': 'Nikkei 225', 'value': '32,456.78', 'change': '+123.45', 'percent': '+0.38%', 'trend': 'up'},
+        {'name': 'Hang Seng', 'value': '18,234.56', 'change': '-45.67', 'percent': '-0.25%', 'trend': 'down'},
+        {'name': 'Shanghai', 'value': '3,234.56', 'change': '+12.34', 'percent': '+0.38%', 'trend': 'up'}
+    ],
+    'Currencies': [
+        {'name': 'EUR/USD', 'value': '1.0876', 'change': '+0.0023', 'percent': '+0.21%', 'trend': 'up'},
+        {'name': 'GBP/USD', 'value': '1.2654', 'change': '-0.0012', 'percent': '-0.09%', 'trend': 'down'},
+        {'name': 'USD/JPY', 'value': '149.23', 'change': '+0.45', 'percent': '+0.30%', 'trend': 'up'}
+    ],
+    'Crypto': [
+        {'name': 'BTC/USD', 'value': '43,567.89', 'change': '+1,234.56', 'percent': '+2.92%', 'trend': 'up'},
+        {'name': 'ETH/USD', 'value': '2,345.67', 'change': '+45.67', 'percent': '+1.98%', 'trend': 'up'},
+        {'name': 'ADA/USD', 'value': '0.4567', 'change': '-0.0123', 'percent': '-2.63%', 'trend': 'down'}
+    ]
+}
+
+# Local OHLCV history built from every fetched quote, rolled up into hourly/daily bars
+HISTORY_STORE = os.getenv('HISTORY_STORE', 'true').lower() == 'true'
+HISTORY_DIR = os.getenv('HISTORY_DIR', os.path.join('data', 'history'))
+HISTORY_COMPACT_INTERVAL = float(os.getenv('HISTORY_COMPACT_INTERVAL', 300))
+HISTORY_MINUTE_RETENTION_DAYS = int(os.getenv('HISTORY_MINUTE_RETENTION_DAYS', 7))
+HISTORY_MAX_POINTS = int(os.getenv('HISTORY_MAX_POINTS', 5000))
+# Default query window per interval when ?from= is omitted
+HISTORY_DEFAULT_SPANS = {'1m': 86400, '1h': 86400 * 7, '1d': 86400 * 365}
+
+# Rolling 1m/5m/1h bars in memory; also fills OHLC fields providers leave flat
+BAR_MAX_SYMBOLS = int(os.getenv('BAR_MAX_SYMBOLS', 2000))
+bar_aggregator = BarAggregator(max_symbols=BAR_MAX_SYMBOLS)
+
+history_store = HistoryStore(HISTORY_DIR)
+history_compactor = HistoryCompactor(history_store, interval=HISTORY_COMPACT_INTERVAL, retention_days=HISTORY_MINUTE_RETENTION_DAYS)
+
+# Incremental indicators over 1-minute bars, backfilled from the history store
+INDICATOR_MAX_SYMBOLS = int(os.getenv('INDICATOR_MAX_SYMBOLS', 5000))
+INDICATOR_BACKFILL_SECONDS = int(os.getenv('INDICATOR_BACKFILL_SECONDS', 86400))
+
+def load_indicator_history(symbol):
+    """Completed 1-minute bars from the history store for indicator backfill"""
+    if not HISTORY_STORE or not valid_symbol(symbol):
+        return [], [], []
+    now = time.time()
+    bars = history_store.query(symbol, now - INDICATOR_BACKFILL_SECONDS, now // 60 * 60, '1m')
+    return bars['t'], bars['close'], bars['volume']
+
+indicator_engine = IndicatorEngine(step=60, max_symbols=INDICATOR_MAX_SYMBOLS, loader=load_indicator_history)
+
+# Server-Sent Events push of quote changes from a single refresh loop
+STREAM_INTERVAL = float(os.getenv('STREAM_INTERVAL', 2))
+STREAM_HEARTBEAT = float(os.getenv('STREAM_HEARTBEAT', 15))
+STREAM_MAX_SUBSCRIBERS = int(os.getenv('STREAM_MAX_SUBSCRIBERS', 1000))
+STREAM_MAX_SYMBOLS = int(os.getenv('STREAM_MAX_SYMBOLS', 50))
 
 class StockDataService:
     def __init__(self):
         # Get API keys from environment variables
         self.apis = {
+            'yahoo_finance': {
+                'base_url': os.getenv('YAHOO_FINANCE_BASE_URL', 'https://query1.finance.yahoo.com'),
+                'endpoints': {
+                    'chart': '/v8/finance/chart/{symbol}',
+                    'quote': '/v7/finance/quote'
+                },
+                'max_batch_size': int(os.getenv('YAHOO_FINANCE_MAX_BATCH', 50)),
+                'headers': {
+                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+                }
+            },
             'twelve_data': {
-                'base_url': 'https://api.twelvedata.com',
+                'base_url': os.getenv('TWELVE_DATA_BASE_URL', 'https://api.twelvedata.com'),
                 'endpoints': {
                     'price': '/price',
                     'quote': '/quote'
                 },
+                'max_batch_size': int(os.getenv('TWELVE_DATA_MAX_BATCH', 120)),
                 'apikey': os.getenv('TWELVE_DATA_API_KEY', 'demo')
             },
             'alpha_vantage': {
-                'base_url': 'https://www.alphavantage.co/query',
+                'base_url': os.getenv('ALPHA_VANTAGE_BASE_URL', 'https://www.alphavantage.co/query'),
                 'params': {
                     'function': 'GLOBAL_QUOTE',
                     'apikey': os.getenv('ALPHA_VANTAGE_API_KEY', 'demo')
                 }
             },
             'finnhub': {
-                'base_url': 'https://finnhub.io/api/v1',
+                'base_url': os.getenv('FINNHUB_BASE_URL', 'https://finnhub.io/api/v1'),
                 'endpoints': {
                     'quote': '/quote'
                 },
                 'token': os.getenv('FINNHUB_API_KEY', 'demo')
             },
             'polygon': {
-                'base_url': 'https://api.polygon.io/v2',
+                'base_url': os.getenv('POLYGON_BASE_URL', 'https://api.polygon.io/v2'),
                 'endpoints': {
                     'prev': '/aggs/ticker/{symbol}/prev'
                 },
                 'apikey': os.getenv('POLYGON_API_KEY', 'demo')
             }
         }
+        # Each provider is a request builder plus a response parser, shared by
+        # the synchronous session path and the async fetch engine
+        self.providers = {
+            'yahoo_finance': (self._yahoo_finance_request, self._parse_yahoo_finance),
+            'twelve_data': (self._twelve_data_request, self._parse_twelve_data),
+            'alpha_vantage': (self._alpha_vantage_request, self._parse_alpha_vantage),
+            'finnhub': (self._finnhub_request, self._parse_finnhub),
+            'polygon': (self._polygon_request, self._parse_polygon)
+        }
+        # Providers with a real multi-symbol endpoint: request builder for a chunk
+        # of symbols plus a parser returning {symbol: quote}
+        self.batch_providers = {
+            'yahoo_finance': (self._yahoo_finance_batch_request, self._parse_yahoo_finance_batch),
+            'twelve_data': (self._twelve_data_batch_request, self._parse_twelve_data_batch)
+        }
+        # Keep-alive connection pool per provider for synchronous calls
+        self.sessions = {}
+        # Coalesces concurrent cache misses for the same symbol into one provider fetch
+        self.inflight = SingleFlight()
+        # Symbols with a background stale-while-revalidate refresh in progress
+        self._revalidating = set()
+        self._revalidating_lock = threading.Lock()
 
-    def get_from_yahoo_finance(self, symbol):
-        """Get stock data from Yahoo Finance (no API key needed)"""
+    def _session(self, provider):
+        session = self.sessions.get(provider)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_CONNECTIONS_PER_HOST)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            self.sessions[provider] = session
+        return session
+
+    def _fetch(self, provider, symbol):
+        """Fetch and parse one quote over the provider's pooled session"""
+        if not breakers.allow(provider):
+            raise CircuitOpenError(f'Circuit open for {provider}')
+        build_request, parse = self.providers[provider]
+        url, params, headers = build_request(symbol)
+
+        started = time.monotonic()
         try:
-            print(f"🔍 Trying Yahoo Finance for {symbol}...")
-            # Yahoo Finance API endpoint
-            url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            
-            response = requests.get(url, headers=headers, timeout=10)
-            print(f"📊 Yahoo Finance response status for {symbol}: {response.status_code}")
-            
+            response = self._session(provider).get(url, params=params, headers=headers, timeout=TIMEOUT)
             if response.status_code == 429:
-                print(f"⚠️ Yahoo Finance rate limited for {symbol}")
-                raise Exception('Rate limited by Yahoo Finance')
-                
+                raise RateLimitedError(f'Rate limited by {provider}', retry_after=parse_retry_after(response.headers))
             response.raise_for_status()
-            
-            data = response.json()
-            if data.get('chart') and data['chart'].get('result'):
-                result = data['chart']['result'][0]
-                meta = result.get('meta', {})
-                
-                if meta.get('regularMarketPrice'):
-                    print(f"✅ Yahoo Finance success for {symbol}: ${meta['regularMarketPrice']}")
-                    return {
-                        'price': float(meta['regularMarketPrice']),
-                        'change': float(meta.get('regularMarketChange', 0)),
-                        'changePercent': float(meta.get('regularMarketChangePercent', 0)) * 100,
-                        'open': float(meta.get('regularMarketOpen', 0)),
-                        'high': float(meta.get('regularMarketDayHigh', 0)),
-                        'low': float(meta.get('regularMarketDayLow', 0)),
-                        'volume': int(meta.get('regularMarketVolume', 0)),
-                        'previousClose': float(meta.get('previousClose', 0)),
-                        'dataSource': 'yahoo-finance',
-                        'isRealTime': True,
-                        'timestamp': datetime.now().isoformat()
-                    }
-            else:
-                print(f"❌ No data from Yahoo Finance for {symbol}")
-                raise Exception('No data from Yahoo Finance')
-                
+            data = parse(symbol, response.json())
         except Exception as e:
-            print(f"❌ Yahoo Finance failed for {symbol}: {str(e)}")
-            raise Exception(f'Yahoo Finance API error: {str(e)}')
+            elapsed = time.monotonic() - started
+            provider_latency.observe(provider, elapsed)
+            breakers.record(provider, elapsed, e)
+            raise
+
+        elapsed = time.monotonic() - started
+        provider_latency.observe(provider, elapsed)
+        breakers.record(provider, elapsed)
+        return data
+
+    async def _fetch_async(self, provider, symbol):
+        """Fetch and parse one quote through the async fetch engine"""
+        if not breakers.allow(provider):
+            raise CircuitOpenError(f'Circuit open for {provider}')
+        build_request, parse = self.providers[provider]
+        url, params, headers = build_request(symbol)
+
+        started = time.monotonic()
+        try:
+            data = parse(symbol, await fetch_engine.get_json(provider, url, params=params, headers=headers))
+        except asyncio.CancelledError:
+            # A cancelled hedge loser still records how long it had taken so far,
+            # a lower bound that keeps slow providers from looking fast
+            provider_latency.observe(provider, time.monotonic() - started)
+            breakers.get(provider).release()
+            raise
+        except Exception as e:
+            elapsed = time.monotonic() - started
+            provider_latency.observe(provider, elapsed)
+            breakers.record(provider, elapsed, e)
+            raise
+
+        elapsed = time.monotonic() - started
+        provider_latency.observe(provider, elapsed)
+        breakers.record(provider, elapsed)
+        return data
 
-    def get_from_yahoo_finance_batch(self, symbols):
-        """Get multiple stocks from Yahoo Finance API in batch"""
+    async def _fetch_hedged(self, symbol):
+        """Race the provider chain for one symbol, hedging on p95 latency"""
+        provider, data = await hedged_race(
+            breakers.order(PROVIDER_CHAIN),
+            lambda provider: self._fetch_async(provider, symbol),
+            provider_latency.hedge_delay,
+            lambda data: bool(data) and data.get('price', 0) > 0
+        )
+        print(f"🏁 Hedged fetch for {symbol} won by {provider}")
+        return data
+
+    async def _fetch_chunk_async(self, provider, symbols):
+        """One multi-symbol request to a provider's batch endpoint"""
+        if not breakers.allow(provider):
+            raise CircuitOpenError(f'Circuit open for {provider}')
+        build_request, parse = self.batch_providers[provider]
+        url, params, headers = build_request(symbols)
+
+        started = time.monotonic()
         try:
-            import concurrent.futures
-            
-            results = {}
-            with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-                # Submit all requests in parallel
-                future_to_symbol = {
-                    executor.submit(self.get_from_yahoo_finance, symbol): symbol
-                    for symbol in symbols
+            results = parse(await fetch_engine.get_json(provider, url, params=params, headers=headers))
+        except asyncio.CancelledError:
+            breakers.get(provider).release()
+            raise
+        except Exception as e:
+            breakers.record(provider, time.monotonic() - started, e)
+            raise
+        breakers.record(provider, time.monotonic() - started)
+        return results
+
+    async def _fetch_per_symbol_async(self, provider, symbols):
+        """Fan out one request per symbol for providers without a batch endpoint"""
+        async def fetch_one(symbol):
+            try:
+                return symbol, await self._fetch_async(provider, symbol)
+            except Exception as e:
+                print(f"❌ {provider} batch failed for {symbol}: {str(e)}")
+                return symbol, None
+
+        return dict(await asyncio.gather(*(fetch_one(symbol) for symbol in symbols)))
+
+    async def _fetch_batch_async(self, provider, symbols):
+        """Fetch all symbols from one provider, keeping only valid quotes
+
+        Providers with a multi-symbol endpoint get one request per chunk of
+        max_batch_size symbols; a failed chunk falls back to per-symbol calls
+        unless the provider is rate limiting us. Others fan out per symbol.
+        """
+        if breakers.get(provider).state == OPEN:
+            raise CircuitOpenError(f'Circuit open for {provider}')
+
+        if provider in self.batch_providers:
+            size = self.apis[provider]['max_batch_size']
+            chunks = [symbols[i:i + size] for i in range(0, len(symbols), size)]
+
+            async def fetch_chunk(chunk):
+                try:
+                    return await self._fetch_chunk_async(provider, chunk)
+                except (CircuitOpenError, RateLimitedError) as e:
+                    print(f"❌ {provider} batch request failed for {len(chunk)} symbols: {str(e)}")
+                    return {}
+                except Exception as e:
+                    print(f"❌ {provider} batch request failed, falling back to per-symbol calls: {str(e)}")
+                    return await self._fetch_per_symbol_async(provider, chunk)
+
+            fetched = {}
+            for chunk_results in await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks)):
+                fetched.update(chunk_results)
+        else:
+            fetched = await self._fetch_per_symbol_async(provider, symbols)
+
+        results = {}
+        for symbol in symbols:
+            data = fetched.get(symbol)
+            if data and data.get('price', 0) > 0:
+                results[symbol] = data
+        return results
+
+    def _yahoo_finance_request(self, symbol):
+        api = self.apis['yahoo_finance']
+        url = f"{api['base_url']}{api['endpoints']['chart'].format(symbol=symbol)}"
+        return url, None, api['headers']
+
+    def _parse_yahoo_finance(self, symbol, data):
+        if data.get('chart') and data['chart'].get('result'):
+            result = data['chart']['result'][0]
+            meta = result.get('meta', {})
+
+            if meta.get('regularMarketPrice'):
+                print(f"✅ Yahoo Finance success for {symbol}: ${meta['regularMarketPrice']}")
+                return {
+                    'price': float(meta['regularMarketPrice']),
+                    'change': float(meta.get('regularMarketChange', 0)),
+                    'changePercent': float(meta.get('regularMarketChangePercent', 0)) * 100,
+                    'open': float(meta.get('regularMarketOpen', 0)),
+                    'high': float(meta.get('regularMarketDayHigh', 0)),
+                    'low': float(meta.get('regularMarketDayLow', 0)),
+                    'volume': int(meta.get('regularMarketVolume', 0)),
+                    'previousClose': float(meta.get('previousClose', 0)),
+                    'dataSource': 'yahoo-finance',
+                    'isRealTime': True,
+                    'timestamp': datetime.now().isoformat()
                 }
-                
-                for future in concurrent.futures.as_completed(future_to_symbol):
-                    symbol = future_to_symbol[future]
-                    try:
-                        data = future.result()
-                        if data and data.get('price', 0) > 0:
-                            results[symbol] = data
-                    except Exception as e:
-                        print(f"❌ Yahoo Finance batch failed for {symbol}: {str(e)}")
-                        continue
-            
-            return results
+        print(f"❌ No data from Yahoo Finance for {symbol}")
+        raise Exception('No data from Yahoo Finance')
+
+    def _yahoo_finance_batch_request(self, symbols):
+        api = self.apis['yahoo_finance']
+        url = f"{api['base_url']}{api['endpoints']['quote']}"
+        return url, {'symbols': ','.join(symbols)}, api['headers']
+
+    def _parse_yahoo_finance_batch(self, data):
+        response = data.get('quoteResponse') or {}
+        if response.get('error'):
+            raise Exception(f"Yahoo Finance quote error: {response['error']}")
+
+        results = {}
+        for quote in response.get('result') or []:
+            symbol = quote.get('symbol')
+            if not symbol or not quote.get('regularMarketPrice'):
+                continue
+            results[symbol] = {
+                'symbol': symbol,
+                'price': float(quote['regularMarketPrice']),
+                'change': float(quote.get('regularMarketChange', 0)),
+                'changePercent': float(quote.get('regularMarketChangePercent', 0)),  # Already in percent
+                'open': float(quote.get('regularMarketOpen', 0)),
+                'high': float(quote.get('regularMarketDayHigh', 0)),
+                'low': float(quote.get('regularMarketDayLow', 0)),
+                'volume': int(quote.get('regularMarketVolume', 0)),
+                'previousClose': float(quote.get('regularMarketPreviousClose', 0)),
+                'dataSource': 'yahoo-finance',
+                'isRealTime': True,
+                'timestamp': datetime.now().isoformat()
+            }
+        return results
+
+    def get_from_yahoo_finance(self, symbol):
+        """Get stock data from Yahoo Finance (no API key needed)"""
+        try:
+            print(f"🔍 Trying Yahoo Finance for {symbol}...")
+            return self._fetch('yahoo_finance', symbol)
         except Exception as e:
-            raise Exception(f'Yahoo Finance batch API error: {str(e)}')
+            print(f"❌ Yahoo Finance failed for {symbol}: {str(e)}")
+            raise Exception(f'Yahoo Finance API error: {str(e)}')
+
+    @staticmethod
+    def _store_quote(symbol, data):
+        """Cache a real provider quote and append it to the bars and local history
+
+        OHLC fields the provider left out are filled in place from the running session.
+        """
+        traded = bar_aggregator.record(symbol, data)
+        bar_aggregator.fill(symbol, data)
+        indicator_engine.update(symbol, data.get('price'), traded)
+        stock_cache.set(symbol, data)
+        if HISTORY_STORE:
+            try:
+                history_store.record(symbol, data)
+            except Exception as e:
+                print(f"⚠️ History write failed for {symbol}: {str(e)}")
+
+    @staticmethod
+    def _mark_stale(data, age):
+        return {**data, 'isStale': True, 'cacheAge': round(age, 1)}
+
+    def _revalidate(self, symbols):
+        """Refresh stale symbols in the background, at most one refresh per symbol at a time"""
+        with self._revalidating_lock:
+            symbols = [symbol for symbol in symbols if symbol not in self._revalidating]
+            self._revalidating.update(symbols)
+        if not symbols:
+            return
+
+        def run():
+            try:
+                if len(symbols) == 1:
+                    self.inflight.do(symbols[0], self._fetch_stock_price, symbols[0])
+                else:
+                    self.refresh_quotes(symbols)
+            except Exception as e:
+                print(f"❌ Background revalidation failed for {', '.join(symbols)}: {str(e)}")
+            finally:
+                with self._revalidating_lock:
+                    self._revalidating.difference_update(symbols)
+
+        threading.Thread(target=run, name='quote-revalidate', daemon=True).start()
 
     def get_stock_price(self, symbol):
         """Get real stock price from multiple APIs"""
         try:
             # Check cache first
-            cache_key = f"{symbol}_{datetime.now().strftime('%Y%m%d%H%M')}"
-            if cache_key in stock_cache:
-                cached_data = stock_cache[cache_key]
-                if time.time() - cached_data['timestamp'] < CACHE_DURATION:
+            cached_data, age = stock_cache.get_with_age(symbol)
+            if cached_data is not None:
+                if age < CACHE_DURATION:
                     print(f"📦 Using cached data for {symbol}")
-                    return cached_data['data']
+                    return cached_data
+                # Within the staleness budget: answer now, refresh behind the response
+                print(f"📦 Using stale data for {symbol} ({age:.0f}s old), revalidating")
+                self._revalidate([symbol])
+                return self._mark_stale(cached_data, age)
+
+            # Concurrent misses for the same symbol wait on a single upstream fetch
+            return self.inflight.do(symbol, self._fetch_stock_price, symbol)
 
-            # Try multiple APIs (Yahoo Finance first - no API key needed)
-            apis_to_try = [
-                self.get_from_yahoo_finance,
-                self.get_from_twelve_data,
-                self.get_from_alpha_vantage,
-                self.get_from_finnhub,
-                self.get_from_polygon
-            ]
+        except Exception as e:
+            print(f"❌ Error getting stock data for {symbol}: {str(e)}")
+            return self.get_enhanced_mock_data(symbol)
+
+    def _fetch_stock_price(self, symbol):
+        """Run the provider chain for a symbol and cache the first real quote"""
+        try:
+            # Another request may have filled the cache while we waited to lead; the
+            # lookup that brought us here already counted the miss
+            cached_data = stock_cache.peek(symbol)
+            if cached_data is not None:
+                return cached_data
+
+            if HEDGED_REQUESTS:
+                try:
+                    data = fetch_engine.run(self._fetch_hedged(symbol), timeout=TIMEOUT * 2)
+                    self._store_quote(symbol, data)
+                    print(f"✅ Real data for {symbol}: ${data['price']} ({data['dataSource']})")
+                    return data
+                except Exception as e:
+                    print(f"⚠️ All APIs failed for {symbol}, using enhanced mock data: {str(e)}")
+                    return self.get_enhanced_mock_data(symbol)
+
+            # Try multiple APIs, healthiest provider first
+            apis_to_try = [getattr(self, f'get_from_{provider}') for provider in breakers.order(PROVIDER_CHAIN)]
 
             for api_func in apis_to_try:
                 try:
                     data = api_func(symbol)
                     if data and data.get('price', 0) > 0:
                         # Cache the result
-                        stock_cache[cache_key] = {
-                            'data': data,
-                            'timestamp': time.time()
-                        }
+                        self._store_quote(symbol, data)
                         print(f"✅ Real data for {symbol}: ${data['price']} ({data['dataSource']})")
                         return data
                 except Exception as e:
@@ -173,332 +555,323 @@ class StockDataService:
             print(f"❌ Error getting stock data for {symbol}: {str(e)}")
             return self.get_enhanced_mock_data(symbol)
 
+    async def get_multiple_stock_prices_async(self, symbols, use_cache=True):
+        """Merge quotes from the cache and each provider in turn
+
+        Every stage only sees the symbols earlier stages could not fill: cache,
+        then batch providers, then per-symbol providers. Whatever is still
+        missing when providers run out or the BATCH_TIMEOUT deadline passes
+        gets enhanced mock data.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + BATCH_TIMEOUT
+        symbols = list(dict.fromkeys(symbols))
+        results = {}
+
+        stale = []
+        for symbol in symbols if use_cache else ():
+            cached_data, age = stock_cache.get_with_age(symbol)
+            if cached_data is None:
+                continue
+            if age < CACHE_DURATION:
+                results[symbol] = cached_data
+            else:
+                results[symbol] = self._mark_stale(cached_data, age)
+                stale.append(symbol)
+        missing = [symbol for symbol in symbols if symbol not in results]
+        if results:
+            print(f"📦 Using cached data for {len(results)} stocks ({len(stale)} stale)")
+        if stale:
+            self._revalidate(stale)
+
+        # Batch APIs first (more efficient), then providers that only do single quotes
+        stages = breakers.order(BATCH_PROVIDERS) + [p for p in breakers.order(PROVIDER_CHAIN) if p not in BATCH_PROVIDERS]
+
+        for provider in stages:
+            if not missing:
+                break
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                print(f"⏱️ Deadline reached with {len(missing)} stocks missing")
+                break
+
+            try:
+                fetched = await asyncio.wait_for(self._fetch_batch_async(provider, missing), timeout=remaining)
+            except asyncio.TimeoutError:
+                print(f"⏱️ Deadline reached during {provider} with {len(missing)} stocks missing")
+                break
+            except Exception as e:
+                print(f"❌ Batch API failed: {str(e)}")
+                continue
+
+            for symbol, data in fetched.items():
+                self._store_quote(symbol, data)
+                results[symbol] = data
+            missing = [symbol for symbol in missing if symbol not in results]
+            print(f"✅ {provider} filled {len(fetched)} stocks, {len(missing)} still missing")
+
+        if missing:
+            print(f"⚠️ No real data for {len(missing)} stocks, using enhanced mock data")
+            results.update(generate_quotes(missing))
+
+        return {symbol: results[symbol] for symbol in symbols}
+
     def get_multiple_stock_prices(self, symbols):
         """Get multiple stock prices efficiently with batch API calls"""
         try:
             print(f"📊 Fetching data for {len(symbols)} stocks: {', '.join(symbols)}")
-            
-            # Try batch APIs first (more efficient)
-            batch_apis = [
-                lambda syms: self.get_from_yahoo_finance_batch(syms),
-                lambda syms: self.get_from_twelve_data_batch(syms),
-                lambda syms: self.get_from_alpha_vantage_batch(syms),
-                lambda syms: self.get_from_finnhub_batch(syms)
-            ]
-            
-            for batch_api in batch_apis:
-                try:
-                    results = batch_api(symbols)
-                    if results and len(results) > 0:
-                        print(f"✅ Batch API success: {len(results)} stocks")
-                        # Cache the results
-                        for symbol, data in results.items():
-                            cache_key = f"{symbol}_{datetime.now().strftime('%Y%m%d%H%M')}"
-                            stock_cache[cache_key] = {
-                                'data': data,
-                                'timestamp': time.time()
-                            }
-                        return results
-                except Exception as e:
-                    print(f"❌ Batch API failed: {str(e)}")
-                    continue
-            
-            # Fallback to individual calls if batch APIs fail
-            print("⚠️ Batch APIs failed, trying individual calls")
-            results = {}
-            for symbol in symbols:
-                try:
-                    data = self.get_stock_price(symbol)
-                    results[symbol] = data
-                except Exception as e:
-                    print(f"❌ Individual call failed for {symbol}: {str(e)}")
-                    results[symbol] = self.get_enhanced_mock_data(symbol)
-            
-            return results
-            
+            # The pipeline enforces BATCH_TIMEOUT itself; this is a safety net
+            return fetch_engine.run(self.get_multiple_stock_prices_async(symbols), timeout=BATCH_TIMEOUT + 5)
+
         except Exception as e:
             print(f"❌ Error getting multiple stock data: {str(e)}")
             # Return mock data for all symbols
-            return {symbol: self.get_enhanced_mock_data(symbol) for symbol in symbols}
+            return generate_quotes(symbols)
+
+    def refresh_quotes(self, symbols):
+        """Re-fetch symbols from providers, bypassing the cache, and cache the results"""
+        print(f"🔄 Refreshing {len(symbols)} hot stocks")
+        return fetch_engine.run(self.get_multiple_stock_prices_async(symbols, use_cache=False), timeout=BATCH_TIMEOUT + 5)
+
+    def _twelve_data_request(self, symbol):
+        url = f"{self.apis['twelve_data']['base_url']}{self.apis['twelve_data']['endpoints']['price']}"
+        return url, {'symbol': symbol, 'apikey': 'demo'}, None
+
+    def _parse_twelve_data(self, symbol, data):
+        if data.get('status') == 'error' and data.get('code') == 429:
+            raise RateLimitedError(data.get('message', 'Rate limited by Twelve Data'))
+        if data.get('price'):
+            price = float(data['price'])
+            return {
+                'symbol': symbol,
+                'price': price,
+                'change': 0,  # Twelve Data price endpoint doesn't provide change
+                'changePercent': 0,
+                'volume': 0,
+                'high': price,
+                'low': price,
+                'open': price,
+                'previousClose': price,
+                'timestamp': datetime.now().isoformat(),
+                'dataSource': 'twelve-data',
+                'isRealTime': True
+            }
+        raise Exception('No price data from Twelve Data')
+
+    def _twelve_data_batch_request(self, symbols):
+        url = f"{self.apis['twelve_data']['base_url']}{self.apis['twelve_data']['endpoints']['quote']}"
+        return url, {'symbol': ','.join(symbols), 'apikey': self.apis['twelve_data']['apikey']}, None
+
+    def _parse_twelve_data_batch(self, data):
+        if data.get('status') == 'error':
+            if data.get('code') == 429:
+                raise RateLimitedError(data.get('message', 'Rate limited by Twelve Data'))
+            raise Exception(data.get('message', 'Twelve Data quote error'))
+
+        # A single-symbol request returns the quote itself rather than a map
+        quotes = {data['symbol']: data} if 'symbol' in data else data
+
+        results = {}
+        for symbol, quote in quotes.items():
+            if not isinstance(quote, dict) or quote.get('status') == 'error' or not quote.get('close'):
+                continue
+            results[symbol] = {
+                'symbol': symbol,
+                'price': float(quote['close']),
+                'change': float(quote.get('change') or 0),
+                'changePercent': float(quote.get('percent_change') or 0),
+                'volume': int(float(quote.get('volume') or 0)),
+                'high': float(quote.get('high') or 0),
+                'low': float(quote.get('low') or 0),
+                'open': float(quote.get('open') or 0),
+                'previousClose': float(quote.get('previous_close') or 0),
+                'timestamp': datetime.now().isoformat(),
+                'dataSource': 'twelve-data',
+                'isRealTime': True
+            }
+        return results
 
     def get_from_twelve_data(self, symbol):
         """Get data from Twelve Data API"""
         try:
-            url = f"{self.apis['twelve_data']['base_url']}{self.apis['twelve_data']['endpoints']['price']}"
-            params = {'symbol': symbol, 'apikey': 'demo'}
-            
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            if data.get('price'):
-                price = float(data['price'])
-                return {
-                    'symbol': symbol,
-                    'price': price,
-                    'change': 0,  # Twelve Data price endpoint doesn't provide change
-                    'changePercent': 0,
-                    'volume': 0,
-                    'high': price,
-                    'low': price,
-                    'open': price,
-                    'previousClose': price,
-                    'timestamp': datetime.now().isoformat(),
-                    'dataSource': 'twelve-data',
-                    'isRealTime': True
-                }
-            raise Exception('No price data from Twelve Data')
+            return self._fetch('twelve_data', symbol)
         except Exception as e:
             raise Exception(f'Twelve Data API error: {str(e)}')
 
-    def get_from_twelve_data_batch(self, symbols):
-        """Get multiple stocks from Twelve Data API in batch"""
-        try:
-            # Twelve Data doesn't have a true batch API, but we can make parallel requests
-            import concurrent.futures
-            
-            results = {}
-            with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-                # Submit all requests in parallel
-                future_to_symbol = {
-                    executor.submit(self.get_from_twelve_data, symbol): symbol 
-                    for symbol in symbols
-                }
-                
-                for future in concurrent.futures.as_completed(future_to_symbol):
-                    symbol = future_to_symbol[future]
-                    try:
-                        data = future.result()
-                        if data and data.get('price', 0) > 0:
-                            results[symbol] = data
-                    except Exception as e:
-                        print(f"❌ Twelve Data batch failed for {symbol}: {str(e)}")
-                        continue
-            
-            return results
-        except Exception as e:
-            raise Exception(f'Twelve Data batch API error: {str(e)}')
+    def _alpha_vantage_request(self, symbol):
+        params = {
+            **self.apis['alpha_vantage']['params'],
+            'symbol': symbol
+        }
+        return self.apis['alpha_vantage']['base_url'], params, None
 
-    def get_from_alpha_vantage_batch(self, symbols):
-        """Get multiple stocks from Alpha Vantage API in batch"""
-        try:
-            # Alpha Vantage doesn't have batch API, use parallel requests
-            import concurrent.futures
-            
-            results = {}
-            with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:  # Rate limit friendly
-                future_to_symbol = {
-                    executor.submit(self.get_from_alpha_vantage, symbol): symbol 
-                    for symbol in symbols
-                }
-                
-                for future in concurrent.futures.as_completed(future_to_symbol):
-                    symbol = future_to_symbol[future]
-                    try:
-                        data = future.result()
-                        if data and data.get('price', 0) > 0:
-                            results[symbol] = data
-                    except Exception as e:
-                        print(f"❌ Alpha Vantage batch failed for {symbol}: {str(e)}")
-                        continue
-            
-            return results
-        except Exception as e:
-            raise Exception(f'Alpha Vantage batch API error: {str(e)}')
+    def _parse_alpha_vantage(self, symbol, data):
+        # Over-quota (or demo key) responses come back as 200 with a note instead of a quote
+        if data.get('Note') or data.get('Information'):
+            raise RateLimitedError(data.get('Note') or data.get('Information'))
+        if data.get('Global Quote'):
+            quote = data['Global Quote']
+            price = float(quote['05. price'])
+            change = float(quote['09. change'])
+            change_percent = float(quote['10. change percent'].replace('%', ''))
 
-    def get_from_finnhub_batch(self, symbols):
-        """Get multiple stocks from Finnhub API in batch"""
-        try:
-            # Finnhub doesn't have batch API, use parallel requests
-            import concurrent.futures
-            
-            results = {}
-            with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-                future_to_symbol = {
-                    executor.submit(self.get_from_finnhub, symbol): symbol 
-                    for symbol in symbols
-                }
-                
-                for future in concurrent.futures.as_completed(future_to_symbol):
-                    symbol = future_to_symbol[future]
-                    try:
-                        data = future.result()
-                        if data and data.get('price', 0) > 0:
-                            results[symbol] = data
-                    except Exception as e:
-                        print(f"❌ Finnhub batch failed for {symbol}: {str(e)}")
-                        continue
-            
-            return results
-        except Exception as e:
-            raise Exception(f'Finnhub batch API error: {str(e)}')
+            return {
+                'symbol': symbol,
+                'price': price,
+                'change': change,
+                'changePercent': change_percent,
+                'volume': int(quote['06. volume']),
+                'high': float(quote['03. high']),
+                'low': float(quote['04. low']),
+                'open': float(quote['02. open']),
+                'previousClose': float(quote['08. previous close']),
+                'timestamp': datetime.now().isoformat(),
+                'dataSource': 'alpha-vantage',
+                'isRealTime': True
+            }
+        raise Exception('No data from Alpha Vantage')
 
     def get_from_alpha_vantage(self, symbol):
         """Get data from Alpha Vantage API"""
         try:
-            url = self.apis['alpha_vantage']['base_url']
-            params = {
-                **self.apis['alpha_vantage']['params'],
-                'symbol': symbol
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            if data.get('Global Quote'):
-                quote = data['Global Quote']
-                price = float(quote['05. price'])
-                change = float(quote['09. change'])
-                change_percent = float(quote['10. change percent'].replace('%', ''))
-                
-                return {
-                    'symbol': symbol,
-                    'price': price,
-                    'change': change,
-                    'changePercent': change_percent,
-                    'volume': int(quote['06. volume']),
-                    'high': float(quote['03. high']),
-                    'low': float(quote['04. low']),
-                    'open': float(quote['02. open']),
-                    'previousClose': float(quote['08. previous close']),
-                    'timestamp': datetime.now().isoformat(),
-                    'dataSource': 'alpha-vantage',
-                    'isRealTime': True
-                }
-            raise Exception('No data from Alpha Vantage')
+            return self._fetch('alpha_vantage', symbol)
         except Exception as e:
             raise Exception(f'Alpha Vantage API error: {str(e)}')
 
+    def _finnhub_request(self, symbol):
+        url = f"{self.apis['finnhub']['base_url']}{self.apis['finnhub']['endpoints']['quote']}"
+        params = {
+            'symbol': symbol,
+            'token': self.apis['finnhub']['token']
+        }
+        return url, params, None
+
+    def _parse_finnhub(self, symbol, data):
+        if data.get('c'):  # current price
+            return {
+                'symbol': symbol,
+                'price': data['c'],
+                'change': data['d'],
+                'changePercent': data['dp'],
+                'volume': 0,
+                'high': data['h'],
+                'low': data['l'],
+                'open': data['o'],
+                'previousClose': data['pc'],
+                'timestamp': datetime.now().isoformat(),
+                'dataSource': 'finnhub',
+                'isRealTime': True
+            }
+        raise Exception('No data from Finnhub')
+
     def get_from_finnhub(self, symbol):
         """Get data from Finnhub API"""
         try:
-            url = f"{self.apis['finnhub']['base_url']}{self.apis['finnhub']['endpoints']['quote']}"
-            params = {
-                'symbol': symbol,
-                'token': self.apis['finnhub']['token']
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            if data.get('c'):  # current price
-                return {
-                    'symbol': symbol,
-                    'price': data['c'],
-                    'change': data['d'],
-                    'changePercent': data['dp'],
-                    'volume': 0,
-                    'high': data['h'],
-                    'low': data['l'],
-                    'open': data['o'],
-                    'previousClose': data['pc'],
-                    'timestamp': datetime.now().isoformat(),
-                    'dataSource': 'finnhub',
-                    'isRealTime': True
-                }
-            raise Exception('No data from Finnhub')
+            return self._fetch('finnhub', symbol)
         except Exception as e:
             raise Exception(f'Finnhub API error: {str(e)}')
 
+    def _polygon_request(self, symbol):
+        url = f"{self.apis['polygon']['base_url']}{self.apis['polygon']['endpoints']['prev'].format(symbol=symbol)}"
+        params = {
+            'adjusted': 'true',
+            'apikey': self.apis['polygon']['apikey']
+        }
+        return url, params, None
+
+    def _parse_polygon(self, symbol, data):
+        if data.get('results') and len(data['results']) > 0:
+            result = data['results'][0]
+            price = result['c']  # close price
+            open_price = result['o']
+            change = price - open_price
+            change_percent = (change / open_price) * 100
+
+            return {
+                'symbol': symbol,
+                'price': price,
+                'change': change,
+                'changePercent': change_percent,
+                'volume': result['v'],
+                'high': result['h'],
+                'low': result['l'],
+                'open': open_price,
+                'previousClose': open_price,
+                'timestamp': datetime.now().isoformat(),
+                'dataSource': 'polygon',
+                'isRealTime': True
+            }
+        raise Exception('No data from Polygon')
+
     def get_from_polygon(self, symbol):
         """Get data from Polygon API"""
         try:
-            url = f"{self.apis['polygon']['base_url']}{self.apis['polygon']['endpoints']['prev'].format(symbol=symbol)}"
-            params = {
-                'adjusted': 'true',
-                'apikey': self.apis['polygon']['apikey']
-            }
-            
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            if data.get('results') and len(data['results']) > 0:
-                result = data['results'][0]
-                price = result['c']  # close price
-                open_price = result['o']
-                change = price - open_price
-                change_percent = (change / open_price) * 100
-                
-                return {
-                    'symbol': symbol,
-                    'price': price,
-                    'change': change,
-                    'changePercent': change_percent,
-                    'volume': result['v'],
-                    'high': result['h'],
-                    'low': result['l'],
-                    'open': open_price,
-                    'previousClose': open_price,
-                    'timestamp': datetime.now().isoformat(),
-                    'dataSource': 'polygon',
-                    'isRealTime': True
-                }
-            raise Exception('No data from Polygon')
+            return self._fetch('polygon', symbol)
         except Exception as e:
             raise Exception(f'Polygon API error: {str(e)}')
 
     def get_enhanced_mock_data(self, symbol):
-        """Generate enhanced mock data with realistic fluctuations"""
-        # Base prices for different stocks
-        base_prices = {
-            'AAPL': 178.23, 'MSFT': 378.45, 'GOOGL': 145.67, 'TSLA': 234.56, 'NVDA': 168.45,
-            'AMZN': 145.32, 'META': 320.15, 'NFLX': 425.67, 'AMD': 98.45, 'INTC': 45.67,
-            'SPY': 415.23, 'QQQ': 365.45, 'DIA': 340.12, 'BTC-USD': 45000.00, 'ETH-USD': 3200.00
-        }
-        
-        # Volatility for different stocks
-        volatilities = {
-            'AAPL': 2.5, 'MSFT': 2.0, 'GOOGL': 2.8, 'TSLA': 8.0, 'NVDA': 5.0,
-            'AMZN': 3.5, 'META': 4.0, 'NFLX': 3.0, 'AMD': 4.5, 'INTC': 2.5,
-            'SPY': 15.0, 'QQQ': 25.0, 'DIA': 50.0, 'BTC-USD': 500.0, 'ETH-USD': 50.0
-        }
-        
-        base_price = base_prices.get(symbol, 100 + hash(symbol) % 200)
-        volatility = volatilities.get(symbol, 2.0)
-        
-        # Create realistic price movements
-        current_hour = datetime.now().hour
-        market_open = 9 <= current_hour <= 16  # Market hours simulation
-        
-        # Higher volatility during market hours
-        adjusted_volatility = volatility * (1.5 if market_open else 0.3)
-        
-        # Add trending behavior
-        trend_factor = hash(symbol + str(datetime.now().strftime('%Y%m%d'))) % 100 / 100 - 0.5
-        change = (hash(symbol + str(int(time.time() / 60))) % 100 / 100 - 0.5 + trend_factor) * adjusted_volatility
-        new_price = max(0.01, base_price + change)
-        change_percent = (change / base_price) * 100
-        
-        return {
-            'symbol': symbol,
-            'price': round(new_price, 2),
-            'change': round(change, 2),
-            'changePercent': round(change_percent, 2),
-            'volume': int(base_price * 1000 * (1 + hash(symbol) % 50 / 100)),
-            'high': round(new_price + abs(change) * 0.5, 2),
-            'low': round(new_price - abs(change) * 0.5, 2),
-            'open': round(base_price, 2),
-            'previousClose': round(base_price, 2),
-            'timestamp': datetime.now().isoformat(),
-            'dataSource': 'enhanced-mock',
-            'isRealTime': False
-        }
+        """Generate enhanced mock data with realistic fluctuations
+
+        Stable across workers and pods for a given symbol and minute (no salted hash())
+        """
+        return mock_quote(symbol)
 
 # Initialize the service
 stock_service = StockDataService()
 
+hot_symbols = HotSymbolTracker()
+refresher = QuoteRefresher(
+    stock_cache,
+    hot_symbols,
+    stock_service.refresh_quotes,
+    pinned_symbols=list(INDEX_SYMBOLS),
+    top_n=REFRESH_TOP_N,
+    interval=REFRESH_INTERVAL,
+    lead_time=REFRESH_LEAD_TIME
+)
+
+def record_hot(quotes):
+    """Count a request for each symbol that got a real quote
+
+    Mock fallbacks are never cached, so a symbol no provider knows would stay
+    due for refresh, and be sent to every provider, for as long as it is hot.
+    """
+    for symbol, data in quotes.items():
+        if data and data.get('isRealTime'):
+            hot_symbols.record(symbol)
+
+def stream_quotes(symbols):
+    """Quotes for the stream loop; streamed symbols count as hot so the refresher keeps them warm"""
+    quotes = stock_service.get_multiple_stock_prices(symbols)
+    record_hot(quotes)
+    return quotes
+
+quote_stream = QuoteStream(
+    stream_quotes,
+    interval=STREAM_INTERVAL,
+    max_subscribers=STREAM_MAX_SUBSCRIBERS,
+    max_symbols=STREAM_MAX_SYMBOLS
+)
+
+@app.before_request
+def start_background_jobs():
+    """Background threads start lazily so each forked worker runs its own"""
+    if QUOTE_REFRESHER:
+        refresher.ensure_started()
+    if HISTORY_STORE:
+        history_compactor.ensure_started()
+
 @app.route('/api/stock/<symbol>', methods=['GET'])
 def get_stock_price(symbol):
     """Get stock price for a specific symbol"""
     try:
         data = stock_service.get_stock_price(symbol.upper())
-        return jsonify({
+        record_hot({symbol.upper(): data})
+        return responder.respond(request, dumps({
             'success': True,
             'data': data
-        })
+        }))
     except Exception as e:
         return jsonify({
             'success': False,
@@ -506,20 +879,29 @@ def get_stock_price(symbol):
             'data': stock_service.get_enhanced_mock_data(symbol.upper())
         }), 500
 
-@app.route('/api/stocks', methods=['POST'])
+@app.route('/api/stocks', methods=['GET', 'POST'])
 def get_multiple_stocks():
-    """Get stock prices for multiple symbols using batch API calls"""
+    """Get stock prices for multiple symbols using batch API calls
+
+    GET /api/stocks?symbols=AAPL,MSFT is the cacheable form: it answers If-None-Match with 304.
+    """
     try:
-        symbols = request.json.get('symbols', [])
+        if request.method == 'GET':
+            symbols = [symbol.strip() for symbol in request.args.get('symbols', '').split(',') if symbol.strip()]
+        else:
+            symbols = request.json.get('symbols', [])
         print(f"📊 Received request for {len(symbols)} stocks: {', '.join(symbols)}")
         
+        symbols = [symbol.upper() for symbol in symbols]
+
         # Use batch method for efficiency
-        results = stock_service.get_multiple_stock_prices([symbol.upper() for symbol in symbols])
+        results = stock_service.get_multiple_stock_prices(symbols)
+        record_hot(results)
         
-        return jsonify({
+        return responder.respond(request, dumps({
             'success': True,
             'data': results
-        })
+        }))
     except Exception as e:
         print(f"❌ Error in batch API: {str(e)}")
         return jsonify({
@@ -533,102 +915,200 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'cache_size': len(stock_cache)
+        'cache': stock_cache.stats(),
+        'inflight': stock_service.inflight.stats(),
+        'hedged_requests': HEDGED_REQUESTS,
+        'provider_latency': provider_latency.snapshot(),
+        'provider_order': breakers.order(PROVIDER_CHAIN),
+        'circuit_breakers': breakers.snapshot(),
+        'refresher': refresher.stats(),
+        'stream': quote_stream.stats(),
+        'bars': bar_aggregator.stats(),
+        'indicators': indicator_engine.stats(),
+        'indices_snapshot': indices_snapshot.stats(),
+        'http_cache': responder.stats(),
+        'history': {**history_store.stats(), 'compactor': history_compactor.stats()} if HISTORY_STORE else None
     })
 
-@app.route('/api/indices', methods=['GET'])
-def get_market_indices():
-    """Get real market indices data"""
-    try:
-        print("📊 Fetching market indices...")
-        
-        # Get real data for major indices using their ETF symbols
-        indices_data = {}
-        
-        # Map indices to their actual index symbols for real data
-        index_symbols = {
-            '^GSPC': 'S&P 500',
-            '^IXIC': 'NASDAQ', 
-            '^DJI': 'DOW'
+@app.route('/api/indicators/<symbol>', methods=['GET'])
+def get_stock_indicators(symbol):
+    """SMA, EMA, RSI, VWAP and volatility over 1-minute bars"""
+    symbol = symbol.upper()
+    indicators = indicator_engine.snapshot(symbol)
+    if indicators is None:
+        times, closes, volumes = load_indicator_history(symbol)
+        if len(closes):
+            indicator_engine.backfill(symbol, times, closes, volumes)
+            indicators = indicator_engine.snapshot(symbol)
+    if indicators is None:
+        return jsonify({
+            'success': False,
+            'error': f'No quotes or history for {symbol} yet'
+        }), 404
+
+    return jsonify({
+        'success': True,
+        'data': {
+            'symbol': symbol,
+            **indicators
         }
-        
-        for symbol, name in index_symbols.items():
-            try:
-                data = stock_service.get_stock_price(symbol)
-                if data and data.get('price', 0) > 0:
-                    indices_data[name] = {
-                        'name': name,
-                        'value': f"{data['price']:,.2f}",
-                        'change': f"{data['change']:+.2f}",
-                        'percent': f"{data['changePercent']:+.2f}%",
-                        'trend': 'up' if data['changePercent'] >= 0 else 'down'
-                    }
-                    print(f"✅ Got real data for {name}: ${data['price']}")
-                else:
-                    print(f"❌ No real data for {name}")
-            except Exception as e:
-                print(f"❌ Failed to get data for {name}: {str(e)}")
-        
-        # Add some mock data for indices we can't get easily
-        result = {
-            'US': [
-                indices_data.get('S&P 500', {
-                    'name': 'S&P 500', 
-                    'value': '4,567.89', 
-                    'change': '+12.34', 
-                    'percent': '+0.27%', 
-                    'trend': 'up'
-                }),
-                indices_data.get('NASDAQ', {
-                    'name': 'NASDAQ', 
-                    'value': '14,234.56', 
-                    'change': '+45.67', 
-                    'percent': '+0.32%', 
-                    'trend': 'up'
-                }),
-                indices_data.get('DOW', {
-                    'name': 'DOW', 
-                    'value': '34,567.89', 
-                    'change': '-23.45', 
-                    'percent': '-0.07%', 
-                    'trend': 'down'
-                })
-            ],
-            'Europe': [
-                {'name': 'FTSE 100', 'value': '7,456.78', 'change': '+23.45', 'percent': '+0.32%', 'trend': 'up'},
-                {'name': 'DAX', 'value': '15,678.90', 'change': '-12.34', 'percent': '-0.08%', 'trend': 'down'},
-                {'name': 'CAC 40', 'value': '7,234.56', 'change': '+34.56', 'percent': '+0.48%', 'trend': 'up'}
-            ],
-            'Asia': [
-                {'name': 'Nikkei 225', 'value': '32,456.78', 'change': '+123.45', 'percent': '+0.38%', 'trend': 'up'},
-                {'name': 'Hang Seng', 'value': '18,234.56', 'change': '-45.67', 'percent': '-0.25%', 'trend': 'down'},
-                {'name': 'Shanghai', 'value': '3,234.56', 'change': '+12.34', 'percent': '+0.38%', 'trend': 'up'}
-            ],
-            'Currencies': [
-                {'name': 'EUR/USD', 'value': '1.0876', 'change': '+0.0023', 'percent': '+0.21%', 'trend': 'up'},
-                {'name': 'GBP/USD', 'value': '1.2654', 'change': '-0.0012', 'percent': '-0.09%', 'trend': 'down'},
-                {'name': 'USD/JPY', 'value': '149.23', 'change': '+0.45', 'percent': '+0.30%', 'trend': 'up'}
-            ],
-            'Crypto': [
-                {'name': 'BTC/USD', 'value': '43,567.89', 'change': '+1,234.56', 'percent': '+2.92%', 'trend': 'up'},
-                {'name': 'ETH/USD', 'value': '2,345.67', 'change': '+45.67', 'percent': '+1.98%', 'trend': 'up'},
-                {'name': 'ADA/USD', 'value': '0.4567', 'change': '-0.0123', 'percent': '-2.63%', 'trend': 'down'}
-            ]
+    })
+
+@app.route('/api/bars/<symbol>', methods=['GET'])
+def get_stock_bars(symbol):
+    """Rolling OHLCV bars built from fetched quotes, ?interval=1m|5m|1h&limit="""
+    interval = request.args.get('interval', '1m')
+    if interval not in BAR_INTERVALS:
+        return jsonify({
+            'success': False,
+            'error': f"interval must be one of {', '.join(BAR_INTERVALS)}"
+        }), 400
+
+    limit = request.args.get('limit', type=int)
+    bars = bar_aggregator.bars(symbol.upper(), interval, limit)
+    if bars is None:
+        return jsonify({
+            'success': False,
+            'error': f'No quotes seen for {symbol.upper()} yet'
+        }), 404
+
+    return jsonify({
+        'success': True,
+        'data': {
+            'symbol': symbol.upper(),
+            'interval': interval,
+            **bars
         }
-        
+    })
+
+def _parse_time(value, default):
+    """Unix seconds or an ISO-8601 string from a query parameter"""
+    if not value:
+        return default
+    try:
+        seconds = float(value)
+    except ValueError:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    # float() accepts 'nan' and 'inf', which no bar index can be built from
+    if not math.isfinite(seconds):
+        raise ValueError(f"{value} is not a finite time")
+    return seconds
+
+@app.route('/api/history/<symbol>', methods=['GET'])
+def get_stock_history(symbol):
+    """OHLCV bars from the local history store, ?from=&to=&interval=1m|1h|1d"""
+    if not valid_symbol(symbol):
         return jsonify({
-            'success': True,
-            'data': result,
-            'timestamp': datetime.now().isoformat()
-        })
-        
-    except Exception as e:
-        print(f"❌ Error getting market indices: {str(e)}")
+            'success': False,
+            'error': f'Invalid symbol: {symbol}'
+        }), 400
+
+    interval = request.args.get('interval', '1m')
+    if interval not in HISTORY_INTERVALS:
         return jsonify({
             'success': False,
-            'error': str(e),
+            'error': f"interval must be one of {', '.join(HISTORY_INTERVALS)}"
+        }), 400
+
+    try:
+        end = _parse_time(request.args.get('to'), time.time())
+        start = _parse_time(request.args.get('from'), end - HISTORY_DEFAULT_SPANS[interval])
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': f'Invalid time range: {str(e)}'
+        }), 400
+
+    step = HISTORY_INTERVALS[interval][0]
+    if end <= start or (end - start) / step > HISTORY_MAX_POINTS:
+        return jsonify({
+            'success': False,
+            'error': f'Time range must be positive and at most {HISTORY_MAX_POINTS} {interval} bars'
+        }), 400
+
+    bars = history_store.query(symbol.upper(), start, end, interval)
+    return jsonify({
+        'success': True,
+        'data': {
+            'symbol': symbol.upper(),
+            'interval': interval,
+            'from': int(start),
+            'to': int(end),
+            **bars
+        }
+    })
+
+@app.route('/api/stream/quotes', methods=['GET'])
+def stream_stock_quotes():
+    """Server-Sent Events stream of quote changes for ?symbols=AAPL,MSFT"""
+    symbols = [symbol.strip().upper() for symbol in request.args.get('symbols', '').split(',') if symbol.strip()]
+    if not symbols:
+        return jsonify({
+            'success': False,
+            'error': 'symbols query parameter is required'
+        }), 400
+
+    quote_stream.ensure_started()
+    subscription = quote_stream.subscribe(symbols)
+    if subscription is None:
+        return jsonify({
+            'success': False,
+            'error': 'Too many streaming clients, poll /api/stocks instead'
+        }), 503
+
+    def generate():
+        try:
+            yield 'retry: 3000\n\n'
+            while not subscription.closed:
+                events = subscription.drain(STREAM_HEARTBEAT)
+                # A comment line keeps proxies from closing an idle connection
+                yield ''.join(events) if events else ': keepalive\n\n'
+        finally:
+            quote_stream.unsubscribe(subscription)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+def format_index(name, data):
+    return {
+        'name': name,
+        'value': f"{data['price']:,.2f}",
+        'change': f"{data['change']:+.2f}",
+        'percent': f"{data['changePercent']:+.2f}%",
+        'trend': 'up' if data['changePercent'] >= 0 else 'down'
+    }
+
+def build_indices_snapshot():
+    """Market indices payload for the snapshot job: all index symbols in one batch"""
+    quotes = stock_service.get_multiple_stock_prices(list(INDEX_SYMBOLS))
+    us = []
+    for symbol, name in INDEX_SYMBOLS.items():
+        data = quotes.get(symbol)
+        if data and data.get('price', 0) > 0:
+            us.append(format_index(name, data))
+        else:
+            print(f"❌ No real data for {name}")
+            us.append(FALLBACK_US_INDICES[name])
+    return {'US': us, **STATIC_INDICES}, {'success': True, 'timestamp': datetime.now().isoformat()}
+
+indices_snapshot = SnapshotJob(build_indices_snapshot, interval=INDICES_REFRESH_INTERVAL, name='indices')
+
+@app.route('/api/indices', methods=['GET'])
+def get_market_indices():
+    """Get real market indices data from the precomputed snapshot"""
+    indices_snapshot.ensure_started()
+    snapshot = indices_snapshot.get()
+    if snapshot is None:
+        return jsonify({
+            'success': False,
+            'error': 'Market indices are not available yet',
             'timestamp': datetime.now().isoformat()
-        }), 500
+        }), 503
+
+    body, etag = snapshot
+    return responder.respond(request, body, etag)
 
 if __name__ == '__main__':
     print("🚀 Starting Stock Data Service...")
@@ -636,6 +1116,10 @@ if __name__ == '__main__':
     print("  GET  /api/stock/<symbol>     - Get single stock price")
     print("  POST /api/stocks             - Get multiple stock prices")
     print("  GET  /api/indices            - Get market indices")
+    print("  GET  /api/stream/quotes      - Stream quote changes (SSE)")
+    print("  GET  /api/bars/<symbol>      - Rolling 1m/5m/1h bars")
+    print("  GET  /api/indicators/<symbol> - SMA/EMA/RSI/VWAP/volatility")
+    print("  GET  /api/history/<symbol>   - Historical OHLCV bars")
     print("  GET  /api/health             - Health check")
     print("🌐 Server running on http://localhost:5003")
     
@@ -0,0 +1,48 @@
+"""
+Background - Per-process daemon thread for periodic jobs
+Gunicorn forks workers after the app is imported and threads don't survive
+a fork, so jobs start their thread lazily from the request path. The thread
+is started again whenever it is found in a new process or no longer alive.
+"""
+
+import os
+import threading
+
+
+class BackgroundThread:
+    """Daemon thread running target() at most once per process
+
+    target should return once the stopped event is set; loops typically
+    sleep with stopped.wait(interval) so stop() takes effect immediately.
+    """
+
+    def __init__(self, target, name):
+        self.target = target
+        self.name = name
+        self.stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._pid == os.getpid() and self._thread.is_alive()
+
+    def ensure_started(self):
+        """Start the thread unless it already runs in this process; True if it was started
+
+        Safe to call on every request.
+        """
+        if self.running:
+            return False
+        with self._lock:
+            if self.running:
+                return False
+            self.stopped.clear()
+            self._thread = threading.Thread(target=self.target, name=self.name, daemon=True)
+            self._pid = os.getpid()
+            self._thread.start()
+            return True
+
+    def stop(self):
+        self.stopped.set()
@@ -0,0 +1,175 @@
+"""
+Bar Aggregator - Rolling OHLCV bars built from the quotes the service fetches
+Every quote updates the current 1m, 5m and 1h bar of its symbol in O(1):
+each interval is a fixed-size ring indexed by bar number, so old bars are
+overwritten in place and memory per symbol is constant. The running day
+open/high/low also fill in OHLC fields a provider left out (Twelve Data's
+price endpoint, for example, reports price for all of them).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# interval -> (bar seconds, bars kept)
+BAR_INTERVALS = {
+    '1m': (60, 60),
+    '5m': (300, 48),
+    '1h': (3600, 24)
+}
+
+OPEN, HIGH, LOW, CLOSE, VOLUME = range(5)
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+
+class BarRing:
+    """Fixed-capacity ring of bars for one symbol and interval"""
+
+    __slots__ = ('step', 'capacity', 'ids', 'bars')
+
+    def __init__(self, step, capacity):
+        self.step = step
+        self.capacity = capacity
+        self.ids = np.full(capacity, -1, dtype=np.int64)  # bar number held by each slot
+        self.bars = np.zeros((capacity, len(FIELDS)))
+
+    def update(self, timestamp, price, traded):
+        bar_id = int(timestamp // self.step)
+        slot = bar_id % self.capacity
+        bar = self.bars[slot]
+        if self.ids[slot] != bar_id:
+            if self.ids[slot] > bar_id:
+                return  # Late quote for a bar that has already been overwritten
+            self.ids[slot] = bar_id
+            bar[:] = (price, price, price, price, traded)
+            return
+        if price > bar[HIGH]:
+            bar[HIGH] = price
+        elif price < bar[LOW]:
+            bar[LOW] = price
+        bar[CLOSE] = price
+        bar[VOLUME] += traded
+
+    def recent(self, limit=None, now=None):
+        """Bars still inside the ring's window, oldest first, as columnar lists"""
+        now = time.time() if now is None else now
+        newest = int(now // self.step)
+        keep = (self.ids > newest - self.capacity) & (self.ids >= 0)
+        order = np.argsort(self.ids[keep])
+        ids = self.ids[keep][order]
+        bars = self.bars[keep][order]
+        if limit:
+            ids, bars = ids[-limit:], bars[-limit:]
+        return {'t': (ids * self.step).tolist(), **{name: bars[:, i].tolist() for i, name in enumerate(FIELDS)}}
+
+
+class _SymbolBars:
+    __slots__ = ('rings', 'day', 'day_open', 'day_high', 'day_low', 'previous_close', 'last_price', 'last_volume')
+
+    def __init__(self):
+        self.rings = {interval: BarRing(step, capacity) for interval, (step, capacity) in BAR_INTERVALS.items()}
+        self.day = None
+        self.day_open = self.day_high = self.day_low = None
+        self.previous_close = None
+        self.last_price = None
+        self.last_volume = None
+
+
+class BarAggregator:
+    """Per-symbol rolling bars plus the running session open/high/low"""
+
+    def __init__(self, max_symbols=2000):
+        self.max_symbols = max_symbols
+        self._symbols = OrderedDict()
+        self._lock = threading.Lock()
+        self.updates = 0
+        self.filled = 0
+
+    def record(self, symbol, quote, timestamp=None):
+        """Fold a quote into the symbol's bars; returns the volume traded since the previous quote"""
+        price = quote.get('price')
+        if not price or price <= 0:
+            return 0
+        timestamp = time.time() if timestamp is None else timestamp
+        day = int(timestamp // 86400)
+
+        with self._lock:
+            state = self._symbols.get(symbol)
+            if state is None:
+                state = self._symbols[symbol] = _SymbolBars()
+                if len(self._symbols) > self.max_symbols:
+                    self._symbols.popitem(last=False)
+            else:
+                self._symbols.move_to_end(symbol)
+
+            if state.day != day:
+                if state.day is not None:
+                    state.previous_close = state.last_price
+                state.day = day
+                state.day_open = state.day_high = state.day_low = price
+                state.last_volume = None
+            else:
+                state.day_high = max(state.day_high, price)
+                state.day_low = min(state.day_low, price)
+
+            # Cumulative day volume from the provider; bars hold what traded since the last quote
+            volume = quote.get('volume') or 0
+            traded = volume - state.last_volume if state.last_volume is not None and volume >= state.last_volume else 0
+            state.last_volume = volume
+            state.last_price = price
+
+            for ring in state.rings.values():
+                ring.update(timestamp, price, traded)
+            self.updates += 1
+            return traded
+
+    def fill(self, symbol, quote):
+        """Fill OHLC fields the provider left empty or flat from the running session, in place"""
+        with self._lock:
+            state = self._symbols.get(symbol)
+            if state is None or state.day is None:
+                return quote
+            day_open, day_high, day_low, previous_close = state.day_open, state.day_high, state.day_low, state.previous_close
+
+        price = quote.get('price')
+        if not price:
+            return quote
+        # All equal to price means the provider only knew the last trade
+        flat = quote.get('high') == quote.get('low') == quote.get('open') == price
+        filled = False
+        if flat or not quote.get('open'):
+            quote['open'] = round(day_open, 2)
+            filled = True
+        if flat or not quote.get('high'):
+            quote['high'] = round(max(day_high, price), 2)
+            filled = True
+        if flat or not quote.get('low'):
+            quote['low'] = round(min(day_low, price), 2)
+            filled = True
+        if previous_close and (not quote.get('previousClose') or (flat and quote.get('previousClose') == price)):
+            quote['previousClose'] = round(previous_close, 2)
+            quote['change'] = round(price - previous_close, 2)
+            quote['changePercent'] = round((price - previous_close) / previous_close * 100, 2)
+            filled = True
+        if filled:
+            self.filled += 1
+        return quote
+
+    def bars(self, symbol, interval='1m', limit=None):
+        """Recent bars for symbol, or None if no quote has been seen for it"""
+        with self._lock:
+            state = self._symbols.get(symbol)
+            if state is None:
+                return None
+            return state.rings[interval].recent(limit)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'symbols': len(self._symbols),
+                'max_symbols': self.max_symbols,
+                'updates': self.updates,
+                'filled': self.filled
+            }
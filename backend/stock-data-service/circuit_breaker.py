@@ -0,0 +1,294 @@
+"""
+Circuit Breaker - Per-provider failure isolation and adaptive ordering
+Each provider gets a closed/open/half-open breaker over a sliding error-rate
+window, with exponential backoff when the provider rate limits us. Only
+errors that say the provider itself is unhealthy count against it; an
+answer about the symbol (404, "no data") means the provider is up. The
+registry also ranks providers by recent success rate and latency.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+
+import requests
+
+try:
+    import httpx
+except ImportError:  # Optional: only the async fetch engine uses it
+    httpx = None
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Errors raised before a provider could answer at all
+TRANSPORT_ERRORS = (
+    ConnectionError, TimeoutError, asyncio.TimeoutError,
+    requests.exceptions.ConnectionError, requests.exceptions.Timeout
+) + ((httpx.TransportError,) if httpx is not None else ())
+
+
+class RateLimitedError(Exception):
+    """Provider told us to slow down (HTTP 429 or an in-band rate-limit note)"""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(Exception):
+    """Call rejected without touching the provider because its breaker is open"""
+
+
+def is_rate_limited(exc):
+    """Walk the exception chain looking for a rate-limit signal"""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        if isinstance(exc, RateLimitedError):
+            return True
+        response = getattr(exc, 'response', None)
+        if response is not None and getattr(response, 'status_code', None) == 429:
+            return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+def is_provider_failure(exc):
+    """Whether an error counts against the provider's breaker
+
+    Transport errors, timeouts, HTTP 5xx and rate limits do. Anything else
+    (HTTP 4xx such as an unknown symbol, "no data" answers, unparseable
+    quotes) came from a provider that answered, so it does not.
+    """
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        if isinstance(exc, RateLimitedError):
+            return True
+        status = getattr(getattr(exc, 'response', None), 'status_code', None)
+        if status is not None:
+            return status >= 500 or status == 429
+        if isinstance(exc, TRANSPORT_ERRORS):
+            return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+def _retry_after(exc):
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        if getattr(exc, 'retry_after', None):
+            return exc.retry_after
+        exc = exc.__cause__ or exc.__context__
+    return None
+
+
+class CircuitBreaker:
+    """Sliding-window breaker for a single provider"""
+
+    def __init__(self, name, window=60, min_calls=5, failure_threshold=0.5,
+                 open_duration=30, max_open_duration=600, half_open_max_calls=1):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_threshold = failure_threshold
+        self.open_duration = open_duration
+        self.max_open_duration = max_open_duration
+        self.half_open_max_calls = half_open_max_calls
+        self._lock = threading.Lock()
+        self._outcomes = deque()  # (timestamp, ok, latency)
+        self._state = CLOSED
+        self._opened_until = 0.0
+        self._consecutive_opens = 0
+        self._half_open_in_flight = 0
+        self._latency_ewma = None
+        self.trips = 0
+        self.rejected = 0
+
+    def _prune(self, now):
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            self._outcomes.popleft()
+
+    def _open(self, now, backoff=None):
+        self._consecutive_opens += 1
+        if backoff is None:
+            backoff = self.open_duration * (2 ** (self._consecutive_opens - 1))
+        self._state = OPEN
+        self._opened_until = now + min(self.max_open_duration, backoff)
+        self._half_open_in_flight = 0
+        self.trips += 1
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now):
+        if self._state == OPEN and now >= self._opened_until:
+            self._state = HALF_OPEN
+            self._half_open_in_flight = 0
+        return self._state
+
+    def allow(self):
+        """Whether a call may go to the provider right now"""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._half_open_in_flight < self.half_open_max_calls:
+                self._half_open_in_flight += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def release(self):
+        """Give back a half-open probe slot for a call that was cancelled"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._half_open_in_flight > 0:
+                self._half_open_in_flight -= 1
+
+    def record_success(self, latency):
+        with self._lock:
+            now = time.monotonic()
+            self._outcomes.append((now, True, latency))
+            self._prune(now)
+            self._update_latency(latency)
+            if self._state == HALF_OPEN:
+                self._state = CLOSED
+                self._consecutive_opens = 0
+                self._half_open_in_flight = 0
+                self._outcomes.clear()
+
+    def record_failure(self, latency, rate_limited=False, retry_after=None):
+        with self._lock:
+            now = time.monotonic()
+            self._outcomes.append((now, False, latency))
+            self._prune(now)
+            self._update_latency(latency)
+            state = self._current_state(now)
+
+            if state == HALF_OPEN:
+                # Probe failed: back off longer before the next probe
+                self._open(now, retry_after if rate_limited else None)
+                return
+            if state == OPEN:
+                return
+            if rate_limited:
+                # The provider told us to stop; don't wait for the error rate to build up
+                self._open(now, retry_after)
+                return
+
+            calls = len(self._outcomes)
+            failures = sum(1 for _, ok, _ in self._outcomes if not ok)
+            if calls >= self.min_calls and failures / calls >= self.failure_threshold:
+                self._open(now)
+
+    def _update_latency(self, latency):
+        if latency is None:
+            return
+        if self._latency_ewma is None:
+            self._latency_ewma = latency
+        else:
+            self._latency_ewma = 0.8 * self._latency_ewma + 0.2 * latency
+
+    def success_rate(self):
+        """Success ratio over the window, or None without enough data"""
+        with self._lock:
+            self._prune(time.monotonic())
+            if not self._outcomes:
+                return None
+            return sum(1 for _, ok, _ in self._outcomes if ok) / len(self._outcomes)
+
+    def snapshot(self):
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            state = self._current_state(now)
+            calls = len(self._outcomes)
+            failures = sum(1 for _, ok, _ in self._outcomes if not ok)
+            return {
+                'state': state,
+                'calls': calls,
+                'failures': failures,
+                'success_rate': round((calls - failures) / calls, 4) if calls else None,
+                'latency_ewma': round(self._latency_ewma, 4) if self._latency_ewma is not None else None,
+                'open_for': round(max(0.0, self._opened_until - now), 1) if state == OPEN else 0,
+                'trips': self.trips,
+                'rejected': self.rejected
+            }
+
+
+class BreakerRegistry:
+    """Breakers for all providers plus success/latency based ordering"""
+
+    def __init__(self, **breaker_options):
+        self.breaker_options = breaker_options
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = CircuitBreaker(name, **self.breaker_options)
+                self._breakers[name] = breaker
+            return breaker
+
+    def allow(self, name):
+        return self.get(name).allow()
+
+    def record(self, name, latency, error=None):
+        """Record the outcome of a call made after allow() returned True
+
+        Errors that are not provider failures (see is_provider_failure) count
+        as successes: the provider answered, even if only to say it has no
+        quote for the symbol, so bad tickers cannot trip its breaker.
+        """
+        breaker = self.get(name)
+        if error is None or not is_provider_failure(error):
+            breaker.record_success(latency)
+        else:
+            breaker.record_failure(latency, rate_limited=is_rate_limited(error), retry_after=_retry_after(error))
+
+    def call(self, name, fn, *args, **kwargs):
+        """Run fn through the provider's breaker, failing fast while it is open"""
+        if not self.allow(name):
+            raise CircuitOpenError(f'Circuit open for {name}')
+        started = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.record(name, time.monotonic() - started, e)
+            raise
+        self.record(name, time.monotonic() - started)
+        return result
+
+    def order(self, names):
+        """Providers sorted best-first: open breakers last, then by success rate and latency
+
+        Scores are coarsened, and ignored until a provider has min_calls
+        outcomes, so small fluctuations keep the configured order.
+        """
+        def sort_key(item):
+            index, name = item
+            breaker = self.get(name)
+            snapshot = breaker.snapshot()
+            is_open = snapshot['state'] == OPEN
+            rate = snapshot['success_rate']
+            if rate is None or snapshot['calls'] < breaker.min_calls:
+                rate = 1.0
+            latency = snapshot['latency_ewma'] or 0.0
+            return (is_open, -round(rate, 1), round(latency * 4) / 4, index)
+
+        return [name for _, name in sorted(enumerate(names), key=sort_key)]
+
+    def snapshot(self):
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {name: breaker.snapshot() for name, breaker in breakers.items()}
@@ -0,0 +1,118 @@
+"""
+Fetch Engine - Asynchronous HTTP fan-out for quote providers
+Runs one asyncio event loop per worker process with a persistent keep-alive
+connection pool per provider, bounded per-host concurrency and total timeouts
+"""
+
+import asyncio
+import logging
+import os
+import threading
+
+import httpx
+
+from circuit_breaker import RateLimitedError
+
+logger = logging.getLogger(__name__)
+
+
+def parse_retry_after(headers):
+    """Seconds from a Retry-After header, or None if absent or not numeric"""
+    try:
+        return float(headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+class AsyncFetchEngine:
+    """Shared async HTTP client pools, driven from synchronous Flask handlers"""
+
+    def __init__(self, timeout=10, max_connections_per_host=20, provider_limits=None):
+        self.timeout = timeout
+        self.max_connections_per_host = max_connections_per_host
+        self.provider_limits = provider_limits or {}
+        self._lock = threading.Lock()
+        self._loop = None
+        self._pid = None
+        self._clients = {}
+        self._semaphores = {}
+
+    def _ensure_loop(self):
+        """Start the background loop lazily so each forked worker gets its own"""
+        with self._lock:
+            if self._loop is not None and self._pid == os.getpid():
+                return self._loop
+
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name='fetch-engine', daemon=True)
+            thread.start()
+            self._loop = loop
+            self._pid = os.getpid()
+            self._clients = {}
+            self._semaphores = {}
+            return loop
+
+    def _limit(self, provider):
+        return self.provider_limits.get(provider, self.max_connections_per_host)
+
+    def _client(self, provider):
+        client = self._clients.get(provider)
+        if client is None:
+            limit = self._limit(provider)
+            client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=limit, max_keepalive_connections=limit),
+                follow_redirects=True
+            )
+            self._clients[provider] = client
+        return client
+
+    def _semaphore(self, provider):
+        semaphore = self._semaphores.get(provider)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self._limit(provider))
+            self._semaphores[provider] = semaphore
+        return semaphore
+
+    async def get_json(self, provider, url, params=None, headers=None):
+        """GET a JSON document through the provider's pooled client"""
+        async with self._semaphore(provider):
+            response = await self._client(provider).get(url, params=params, headers=headers)
+
+        if response.status_code == 429:
+            raise RateLimitedError(f'Rate limited by {provider}', retry_after=parse_retry_after(response.headers))
+        response.raise_for_status()
+        return response.json()
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the engine loop and block for its result
+
+        timeout bounds the whole operation; on expiry the coroutine is
+        cancelled and TimeoutError is raised.
+        """
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def close(self):
+        with self._lock:
+            loop = self._loop
+            if loop is None or self._pid != os.getpid():
+                return
+
+            async def _close_clients():
+                for client in self._clients.values():
+                    await client.aclose()
+
+            try:
+                asyncio.run_coroutine_threadsafe(_close_clients(), loop).result(5)
+            except Exception as e:
+                logger.warning(f"Error closing fetch engine clients: {e}")
+            loop.call_soon_threadsafe(loop.stop)
+            self._loop = None
+            self._clients = {}
+            self._semaphores = {}
@@ -0,0 +1,156 @@
+"""
+Hedging - Latency-aware racing across quote providers
+Per-provider latency histograms feed a p95-based hedge delay: the primary
+provider starts first, the next one is launched if it has not answered
+within that delay, and the first valid quote wins
+"""
+
+import asyncio
+import bisect
+import threading
+
+# Bucket upper bounds in seconds, roughly log-spaced from 10ms to 30s
+LATENCY_BUCKETS = (
+    0.01, 0.025, 0.05, 0.075, 0.1, 0.15, 0.2, 0.3, 0.4, 0.5, 0.75,
+    1.0, 1.5, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 30.0
+)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram that decays so it tracks recent behaviour"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS, decay_every=1000):
+        self.buckets = buckets
+        self.decay_every = decay_every
+        self._counts = [0] * (len(buckets) + 1)
+        self._since_decay = 0
+        self._lock = threading.Lock()
+        self.observations = 0
+
+    def observe(self, seconds):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self.observations += 1
+            self._since_decay += 1
+            if self._since_decay >= self.decay_every:
+                # Halve every bucket so old samples fade out
+                self._counts = [count // 2 for count in self._counts]
+                self._since_decay = 0
+
+    def count(self):
+        with self._lock:
+            return sum(self._counts)
+
+    def percentile(self, q):
+        """Upper bound of the bucket containing the q-th percentile, or None if empty"""
+        with self._lock:
+            total = sum(self._counts)
+            if total == 0:
+                return None
+            target = total * q / 100.0
+            running = 0
+            for index, count in enumerate(self._counts):
+                running += count
+                if running >= target:
+                    return self.buckets[index] if index < len(self.buckets) else self.buckets[-1] * 2
+        return None
+
+    def snapshot(self):
+        return {
+            'observations': self.observations,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99)
+        }
+
+
+class ProviderLatency:
+    """Latency histograms per provider and the hedge delay derived from them"""
+
+    def __init__(self, percentile=95, min_delay=0.05, max_delay=2.0, default_delay=0.5, min_samples=20):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.default_delay = default_delay
+        self.min_samples = min_samples
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, provider):
+        with self._lock:
+            histogram = self._histograms.get(provider)
+            if histogram is None:
+                histogram = LatencyHistogram()
+                self._histograms[provider] = histogram
+            return histogram
+
+    def observe(self, provider, seconds):
+        self.histogram(provider).observe(seconds)
+
+    def hedge_delay(self, provider):
+        """How long to wait on provider before launching the next one"""
+        histogram = self.histogram(provider)
+        if histogram.count() < self.min_samples:
+            return self.default_delay
+        delay = histogram.percentile(self.percentile)
+        return min(self.max_delay, max(self.min_delay, delay))
+
+    def snapshot(self):
+        with self._lock:
+            providers = dict(self._histograms)
+        return {
+            provider: {**histogram.snapshot(), 'hedge_delay': self.hedge_delay(provider)}
+            for provider, histogram in providers.items()
+        }
+
+
+async def hedged_race(providers, fetch, hedge_delay, is_valid):
+    """Race providers in order, hedging after each one's delay
+
+    fetch(provider) is a coroutine returning a quote; hedge_delay(provider)
+    gives the seconds to wait before launching the next provider. When every
+    in-flight provider has failed, the next one starts immediately. Returns
+    (provider, result) for the first valid result and cancels the rest.
+    """
+    remaining = list(providers)
+    pending = {}
+    errors = []
+
+    def launch():
+        provider = remaining.pop(0)
+        pending[asyncio.ensure_future(fetch(provider))] = provider
+        return provider
+
+    if not remaining:
+        raise Exception('No providers to try')
+
+    last_launched = launch()
+    try:
+        while pending:
+            timeout = hedge_delay(last_launched) if remaining else None
+            done, _ = await asyncio.wait(pending.keys(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+            if not done:
+                # Slowest-case hedge: primary is past its p95, start the next provider
+                last_launched = launch()
+                continue
+
+            for task in done:
+                provider = pending.pop(task)
+                try:
+                    result = task.result()
+                except Exception as e:
+                    errors.append(f"{provider}: {e}")
+                    continue
+                if is_valid(result):
+                    return provider, result
+                errors.append(f"{provider}: invalid result")
+
+            if remaining and len(pending) == 0:
+                last_launched = launch()
+    finally:
+        for task in pending:
+            task.cancel()
+
+    raise Exception(f"All providers failed: {'; '.join(errors)}")
@@ -0,0 +1,278 @@
+"""
+History Store - On-disk OHLCV bars per symbol in columnar segments
+Every fetched quote updates the 1-minute bar it falls in. Bars live in
+fixed-size segment files (.npy, one row per column, one slot per bar), so
+writes are in-place updates of a memory-mapped slot and reads only touch
+the pages of the requested range. A compaction job rolls minute bars up
+into hourly and daily bars and drops minute segments past their retention.
+
+Layout: <root>/<interval>/<symbol>/<segment>.npy where segment is the
+bar timestamp divided by the interval's segment span. One process should
+write a given root at a time.
+"""
+
+import logging
+import math
+import os
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from background import BackgroundThread
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = ('open', 'high', 'low', 'close', 'volume', 'count')
+OPEN, HIGH, LOW, CLOSE, VOLUME, COUNT = range(len(COLUMNS))
+
+# interval -> (bar seconds, segment span seconds); spans nest so a day never straddles two segments
+INTERVALS = {
+    '1m': (60, 86400),
+    '1h': (3600, 86400 * 30),
+    '1d': (86400, 86400 * 360)
+}
+
+# Ticker characters (BRK.B, ^GSPC, EURUSD=X, BRK/B); '/' is stored as '_'
+SYMBOL_PATTERN = re.compile(r'[A-Za-z0-9.^=/-]+')
+
+
+def valid_symbol(symbol):
+    """Whether symbol can name a segment directory: ticker characters only, never '.' or '..'"""
+    return bool(SYMBOL_PATTERN.fullmatch(symbol)) and symbol.strip('.') != ''
+
+
+def _symbol_dir(symbol):
+    if not valid_symbol(symbol):
+        raise ValueError(f"Invalid symbol {symbol!r}")
+    # Symbols like BRK/B must stay a single path component
+    return symbol.replace('/', '_')
+
+
+def rollup(bars, factor):
+    """Aggregate (len(COLUMNS), n) bars into (len(COLUMNS), n // factor) coarser bars"""
+    grouped = bars.reshape(len(COLUMNS), -1, factor)
+    valid = grouped[COUNT] > 0
+    any_valid = valid.any(axis=1)
+    first = valid.argmax(axis=1)
+    last = factor - 1 - valid[:, ::-1].argmax(axis=1)
+    rows = np.arange(grouped.shape[1])
+
+    out = np.zeros((len(COLUMNS), grouped.shape[1]))
+    out[OPEN] = grouped[OPEN][rows, first]
+    out[CLOSE] = grouped[CLOSE][rows, last]
+    out[HIGH] = np.where(valid, grouped[HIGH], -np.inf).max(axis=1)
+    out[LOW] = np.where(valid, grouped[LOW], np.inf).min(axis=1)
+    out[VOLUME] = grouped[VOLUME].sum(axis=1)
+    out[COUNT] = grouped[COUNT].sum(axis=1)
+    out[:, ~any_valid] = 0
+    return out
+
+
+class HistoryStore:
+    """Memory-mapped OHLCV segments with minute-resolution writes"""
+
+    def __init__(self, root, max_open_segments=256):
+        self.root = root
+        self.max_open_segments = max_open_segments
+        self._open = OrderedDict()  # (interval, symbol, segment) -> writable memmap
+        self._last_volume = {}  # symbol -> last cumulative volume seen
+        self._dirty = set()  # (symbol, day) with minute bars not yet rolled up
+        self._lock = threading.Lock()
+        self.writes = 0
+
+    def _path(self, interval, symbol, segment):
+        return os.path.join(self.root, interval, _symbol_dir(symbol), f"{segment}.npy")
+
+    def _segment(self, interval, symbol, segment):
+        """Writable memmap for a segment, created zero-filled on first use"""
+        key = (interval, symbol, segment)
+        array = self._open.get(key)
+        if array is not None:
+            self._open.move_to_end(key)
+            return array
+
+        path = self._path(interval, symbol, segment)
+        if os.path.exists(path):
+            array = np.load(path, mmap_mode='r+')
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            step, span = INTERVALS[interval]
+            array = np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=(len(COLUMNS), span // step))
+        self._open[key] = array
+        while len(self._open) > self.max_open_segments:
+            _, evicted = self._open.popitem(last=False)
+            evicted.flush()
+        return array
+
+    def record(self, symbol, quote, timestamp=None):
+        """Fold a quote into its minute bar"""
+        price = quote.get('price')
+        if not price or price <= 0:
+            return
+        timestamp = time.time() if timestamp is None else timestamp
+        step, span = INTERVALS['1m']
+        segment, offset = divmod(int(timestamp), span)
+        slot = offset // step
+
+        with self._lock:
+            bars = self._segment('1m', symbol, segment)
+            # Providers report cumulative day volume; bars hold what traded since the last quote
+            volume = quote.get('volume') or 0
+            previous = self._last_volume.get(symbol)
+            traded = volume - previous if previous is not None and volume >= previous else 0
+            self._last_volume[symbol] = volume
+
+            if bars[COUNT, slot] == 0:
+                bars[OPEN, slot] = bars[HIGH, slot] = bars[LOW, slot] = price
+            else:
+                bars[HIGH, slot] = max(bars[HIGH, slot], price)
+                bars[LOW, slot] = min(bars[LOW, slot], price)
+            bars[CLOSE, slot] = price
+            bars[VOLUME, slot] += traded
+            bars[COUNT, slot] += 1
+            self._dirty.add((symbol, segment))
+            self.writes += 1
+
+    def query(self, symbol, start, end, interval='1m'):
+        """Bars with start <= t < end as columnar lists: {'t': [...], 'open': [...], ...}"""
+        if not (math.isfinite(start) and math.isfinite(end)):
+            raise ValueError('start and end must be finite')
+        step, span = INTERVALS[interval]
+        start = int(start) // step * step
+        end = int(end)
+        times = []
+        columns = {name: [] for name in COLUMNS[:COUNT]}
+
+        for segment in range(start // span, (max(end - 1, start)) // span + 1):
+            path = self._path(interval, symbol, segment)
+            if not os.path.exists(path):
+                continue
+            # Read-only mapping: only the pages for the requested slots are read
+            bars = np.load(path, mmap_mode='r')
+            base = segment * span
+            first = max(start, base) - base
+            last = min(end, base + span) - base
+            lo, hi = first // step, -(-last // step)
+            window = np.asarray(bars[:, lo:hi])
+            present = np.nonzero(window[COUNT] > 0)[0]
+            if not len(present):
+                continue
+            times.extend((base + (lo + present) * step).tolist())
+            for index, name in enumerate(COLUMNS[:COUNT]):
+                columns[name].extend(window[index, present].tolist())
+
+        return {'t': times, **columns}
+
+    def compact(self, retention_days=30):
+        """Roll dirty minute segments up into hourly and daily bars; drop expired minute segments"""
+        with self._lock:
+            dirty = list(self._dirty)
+            self._dirty.clear()
+            for array in self._open.values():
+                array.flush()
+
+        hour_step, hour_span = INTERVALS['1h']
+        day_step, day_span = INTERVALS['1d']
+        for symbol, day in dirty:
+            path = self._path('1m', symbol, day)
+            if not os.path.exists(path):
+                continue
+            minutes = np.array(np.load(path, mmap_mode='r'))
+            hours = rollup(minutes, 60)
+            daily = rollup(hours, 24)
+
+            day_start = day * INTERVALS['1m'][1]
+            with self._lock:
+                hourly_segment = self._segment('1h', symbol, day_start // hour_span)
+                slot = day_start % hour_span // hour_step
+                hourly_segment[:, slot:slot + 24] = hours
+
+                daily_segment = self._segment('1d', symbol, day_start // day_span)
+                slot = day_start % day_span // day_step
+                daily_segment[:, slot:slot + 1] = daily
+
+        removed = self._expire(retention_days) if retention_days else 0
+        with self._lock:
+            for array in self._open.values():
+                array.flush()
+        return len(dirty), removed
+
+    def _expire(self, retention_days):
+        minute_root = os.path.join(self.root, '1m')
+        if not os.path.isdir(minute_root):
+            return 0
+        oldest = int(time.time() // INTERVALS['1m'][1]) - retention_days
+        removed = 0
+        for symbol_dir in os.listdir(minute_root):
+            directory = os.path.join(minute_root, symbol_dir)
+            for name in os.listdir(directory):
+                segment = name[:-len('.npy')]
+                if not segment.isdigit() or int(segment) >= oldest:
+                    continue
+                with self._lock:
+                    for key in [key for key in self._open if key[0] == '1m' and key[2] == int(segment)]:
+                        if _symbol_dir(key[1]) == symbol_dir:
+                            del self._open[key]
+                os.remove(os.path.join(directory, name))
+                removed += 1
+            if not os.listdir(directory):
+                shutil.rmtree(directory, ignore_errors=True)
+        return removed
+
+    def stats(self):
+        with self._lock:
+            return {
+                'root': self.root,
+                'open_segments': len(self._open),
+                'pending_compaction': len(self._dirty),
+                'writes': self.writes
+            }
+
+
+class HistoryCompactor:
+    """Background thread that periodically compacts a HistoryStore"""
+
+    def __init__(self, store, interval=300, retention_days=30):
+        self.store = store
+        self.interval = interval
+        self.retention_days = retention_days
+        self._worker = BackgroundThread(self._run, 'history-compactor')
+        self.runs = 0
+        self.errors = 0
+        self.last_run_duration = None
+
+    def ensure_started(self):
+        if self._worker.ensure_started():
+            logger.info(f"🗜️ History compactor started (every {self.interval}s)")
+
+    def stop(self):
+        self._worker.stop()
+
+    def run_once(self):
+        started = time.monotonic()
+        try:
+            rolled, removed = self.store.compact(self.retention_days)
+            self.runs += 1
+            return rolled, removed
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"History compaction failed: {e}")
+            return 0, 0
+        finally:
+            self.last_run_duration = round(time.monotonic() - started, 3)
+
+    def _run(self):
+        while not self._worker.stopped.wait(self.interval):
+            self.run_once()
+
+    def stats(self):
+        return {
+            'running': self._worker.running,
+            'runs': self.runs,
+            'errors': self.errors,
+            'last_run_duration': self.last_run_duration
+        }
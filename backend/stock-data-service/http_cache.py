@@ -0,0 +1,146 @@
+"""
+HTTP Cache - Conditional and compressed JSON responses
+Responses carry a content-hash ETag per encoding so polling clients get a
+304 when nothing changed; per-request fields (cacheAge, timestamp) are left
+out of the hash, and such ETags are weak. Bodies are compressed with brotli
+or gzip as the client prefers and cached by content hash and encoding, so a
+payload served to many clients is only compressed once.
+"""
+
+import gzip
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only without the native module
+    brotli = None
+
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+# Fields that change on every response for the same quote: the age of a stale
+# cache entry and the generation time of mock quotes. Bodies are compact JSON.
+VOLATILE_FIELDS = re.compile(rb'"(?:cacheAge|timestamp)":(?:"[^"]*"|[-+.0-9eE]+)')
+
+
+def content_etag(body):
+    """Strong ETag value (unquoted, as Response.set_etag expects) derived from the response bytes"""
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def validator_etag(body):
+    """(etag, weak) for body: the content hash, or a weak hash of body without its volatile fields"""
+    stable, stripped = VOLATILE_FIELDS.subn(b'', body)
+    if not stripped:
+        return content_etag(body), False
+    return content_etag(stable), True
+
+
+class CompressedBodyCache:
+    """LRU of compressed bodies keyed by (content hash, encoding), bounded by total bytes"""
+
+    def __init__(self, max_bytes=8 * 1024 * 1024, min_size=512, gzip_level=6, brotli_quality=5):
+        self.max_bytes = max_bytes
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def _compress(self, body, encoding):
+        if encoding == 'br':
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    def get(self, etag, encoding, body):
+        """Compressed body for etag, compressing and caching it on first use"""
+        key = (etag, encoding)
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if compressed is None:
+            compressed = self._compress(body, encoding)
+            with self._lock:
+                self.misses += 1
+                if key not in self._entries:
+                    self._entries[key] = compressed
+                    self._bytes += len(compressed)
+                while self._entries and self._bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= len(evicted)
+        with self._lock:
+            self.bytes_in += len(body)
+            self.bytes_out += len(compressed)
+        return compressed
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'encodings': list(ENCODINGS),
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'compression_ratio': round(self.bytes_out / self.bytes_in, 4) if self.bytes_in else None
+            }
+
+
+class ConditionalResponder:
+    """Builds JSON responses with ETags, If-None-Match handling and content negotiation"""
+
+    def __init__(self, body_cache=None):
+        self.body_cache = body_cache or CompressedBodyCache()
+        self.not_modified = 0
+        self.full = 0
+
+    def respond(self, request, body, etag=None):
+        """Response for serialized JSON bytes; 304 for a GET/HEAD whose If-None-Match matches
+
+        etag, if given, is used as is; otherwise it is derived by validator_etag.
+        """
+        weak = False
+        if etag is None:
+            etag, weak = validator_etag(body)
+        encoding = None
+        if len(body) >= self.body_cache.min_size:
+            encoding = request.accept_encodings.best_match(ENCODINGS)
+
+        # Each encoding is its own representation, so it gets its own ETag
+        variant = f"{etag}-{encoding}" if encoding else etag
+        response = Response(mimetype='application/json')
+        response.set_etag(variant, weak=weak)
+        response.headers['Cache-Control'] = 'no-cache'
+        response.vary.add('Accept-Encoding')
+
+        if request.method in ('GET', 'HEAD') and request.if_none_match.contains_weak(variant):
+            self.not_modified += 1
+            response.status_code = 304
+            return response
+
+        if encoding:
+            # A weak ETag covers bodies that differ in their volatile fields, so it can't key the cache
+            body = self.body_cache.get(content_etag(body) if weak else etag, encoding, body)
+            response.content_encoding = encoding
+        response.set_data(body)
+        self.full += 1
+        return response
+
+    def stats(self):
+        return {
+            'not_modified': self.not_modified,
+            'full': self.full,
+            'compression': self.body_cache.stats()
+        }
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Mock Provider Server - Offline stand-in for the upstream quote APIs
+Serves Yahoo Finance, Twelve Data and Finnhub response shapes (including the
+multi-symbol batch endpoints) from deterministic fake prices, so the service
+can be exercised without network access or API keys.
+
+Usage:
+    python mock_provider_server.py --port 8765 --latency-ms 50
+
+    YAHOO_FINANCE_BASE_URL=http://localhost:8765/yahoo \\
+    TWELVE_DATA_BASE_URL=http://localhost:8765/twelvedata \\
+    FINNHUB_BASE_URL=http://localhost:8765/finnhub/api/v1 \\
+    python app.py
+
+GET /__stats returns request counts per path; POST /__reset clears them.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def fake_quote(symbol):
+    """Stable per-symbol price with a small per-minute wiggle"""
+    seed = zlib.crc32(symbol.encode())
+    base = 20 + seed % 480
+    minute = int(time.time() // 60)
+    wiggle = (zlib.crc32(f"{symbol}:{minute}".encode()) % 200 - 100) / 100
+    price = round(base + wiggle, 2)
+    previous_close = float(base)
+    return {
+        'price': price,
+        'change': round(price - previous_close, 2),
+        'changePercent': round((price - previous_close) / previous_close * 100, 4),
+        'open': previous_close,
+        'high': round(max(price, previous_close) + 0.5, 2),
+        'low': round(min(price, previous_close) - 0.5, 2),
+        'volume': 100000 + seed % 900000,
+        'previousClose': previous_close
+    }
+
+
+class MockProviderHandler(BaseHTTPRequestHandler):
+    latency = 0.0
+    fail_rate = 0.0
+    fail_paths = set()  # paths that always answer 503, e.g. a batch endpoint
+    unknown_symbols = set()
+    stats = {}
+    stats_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _known(self, symbols):
+        return [symbol for symbol in symbols if symbol and symbol not in self.unknown_symbols]
+
+    def do_POST(self):
+        if self.path == '/__reset':
+            with self.stats_lock:
+                self.stats.clear()
+            return self._send(200, {'reset': True})
+        return self._send(404, {'error': 'not found'})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if url.path == '/__stats':
+            with self.stats_lock:
+                return self._send(200, dict(self.stats))
+
+        with self.stats_lock:
+            self.stats[url.path] = self.stats.get(url.path, 0) + 1
+
+        if self.latency:
+            time.sleep(self.latency)
+        if url.path in self.fail_paths or (self.fail_rate and random.random() < self.fail_rate):
+            return self._send(503, {'error': 'injected failure'})
+
+        if url.path.startswith('/yahoo/v8/finance/chart/'):
+            symbol = url.path.rsplit('/', 1)[-1]
+            if not self._known([symbol]):
+                return self._send(200, {'chart': {'result': None, 'error': {'code': 'Not Found'}}})
+            quote = fake_quote(symbol)
+            return self._send(200, {'chart': {'result': [{'meta': {
+                'symbol': symbol,
+                'regularMarketPrice': quote['price'],
+                'regularMarketChange': quote['change'],
+                'regularMarketChangePercent': quote['changePercent'] / 100,
+                'regularMarketOpen': quote['open'],
+                'regularMarketDayHigh': quote['high'],
+                'regularMarketDayLow': quote['low'],
+                'regularMarketVolume': quote['volume'],
+                'previousClose': quote['previousClose']
+            }}], 'error': None}})
+
+        if url.path == '/yahoo/v7/finance/quote':
+            symbols = self._known(query.get('symbols', '').split(','))
+            result = []
+            for symbol in symbols:
+                quote = fake_quote(symbol)
+                result.append({
+                    'symbol': symbol,
+                    'regularMarketPrice': quote['price'],
+                    'regularMarketChange': quote['change'],
+                    'regularMarketChangePercent': quote['changePercent'],
+                    'regularMarketOpen': quote['open'],
+                    'regularMarketDayHigh': quote['high'],
+                    'regularMarketDayLow': quote['low'],
+                    'regularMarketVolume': quote['volume'],
+                    'regularMarketPreviousClose': quote['previousClose']
+                })
+            return self._send(200, {'quoteResponse': {'result': result, 'error': None}})
+
+        if url.path == '/twelvedata/price':
+            symbol = query.get('symbol', '')
+            if not self._known([symbol]):
+                return self._send(200, {'code': 400, 'message': f'**symbol** {symbol} not found', 'status': 'error'})
+            return self._send(200, {'price': str(fake_quote(symbol)['price'])})
+
+        if url.path == '/twelvedata/quote':
+            requested = [symbol for symbol in query.get('symbol', '').split(',') if symbol]
+            quotes = {}
+            for symbol in requested:
+                if symbol in self.unknown_symbols:
+                    quotes[symbol] = {'code': 400, 'message': f'**symbol** {symbol} not found', 'status': 'error'}
+                    continue
+                quote = fake_quote(symbol)
+                quotes[symbol] = {
+                    'symbol': symbol,
+                    'open': str(quote['open']),
+                    'high': str(quote['high']),
+                    'low': str(quote['low']),
+                    'close': str(quote['price']),
+                    'volume': str(quote['volume']),
+                    'previous_close': str(quote['previousClose']),
+                    'change': str(quote['change']),
+                    'percent_change': str(quote['changePercent'])
+                }
+            if len(requested) == 1:
+                return self._send(200, quotes[requested[0]])
+            return self._send(200, quotes)
+
+        if url.path == '/finnhub/api/v1/quote':
+            symbol = query.get('symbol', '')
+            if not self._known([symbol]):
+                return self._send(200, {'c': 0, 'd': None, 'dp': None, 'h': 0, 'l': 0, 'o': 0, 'pc': 0})
+            quote = fake_quote(symbol)
+            return self._send(200, {
+                'c': quote['price'], 'd': quote['change'], 'dp': quote['changePercent'],
+                'h': quote['high'], 'l': quote['low'], 'o': quote['open'], 'pc': quote['previousClose']
+            })
+
+        return self._send(404, {'error': 'not found'})
+
+
+def start_server(port=0, latency_ms=0, fail_rate=0.0, unknown_symbols=(), fail_paths=()):
+    """Start the mock server on a background thread; returns (server, base_url)"""
+    MockProviderHandler.latency = latency_ms / 1000
+    MockProviderHandler.fail_rate = fail_rate
+    MockProviderHandler.fail_paths = set(fail_paths)
+    MockProviderHandler.unknown_symbols = set(unknown_symbols)
+    server = ThreadingHTTPServer(('127.0.0.1', port), MockProviderHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='mock-provider-server', daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Offline mock of the upstream quote providers')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--fail-rate', type=float, default=0.0)
+    parser.add_argument('--unknown', default='', help='Comma-separated symbols to treat as not found')
+    parser.add_argument('--fail-paths', default='', help='Comma-separated paths that always return 503')
+    args = parser.parse_args()
+
+    server, base_url = start_server(args.port, args.latency_ms, args.fail_rate,
+                                    [s for s in args.unknown.split(',') if s],
+                                    [p for p in args.fail_paths.split(',') if p])
+    print(f"🧪 Mock providers on {base_url} (yahoo: /yahoo, twelve data: /twelvedata, finnhub: /finnhub/api/v1)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
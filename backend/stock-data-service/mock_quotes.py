@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Mock Quotes - Vectorized synthetic quotes for fallbacks and load tests
+Generates quotes for thousands of symbols in one NumPy pass. Each symbol
+follows a random-walk path through the regular trading session that is
+deterministic per symbol and minute: the per-minute shocks come from a
+counter-based hash of (symbol seed, trading day, minute), so every worker
+and pod produces the same numbers without sharing any state.
+
+mock_quote(symbol) is the per-call equivalent for single-symbol fallbacks:
+it precomputes a symbol's whole session path once per day, so later calls
+are a lookup and agree exactly with generate_quotes.
+
+Usage (benchmark):
+    python mock_quotes.py --symbols 5000 --repeat 5
+"""
+
+import argparse
+import hashlib
+import time
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+
+# Regular session in minutes of the UTC day (09:30-16:00 New York, DST not modelled)
+SESSION_OPEN_MINUTE = 13 * 60 + 30
+SESSION_MINUTES = 390
+
+# Symbols per NumPy pass; bounds the (symbols x minutes) working set to a few MB
+CHUNK_SIZE = 1024
+
+# Reference price and daily volatility for well-known symbols; others are derived from the seed
+PROFILES = {
+    'AAPL': (178.23, 0.016), 'MSFT': (378.45, 0.015), 'GOOGL': (145.67, 0.018), 'TSLA': (234.56, 0.035),
+    'NVDA': (168.45, 0.03), 'AMZN': (145.32, 0.02), 'META': (320.15, 0.024), 'NFLX': (425.67, 0.022),
+    'AMD': (98.45, 0.03), 'INTC': (45.67, 0.02), 'SPY': (415.23, 0.009), 'QQQ': (365.45, 0.012),
+    'DIA': (340.12, 0.008), 'BTC-USD': (45000.00, 0.03), 'ETH-USD': (3200.00, 0.04)
+}
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_DAY_SALT = np.uint64(0xD1B54A32D192ED03)
+_MINUTE_SALT = np.uint64(0x8CB92BA72F3D8DD7)
+# Minute slots reserved for per-day draws (previous close, opening gap, volume)
+_PREV_CLOSE_SLOT = 1 << 20
+_GAP_SLOT = _PREV_CLOSE_SLOT + 1
+_VOLUME_SLOT = _PREV_CLOSE_SLOT + 2
+
+
+@lru_cache(maxsize=65536)
+def symbol_profile(symbol):
+    """(seed, base price, daily volatility, average daily volume) for a symbol"""
+    # blake2b rather than hash(): str hashes are salted per process (PYTHONHASHSEED)
+    seed = int.from_bytes(hashlib.blake2b(symbol.encode(), digest_size=8).digest(), 'little')
+    base, volatility = PROFILES.get(symbol, (20 + seed % 480 + (seed >> 9) % 100 / 100, 0.01 + (seed >> 16) % 30 / 1000))
+    volume = 500_000 + (seed >> 4) % 20_000_000
+    return seed, base, volatility, volume
+
+
+def _splitmix64(x):
+    """Finalizer of the SplitMix64 generator; uint64 arithmetic wraps as intended"""
+    with np.errstate(over='ignore'):
+        x = x + _GOLDEN
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+
+def _normals(seeds, day, minutes):
+    """Standard normal draws shaped (len(seeds), len(minutes)), fixed per (seed, day, minute)"""
+    with np.errstate(over='ignore'):
+        keys = (seeds[:, None] * _GOLDEN) ^ (np.uint64(day) * _DAY_SALT) ^ (minutes[None, :] * _MINUTE_SALT)
+    bits = _splitmix64(keys)
+    # Box-Muller on the two 32-bit halves; u1 is kept in (0, 1] so the log is finite
+    u1 = ((bits >> np.uint64(32)).astype(np.float64) + 1.0) / 4294967296.0
+    u2 = (bits & np.uint64(0xFFFFFFFF)).astype(np.float64) / 4294967296.0
+    return np.sqrt(-2.0 * np.log(u1)) * np.cos(2.0 * np.pi * u2)
+
+
+def session_position(now):
+    """(trading day number, minutes elapsed in the session) for a Unix timestamp"""
+    day = int(now // 86400)
+    minute_of_day = int(now % 86400 // 60)
+    return day, min(max(minute_of_day - SESSION_OPEN_MINUTE, 0), SESSION_MINUTES)
+
+
+def generate_arrays(symbols, now=None):
+    """Quote fields for every symbol as NumPy arrays aligned with symbols"""
+    now = time.time() if now is None else now
+    day, elapsed = session_position(now)
+    count = len(symbols)
+    out = {field: np.empty(count) for field in ('price', 'open', 'high', 'low', 'previousClose', 'volume')}
+
+    profiles = [symbol_profile(symbol) for symbol in symbols]
+    seeds = np.fromiter((p[0] for p in profiles), dtype=np.uint64, count=count)
+    bases = np.fromiter((p[1] for p in profiles), dtype=np.float64, count=count)
+    volatilities = np.fromiter((p[2] for p in profiles), dtype=np.float64, count=count)
+    volumes = np.fromiter((p[3] for p in profiles), dtype=np.float64, count=count)
+
+    daily = np.array([_PREV_CLOSE_SLOT, _GAP_SLOT, _VOLUME_SLOT], dtype=np.uint64)
+    minutes = np.arange(1, elapsed + 1, dtype=np.uint64)
+    step_scale = 1 / np.sqrt(SESSION_MINUTES)
+
+    for start in range(0, count, CHUNK_SIZE):
+        part = slice(start, start + CHUNK_SIZE)
+        vol = volatilities[part]
+        day_draws = _normals(seeds[part], day, daily)
+
+        # Previous close wanders around the reference price from day to day; the open gaps from it
+        previous_close = bases[part] * np.exp(np.clip(2 * vol * day_draws[:, 0], -0.25, 0.25))
+        open_price = previous_close * np.exp(0.3 * vol * day_draws[:, 1])
+
+        if elapsed:
+            steps = _normals(seeds[part], day, minutes) * (vol * step_scale)[:, None]
+            path = np.exp(np.cumsum(steps, axis=1))
+            price = open_price * path[:, -1]
+            high = open_price * np.maximum(path.max(axis=1), 1.0)
+            low = open_price * np.minimum(path.min(axis=1), 1.0)
+        else:
+            price = high = low = open_price
+
+        # Cumulative volume grows through the session
+        progress = 0.05 + 0.95 * elapsed / SESSION_MINUTES
+        out['volume'][part] = volumes[part] * progress * np.exp(0.25 * day_draws[:, 2])
+        out['price'][part] = price
+        out['open'][part] = open_price
+        out['high'][part] = high
+        out['low'][part] = low
+        out['previousClose'][part] = previous_close
+
+    out['change'] = out['price'] - out['previousClose']
+    out['changePercent'] = out['change'] / out['previousClose'] * 100
+    return out
+
+
+def generate_quotes(symbols, now=None):
+    """{symbol: quote} in the same shape as the providers' quotes, for any number of symbols"""
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return {}
+    arrays = generate_arrays(symbols, now)
+    columns = {field: np.round(arrays[field], 2).tolist() for field in ('price', 'open', 'high', 'low', 'previousClose')}
+    volumes = arrays['volume'].astype(np.int64).tolist()
+    timestamp = datetime.now().isoformat()
+
+    return {
+        symbol: _quote(
+            symbol, columns['price'][i], columns['previousClose'][i], columns['open'][i],
+            columns['high'][i], columns['low'][i], volumes[i], timestamp
+        )
+        for i, symbol in enumerate(symbols)
+    }
+
+
+def _quote(symbol, price, previous_close, open_price, high, low, volume, timestamp):
+    # Change is taken from the rounded prices so the displayed numbers add up
+    change = price - previous_close
+    return {
+        'symbol': symbol,
+        'price': price,
+        'change': round(change, 2),
+        'changePercent': round(change / previous_close * 100, 2),
+        'volume': volume,
+        'high': high,
+        'low': low,
+        'open': open_price,
+        'previousClose': previous_close,
+        'timestamp': timestamp,
+        'dataSource': 'enhanced-mock',
+        'isRealTime': False
+    }
+
+
+@lru_cache(maxsize=1024)
+def _session_path(symbol, day):
+    """A symbol's full session for one day: (previous close, open, volume, volume factor, prices, highs, lows)
+
+    prices[m], highs[m] and lows[m] are the price and running extremes after
+    m minutes, computed exactly as generate_arrays does.
+    """
+    seed, base, vol, volume = symbol_profile(symbol)
+    seeds = np.array([seed], dtype=np.uint64)
+    day_draws = _normals(seeds, day, np.array([_PREV_CLOSE_SLOT, _GAP_SLOT, _VOLUME_SLOT], dtype=np.uint64))[0]
+    previous_close = base * np.exp(np.clip(2 * vol * day_draws[0], -0.25, 0.25))
+    open_price = previous_close * np.exp(0.3 * vol * day_draws[1])
+
+    minutes = np.arange(1, SESSION_MINUTES + 1, dtype=np.uint64)
+    steps = _normals(seeds, day, minutes)[0] * (vol / np.sqrt(SESSION_MINUTES))
+    path = np.concatenate(([1.0], np.exp(np.cumsum(steps))))
+    prices = open_price * path
+    highs = open_price * np.maximum.accumulate(path)
+    lows = open_price * np.minimum.accumulate(path)
+    return (
+        float(np.round(previous_close, 2)), float(np.round(open_price, 2)), float(volume), float(np.exp(0.25 * day_draws[2])),
+        np.round(prices, 2).tolist(), np.round(highs, 2).tolist(), np.round(lows, 2).tolist()
+    )
+
+
+def mock_quote(symbol, now=None):
+    """Single-symbol mock quote, identical across processes and to generate_quotes for the same minute"""
+    now = time.time() if now is None else now
+    day, elapsed = session_position(now)
+    previous_close, open_price, volume, volume_factor, prices, highs, lows = _session_path(symbol, day)
+    return _quote(
+        symbol, prices[elapsed], previous_close, open_price, highs[elapsed], lows[elapsed],
+        int(volume * (0.05 + 0.95 * elapsed / SESSION_MINUTES) * volume_factor), datetime.now().isoformat()
+    )
+
+
+def synthetic_symbols(count):
+    """Ticker-like symbols for load tests"""
+    return [f"SYM{i:05d}" for i in range(count)]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the vectorized mock quote generator')
+    parser.add_argument('--symbols', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--minute', type=int, default=SESSION_MINUTES, help='Session minute to simulate (0-390)')
+    args = parser.parse_args()
+
+    symbols = synthetic_symbols(args.symbols)
+    at = 86400 * 20000 + (SESSION_OPEN_MINUTE + args.minute) * 60
+    generate_quotes(symbols, at)  # warm the profile cache
+
+    timings = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        generate_quotes(symbols, at)
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    print(f"📈 {args.symbols} symbols at session minute {args.minute}: "
+          f"best {best * 1000:.1f} ms ({best / args.symbols * 1e6:.2f} µs/symbol)")
+
+    sample = 200
+    started = time.perf_counter()
+    for symbol in symbols[:sample]:
+        generate_quotes([symbol], at)
+    single = (time.perf_counter() - started) / sample
+    print(f"   generate_quotes, one symbol per call: {single * 1e6:.1f} µs/symbol")
+
+    _session_path.cache_clear()
+    started = time.perf_counter()
+    for symbol in symbols[:sample]:
+        mock_quote(symbol, at)
+    cold = (time.perf_counter() - started) / sample
+    calls = 100_000
+    started = time.perf_counter()
+    for i in range(calls):
+        mock_quote(symbols[i % sample], at)
+    warm = (time.perf_counter() - started) / calls
+    print(f"   mock_quote: {cold * 1e6:.1f} µs first call per symbol and day, {warm * 1e6:.2f} µs after")
@@ -0,0 +1,154 @@
+"""
+Quote Cache - Bounded in-memory cache for stock quotes
+Per-symbol entries with a TTL, LRU eviction and entry/byte caps so the
+process footprint stays flat no matter how long the service runs.
+Expired entries can be kept for max_stale more seconds so callers may
+serve them while a refresh runs (stale-while-revalidate).
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class QuoteCache:
+    """Thread-safe LRU cache with per-entry TTL and size limits"""
+
+    def __init__(self, ttl, max_entries=5000, max_bytes=16 * 1024 * 1024, max_stale=0):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (data, stored_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_hits = 0
+
+    @staticmethod
+    def _estimate_size(data):
+        """Approximate memory cost of a cached value by its JSON length"""
+        if isinstance(data, (bytes, str)):
+            return len(data)
+        try:
+            return len(json.dumps(data, default=str))
+        except (TypeError, ValueError):
+            return 1024
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key):
+        """Return the cached value for key, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            data, stored_at, _ = entry
+            age = time.time() - stored_at
+            if age >= self.ttl:
+                if age >= self.ttl + self.max_stale:
+                    self._remove(key)
+                    self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def get_with_age(self, key):
+        """Return (data, age_seconds) including stale entries within max_stale, else (None, None)
+
+        Fresh entries count as hits, stale ones as stale hits.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, None
+
+            data, stored_at, _ = entry
+            age = time.time() - stored_at
+            if age >= self.ttl + self.max_stale:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None, None
+
+            self._entries.move_to_end(key)
+            if age < self.ttl:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+            return data, age
+
+    def peek(self, key):
+        """Return the value for key if it is fresh, else None; does not touch LRU order or counters"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry[1] >= self.ttl:
+                return None
+            return entry[0]
+
+    def expires_in(self, key):
+        """Seconds until key expires, or None if absent; does not touch LRU order or counters"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            return self.ttl - (time.time() - entry[1])
+
+    def set(self, key, data):
+        """Store a value, evicting least recently used entries past the caps"""
+        size = self._estimate_size(data)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (data, time.time(), size)
+            self._bytes += size
+
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Counters and occupancy for health reporting"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'max_stale': self.max_stale,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,197 @@
+"""
+Quote Stream - Server-Sent Events fan-out for live quotes
+One background loop fetches the union of all subscribed symbols, diffs them
+against the last values sent and encodes each changed quote once; the
+encoded event is then handed to every subscriber of that symbol.
+Each connection buffers at most one pending event per symbol, so a slow
+client skips intermediate updates instead of stalling the loop.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from background import BackgroundThread
+from serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+# Fields that make up a visible change; timestamps and cache metadata are ignored
+CHANGE_FIELDS = ('price', 'change', 'changePercent', 'volume', 'high', 'low', 'open', 'previousClose')
+
+
+def encode_event(event, data):
+    return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+
+
+class Subscription:
+    """One SSE connection: its symbols and the events waiting to be written"""
+
+    def __init__(self, symbols):
+        self.symbols = frozenset(symbols)
+        self._pending = OrderedDict()  # symbol -> encoded event, newest wins
+        self._cond = threading.Condition()
+        self.closed = False
+        self.sent = 0
+        self.skipped = 0
+
+    def offer(self, symbol, event):
+        """Queue an event without blocking, replacing any unsent one for the symbol"""
+        with self._cond:
+            if self.closed:
+                return
+            if symbol in self._pending:
+                self.skipped += 1
+                del self._pending[symbol]
+            self._pending[symbol] = event
+            self._cond.notify()
+
+    def drain(self, timeout):
+        """Wait up to timeout for events and return them all (empty list on timeout)"""
+        with self._cond:
+            if not self._pending and not self.closed:
+                self._cond.wait(timeout)
+            events = list(self._pending.values())
+            self._pending.clear()
+            self.sent += len(events)
+            return events
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._pending.clear()
+            self._cond.notify()
+
+
+class QuoteStream:
+    """Single refresh loop feeding every streaming client
+
+    fetch(symbols) must return {symbol: quote}; it should go through the
+    quote cache so streaming adds no upstream traffic of its own beyond
+    what the cache would fetch anyway.
+    """
+
+    def __init__(self, fetch, interval=2, max_subscribers=1000, max_symbols=50):
+        self.fetch = fetch
+        self.interval = interval
+        self.max_subscribers = max_subscribers
+        self.max_symbols = max_symbols
+        self._subscribers = {}  # symbol -> set of subscriptions
+        self._fingerprints = {}  # symbol -> values last sent
+        self._events = {}  # symbol -> last encoded event, for new subscribers
+        self._count = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._worker = BackgroundThread(self._run, 'quote-stream')
+        self.cycles = 0
+        self.events_encoded = 0
+        self.events_delivered = 0
+        self.errors = 0
+        self.last_cycle_duration = None
+
+    def ensure_started(self):
+        if self._worker.ensure_started():
+            logger.info(f"📡 Quote stream started (every {self.interval}s)")
+
+    def stop(self):
+        self._worker.stop()
+        self._wake.set()
+
+    def subscribe(self, symbols):
+        """Register a client; returns None when the subscriber limit is reached"""
+        symbols = list(dict.fromkeys(symbols))[:self.max_symbols]
+        subscription = Subscription(symbols)
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                return None
+            self._count += 1
+            missing = False
+            for symbol in subscription.symbols:
+                self._subscribers.setdefault(symbol, set()).add(subscription)
+                event = self._events.get(symbol)
+                if event is None:
+                    missing = True
+                else:
+                    subscription.offer(symbol, event)
+        if missing:
+            # Don't make a new client wait a whole interval for its first quotes
+            self._wake.set()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscription.close()
+        with self._lock:
+            removed = False
+            for symbol in subscription.symbols:
+                subscribers = self._subscribers.get(symbol)
+                if subscribers is None or subscription not in subscribers:
+                    continue
+                removed = True
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[symbol]
+                    self._fingerprints.pop(symbol, None)
+                    self._events.pop(symbol, None)
+            if removed:
+                self._count -= 1
+
+    def run_once(self):
+        """Fetch every subscribed symbol and deliver the ones that changed"""
+        with self._lock:
+            symbols = list(self._subscribers)
+        self.cycles += 1
+        if not symbols:
+            return 0
+
+        started = time.monotonic()
+        try:
+            quotes = self.fetch(symbols)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Quote stream fetch failed for {len(symbols)} symbols: {e}")
+            return 0
+        finally:
+            self.last_cycle_duration = round(time.monotonic() - started, 3)
+
+        changed = 0
+        with self._lock:
+            for symbol, quote in quotes.items():
+                subscribers = self._subscribers.get(symbol)
+                if not subscribers or not quote:
+                    continue
+                fingerprint = tuple(quote.get(field) for field in CHANGE_FIELDS)
+                if self._fingerprints.get(symbol) == fingerprint:
+                    continue
+                self._fingerprints[symbol] = fingerprint
+                event = encode_event('quote', {'symbol': symbol, 'data': quote})
+                self._events[symbol] = event
+                self.events_encoded += 1
+                changed += 1
+                for subscription in subscribers:
+                    subscription.offer(symbol, event)
+                    self.events_delivered += 1
+        return changed
+
+    def _run(self):
+        while not self._worker.stopped.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._worker.stopped.is_set():
+                break
+            self.run_once()
+
+    def stats(self):
+        with self._lock:
+            subscribers = self._count
+            symbols = len(self._subscribers)
+        return {
+            'running': self._worker.running,
+            'subscribers': subscribers,
+            'symbols': symbols,
+            'cycles': self.cycles,
+            'events_encoded': self.events_encoded,
+            'events_delivered': self.events_delivered,
+            'errors': self.errors,
+            'last_cycle_duration': self.last_cycle_duration
+        }
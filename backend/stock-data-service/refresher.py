@@ -0,0 +1,121 @@
+"""
+Quote Refresher - Keeps frequently requested symbols warm in the cache
+Tracks request frequency per symbol and re-fetches the hottest ones (plus
+pinned symbols such as the market indices) in one batched provider call
+shortly before their cache entries expire
+"""
+
+import logging
+import threading
+import time
+
+from background import BackgroundThread
+
+logger = logging.getLogger(__name__)
+
+
+class HotSymbolTracker:
+    """Decaying request counts per symbol"""
+
+    def __init__(self, half_life=300, max_symbols=10000):
+        self.half_life = half_life
+        self.max_symbols = max_symbols
+        self._scores = {}
+        self._last_decay = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _decay(self, now):
+        elapsed = now - self._last_decay
+        if elapsed < self.half_life / 10:
+            return
+        factor = 0.5 ** (elapsed / self.half_life)
+        self._scores = {symbol: score * factor for symbol, score in self._scores.items() if score * factor >= 0.01}
+        self._last_decay = now
+
+    def record(self, symbol, weight=1.0):
+        with self._lock:
+            self._decay(time.monotonic())
+            self._scores[symbol] = self._scores.get(symbol, 0.0) + weight
+            if len(self._scores) > self.max_symbols:
+                # Drop the coldest tenth rather than trimming one at a time
+                keep = sorted(self._scores.items(), key=lambda item: item[1], reverse=True)[:int(self.max_symbols * 0.9)]
+                self._scores = dict(keep)
+
+    def top(self, n):
+        with self._lock:
+            self._decay(time.monotonic())
+            ranked = sorted(self._scores.items(), key=lambda item: item[1], reverse=True)
+            return [symbol for symbol, _ in ranked[:n]]
+
+    def __len__(self):
+        return len(self._scores)
+
+
+class QuoteRefresher:
+    """Background thread that refreshes hot symbols before their cache entries expire
+
+    refresh(symbols) must fetch from providers (bypassing the cache) and
+    store the results in the cache.
+    """
+
+    def __init__(self, cache, tracker, refresh, pinned_symbols=(), top_n=50, interval=5, lead_time=5):
+        self.cache = cache
+        self.tracker = tracker
+        self.refresh = refresh
+        self.pinned_symbols = list(pinned_symbols)
+        self.top_n = top_n
+        self.interval = interval
+        self.lead_time = lead_time
+        self._worker = BackgroundThread(self._run, 'quote-refresher')
+        self.cycles = 0
+        self.refreshed = 0
+        self.errors = 0
+        self.last_refresh_duration = None
+
+    def ensure_started(self):
+        if self._worker.ensure_started():
+            logger.info(f"🔄 Quote refresher started (top {self.top_n}, every {self.interval}s)")
+
+    def stop(self):
+        self._worker.stop()
+
+    def due_symbols(self):
+        """Hot and pinned symbols that are missing or about to expire"""
+        candidates = list(dict.fromkeys(self.pinned_symbols + self.tracker.top(self.top_n)))
+        due = []
+        for symbol in candidates:
+            remaining = self.cache.expires_in(symbol)
+            if remaining is None or remaining <= self.lead_time:
+                due.append(symbol)
+        return due
+
+    def run_once(self):
+        symbols = self.due_symbols()
+        self.cycles += 1
+        if not symbols:
+            return 0
+        started = time.monotonic()
+        try:
+            self.refresh(symbols)
+            self.refreshed += len(symbols)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Quote refresh failed for {len(symbols)} symbols: {e}")
+        finally:
+            self.last_refresh_duration = round(time.monotonic() - started, 3)
+        return len(symbols)
+
+    def _run(self):
+        while not self._worker.stopped.wait(self.interval):
+            self.run_once()
+
+    def stats(self):
+        return {
+            'running': self._worker.running,
+            'tracked_symbols': len(self.tracker),
+            'hot_symbols': self.tracker.top(10),
+            'cycles': self.cycles,
+            'refreshed': self.refreshed,
+            'errors': self.errors,
+            'last_refresh_duration': self.last_refresh_duration
+        }
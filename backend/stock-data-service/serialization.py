@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Serialization - Compact JSON bytes for caches and responses
+Uses orjson when it is installed and falls back to the standard library.
+Values are always compact UTF-8 JSON without newlines, so already-encoded
+quotes can be spliced into a response (raw_object) or framed one per line
+without being decoded again.
+
+Usage (benchmark):
+    python serialization.py --iterations 200000
+"""
+
+import argparse
+import json
+import time
+
+try:
+    import orjson
+except ImportError:  # Optional: the standard library is slower but produces the same JSON
+    orjson = None
+
+
+if orjson is not None:
+    def dumps(obj):
+        return orjson.dumps(obj)
+
+    def loads(data):
+        return orjson.loads(data)
+else:
+    def dumps(obj):
+        return json.dumps(obj, separators=(',', ':')).encode()
+
+    def loads(data):
+        return json.loads(data)
+
+
+def raw_object(fields):
+    """JSON object bytes from {key: already-encoded JSON value bytes}"""
+    return b'{' + b','.join(dumps(key) + b':' + value for key, value in fields.items()) + b'}'
+
+
+def envelope(payload):
+    """The {"success":true,"data":...} response body around already-encoded data"""
+    return b'{"success":true,"data":' + payload + b'}'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the cached-hit serialization path')
+    parser.add_argument('--iterations', type=int, default=200000)
+    args = parser.parse_args()
+
+    quote = {
+        'symbol': 'AAPL', 'price': 178.23, 'change': 1.25, 'changePercent': 0.71, 'volume': 51234567,
+        'high': 179.1, 'low': 176.8, 'open': 177.0, 'previousClose': 176.98,
+        'timestamp': '2026-10-18T14:30:00.123456', 'dataSource': 'twelve-data', 'isRealTime': True
+    }
+    cached_at = time.time()
+    legacy_entry = json.dumps({'cachedAt': cached_at, 'data': quote})  # str, as read with decode_responses=True
+    stored = b'%.6f\n' % cached_at + dumps(quote)
+
+    def before():
+        # Redis value -> json.loads -> response dict -> json.dumps (what jsonify does)
+        entry = json.loads(legacy_entry)
+        return json.dumps({'success': True, 'data': entry['data']}).encode()
+
+    def after():
+        # Redis bytes -> split off the timestamp -> splice into the response
+        stamp, _, payload = stored.partition(b'\n')
+        float(stamp)
+        return envelope(payload)
+
+    assert json.loads(before()) == json.loads(after())
+    for name, fn in (('json.loads + json.dumps', before), ('pre-serialized bytes', after)):
+        started = time.perf_counter()
+        for _ in range(args.iterations):
+            fn()
+        elapsed = time.perf_counter() - started
+        print(f"⚡ {name:<24} {args.iterations / elapsed:>12,.0f} hits/s ({elapsed / args.iterations * 1e6:.2f} µs/hit)")
+    print(f"   serializer: {'orjson' if orjson is not None else 'json (orjson not installed)'}")
@@ -0,0 +1,140 @@
+"""
+Single Flight - Request coalescing for concurrent quote lookups
+Concurrent callers asking for the same key share one upstream fetch instead
+of each running the full provider chain
+"""
+
+import logging
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """In-process single-flight: one execution per key, shared by all waiters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executions = 0
+        self.shared = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        """Run fn for key, or wait for the call already in flight and share its result"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'executions': self.executions,
+                'shared': self.shared
+            }
+
+
+# Delete the lock only if we still own it, so an expired lock re-acquired by
+# another pod is never released by the original holder
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisSingleFlight:
+    """Cross-process single-flight built on a Redis SET NX lock
+
+    The lock holder runs the fetch (which is expected to write the shared
+    cache); other pods poll the cache until the value appears, the lock is
+    released, or wait_timeout elapses, and only then fetch themselves.
+    """
+
+    def __init__(self, client, lock_ttl=10, wait_timeout=10, poll_interval=0.05, prefix='lock:'):
+        self.client = client
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.prefix = prefix
+        self.acquired = 0
+        self.waited = 0
+
+    def do(self, key, fn, read_cached):
+        lock_key = f"{self.prefix}{key}"
+        token = uuid.uuid4().hex
+
+        try:
+            acquired = self.client.set(lock_key, token, nx=True, px=int(self.lock_ttl * 1000))
+        except Exception as e:
+            logger.warning(f"Redis single-flight lock error for {key}: {e}")
+            return fn()
+
+        if acquired:
+            self.acquired += 1
+            try:
+                return fn()
+            finally:
+                try:
+                    self.client.eval(_RELEASE_SCRIPT, 1, lock_key, token)
+                except Exception as e:
+                    logger.warning(f"Redis single-flight release error for {key}: {e}")
+
+        self.waited += 1
+        deadline = time.monotonic() + self.wait_timeout
+        try:
+            while time.monotonic() < deadline:
+                cached = read_cached()
+                if cached is not None:
+                    return cached
+                if not self.client.exists(lock_key):
+                    break
+                time.sleep(self.poll_interval)
+
+            cached = read_cached()
+            if cached is not None:
+                return cached
+        except Exception as e:
+            logger.warning(f"Redis single-flight wait error for {key}: {e}")
+
+        # Holder failed or timed out without populating the cache
+        return fn()
+
+    def stats(self):
+        return {
+            'acquired': self.acquired,
+            'waited': self.waited
+        }
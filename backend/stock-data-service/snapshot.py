@@ -0,0 +1,101 @@
+"""
+Snapshot - Precomputed JSON payloads rebuilt by a background job
+The build function runs every interval seconds off the request path; its
+result is serialized once and kept as bytes with a content ETag, so serving
+it is a memory read. A failed rebuild keeps the previous snapshot.
+"""
+
+import json
+import logging
+import threading
+import time
+
+from background import BackgroundThread
+from http_cache import content_etag
+from serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotJob:
+    """Serialized payload from build(), refreshed in the background
+
+    build() returns (data, meta): data determines the ETag, meta (for
+    example a timestamp) is merged into the payload without affecting it,
+    so the snapshot only changes when the data does.
+    """
+
+    def __init__(self, build, interval=10, name='snapshot'):
+        self.build = build
+        self.interval = interval
+        self.name = name
+        self._build_lock = threading.Lock()
+        self._worker = BackgroundThread(self._run, f'{name}-snapshot')
+        self._snapshot = None  # (body, etag, built_at)
+        self._data_hash = None
+        self.builds = 0
+        self.changes = 0
+        self.errors = 0
+        self.last_build_duration = None
+
+    def ensure_started(self):
+        if self._worker.ensure_started():
+            logger.info(f"📸 {self.name} snapshot job started (every {self.interval}s)")
+
+    def stop(self):
+        self._worker.stop()
+
+    def refresh(self):
+        """Rebuild now; returns True when the payload changed"""
+        with self._build_lock:
+            return self._rebuild()
+
+    def _rebuild(self):
+        started = time.monotonic()
+        try:
+            data, meta = self.build()
+            data_body = json.dumps(data, sort_keys=True, separators=(',', ':')).encode()
+            data_hash = content_etag(data_body)
+            self.builds += 1
+            if data_hash == self._data_hash:
+                return False
+            body = dumps({**meta, 'data': data})
+            self._snapshot = (body, content_etag(body), time.time())
+            self._data_hash = data_hash
+            self.changes += 1
+            return True
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"{self.name} snapshot build failed: {e}")
+            return False
+        finally:
+            self.last_build_duration = round(time.monotonic() - started, 3)
+
+    def get(self):
+        """(body bytes, etag), building synchronously if no snapshot exists yet; None if that fails"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._build_lock:
+                # Requests that queued behind the first build use its result
+                if self._snapshot is None:
+                    self._rebuild()
+            snapshot = self._snapshot
+            if snapshot is None:
+                return None
+        return snapshot[0], snapshot[1]
+
+    def _run(self):
+        while not self._worker.stopped.wait(self.interval):
+            self.refresh()
+
+    def stats(self):
+        snapshot = self._snapshot
+        return {
+            'running': self._worker.running,
+            'builds': self.builds,
+            'changes': self.changes,
+            'errors': self.errors,
+            'bytes': len(snapshot[0]) if snapshot else 0,
+            'age': round(time.time() - snapshot[2], 1) if snapshot else None,
+            'last_build_duration': self.last_build_duration
+        }
@@ -0,0 +1,71 @@
+import importlib.util
+import os
+
+import fakeredis
+import pytest
+import redis
+
+from circuit_breaker import BreakerRegistry
+from mock_provider_server import MockProviderHandler, start_server
+
+SYMBOLS = ['AAPL', 'MSFT', 'NVDA', 'TSLA', 'AMZN']
+
+
+@pytest.fixture(scope='module')
+def app_aws():
+    """app-aws.py loaded as a module against fakeredis (its Prometheus metrics can only register once)"""
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app-aws.py')
+    spec = importlib.util.spec_from_file_location('app_aws', path)
+    module = importlib.util.module_from_spec(spec)
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(redis, 'Redis', lambda decode_responses=False, **options: fakeredis.FakeRedis(
+            decode_responses=decode_responses))
+        spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def twelve_data(app_aws, monkeypatch):
+    """A service whose Twelve Data calls go to a fresh mock server, with fresh breakers"""
+    servers = []
+
+    def start(max_batch_size=2, unknown_symbols=(), fail_paths=()):
+        server, base_url = start_server(unknown_symbols=unknown_symbols, fail_paths=fail_paths)
+        servers.append(server)
+        MockProviderHandler.stats.clear()
+        service = app_aws.StockDataService()
+        service.apis['twelve_data']['base_url'] = f'{base_url}/twelvedata'
+        service.apis['twelve_data']['max_batch_size'] = max_batch_size
+        return service
+
+    monkeypatch.setattr(app_aws, 'breakers', BreakerRegistry())
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_twelve_data_batch_uses_one_quote_request_per_chunk(twelve_data):
+    service = twelve_data(max_batch_size=2)
+    results = service.get_from_twelve_data_batch(SYMBOLS)
+
+    assert sorted(results) == sorted(SYMBOLS)
+    assert all(quote['dataSource'] == 'twelve-data' and quote['price'] > 0 for quote in results.values())
+    assert MockProviderHandler.stats['/twelvedata/quote'] == 3
+    assert '/twelvedata/price' not in MockProviderHandler.stats
+
+
+def test_twelve_data_batch_leaves_out_unknown_symbols(twelve_data):
+    service = twelve_data(max_batch_size=10, unknown_symbols={'ZZZZ'})
+    results = service.get_from_twelve_data_batch(['AAPL', 'ZZZZ', 'MSFT'])
+
+    assert sorted(results) == ['AAPL', 'MSFT']
+    assert MockProviderHandler.stats['/twelvedata/quote'] == 1
+
+
+def test_failed_twelve_data_chunk_falls_back_to_per_symbol_calls(twelve_data):
+    service = twelve_data(max_batch_size=10, fail_paths={'/twelvedata/quote'})
+    results = service.get_from_twelve_data_batch(['AAPL', 'MSFT'])
+
+    assert sorted(results) == ['AAPL', 'MSFT']
+    assert MockProviderHandler.stats['/twelvedata/price'] == 2
@@ -0,0 +1,29 @@
+import threading
+
+from background import BackgroundThread
+
+
+def test_starts_once_and_restarts_after_stop():
+    started = []
+    release = threading.Event()
+
+    def target():
+        started.append(threading.current_thread().name)
+        release.wait(5)
+
+    worker = BackgroundThread(target, 'test-worker')
+    assert worker.ensure_started()
+    assert not worker.ensure_started()
+    assert worker.running
+
+    worker.stop()
+    release.set()
+    worker._thread.join(5)
+    assert worker.stopped.is_set()
+    assert not worker.running
+
+    # A dead thread is replaced and the stop flag cleared for the new one
+    assert worker.ensure_started()
+    assert not worker.stopped.is_set()
+    worker._thread.join(5)
+    assert started == ['test-worker', 'test-worker']
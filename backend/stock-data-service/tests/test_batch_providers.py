@@ -0,0 +1,74 @@
+import pytest
+
+import app
+from circuit_breaker import BreakerRegistry
+from mock_provider_server import MockProviderHandler, start_server
+
+SYMBOLS = ['AAPL', 'MSFT', 'NVDA', 'TSLA', 'AMZN', 'META', 'GOOGL', 'NFLX']
+
+
+@pytest.fixture
+def mock_providers(monkeypatch):
+    """A StockDataService pointed at a fresh mock server, with fresh breakers"""
+    servers = []
+
+    def start(max_batch_size=3, unknown_symbols=(), fail_paths=()):
+        server, base_url = start_server(unknown_symbols=unknown_symbols, fail_paths=fail_paths)
+        servers.append(server)
+        MockProviderHandler.stats.clear()
+        service = app.StockDataService()
+        service.apis['yahoo_finance']['base_url'] = f'{base_url}/yahoo'
+        service.apis['twelve_data']['base_url'] = f'{base_url}/twelvedata'
+        for provider in service.batch_providers:
+            service.apis[provider]['max_batch_size'] = max_batch_size
+        return service
+
+    monkeypatch.setattr(app, 'breakers', BreakerRegistry())
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def fetch_batch(service, provider, symbols):
+    return app.fetch_engine.run(service._fetch_batch_async(provider, symbols), timeout=10)
+
+
+@pytest.mark.parametrize('provider, path', [
+    ('yahoo_finance', '/yahoo/v7/finance/quote'),
+    ('twelve_data', '/twelvedata/quote')
+])
+def test_batches_are_chunked_to_max_batch_size(mock_providers, provider, path):
+    service = mock_providers(max_batch_size=3)
+    results = fetch_batch(service, provider, SYMBOLS)
+
+    assert sorted(results) == sorted(SYMBOLS)
+    assert MockProviderHandler.stats == {path: 3}  # 8 symbols in chunks of 3, 3 and 2
+
+
+def test_failed_chunk_falls_back_to_per_symbol_calls(mock_providers):
+    service = mock_providers(max_batch_size=4, fail_paths={'/twelvedata/quote'})
+    results = fetch_batch(service, 'twelve_data', SYMBOLS)
+
+    assert sorted(results) == sorted(SYMBOLS)
+    assert all(quote['price'] > 0 for quote in results.values())
+    assert MockProviderHandler.stats == {'/twelvedata/quote': 2, '/twelvedata/price': len(SYMBOLS)}
+
+
+def test_unknown_symbols_in_a_twelve_data_batch_are_left_out(mock_providers):
+    service = mock_providers(max_batch_size=10, unknown_symbols={'ZZZZ', 'QQQQX'})
+    results = fetch_batch(service, 'twelve_data', ['AAPL', 'ZZZZ', 'MSFT', 'QQQQX'])
+
+    assert sorted(results) == ['AAPL', 'MSFT']
+    assert results['AAPL']['dataSource'] == 'twelve-data'
+    # One batch request answered the known symbols; no per-symbol fallback was needed
+    assert MockProviderHandler.stats == {'/twelvedata/quote': 1}
+    assert app.breakers.get('twelve_data').snapshot()['failures'] == 0
+
+
+def test_chunk_of_only_unknown_symbols_returns_nothing(mock_providers):
+    service = mock_providers(max_batch_size=1, unknown_symbols={'ZZZZ'})
+    results = fetch_batch(service, 'twelve_data', ['ZZZZ', 'AAPL'])
+
+    assert sorted(results) == ['AAPL']
+    assert app.breakers.get('twelve_data').snapshot()['failures'] == 0
@@ -0,0 +1,54 @@
+import httpx
+import requests
+
+from circuit_breaker import OPEN, BreakerRegistry, RateLimitedError, is_provider_failure
+
+
+def _http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f'{status} error', response=response)
+
+
+def _wrapped(error):
+    # get_from_* re-raises provider errors wrapped in a plain Exception
+    try:
+        try:
+            raise error
+        except Exception as e:
+            raise Exception(f'Provider API error: {e}')
+    except Exception as e:
+        return e
+
+
+def test_symbol_errors_are_not_provider_failures():
+    assert not is_provider_failure(_http_error(404))
+    assert not is_provider_failure(_http_error(400))
+    assert not is_provider_failure(Exception('No data from Finnhub'))
+    assert not is_provider_failure(_wrapped(_http_error(404)))
+
+
+def test_transport_errors_timeouts_5xx_and_rate_limits_are_failures():
+    assert is_provider_failure(_http_error(503))
+    assert is_provider_failure(_http_error(429))
+    assert is_provider_failure(RateLimitedError('slow down'))
+    assert is_provider_failure(requests.exceptions.ConnectTimeout('timed out'))
+    assert is_provider_failure(requests.exceptions.ConnectionError('refused'))
+    assert is_provider_failure(httpx.ConnectError('refused'))
+    assert is_provider_failure(TimeoutError())
+    assert is_provider_failure(_wrapped(_http_error(502)))
+
+
+def test_bogus_symbols_do_not_open_breakers():
+    breakers = BreakerRegistry(min_calls=5)
+    for _ in range(20):
+        assert breakers.allow('yahoo_finance')
+        breakers.record('yahoo_finance', 0.05, _wrapped(_http_error(404)))
+    assert breakers.get('yahoo_finance').state != OPEN
+
+
+def test_server_errors_open_breakers():
+    breakers = BreakerRegistry(min_calls=5)
+    for _ in range(5):
+        breakers.record('finnhub', 0.05, _http_error(500))
+    assert breakers.get('finnhub').state == OPEN
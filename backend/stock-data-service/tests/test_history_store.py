@@ -0,0 +1,44 @@
+import math
+
+import pytest
+
+from history_store import HistoryStore, valid_symbol
+
+DAY = 86400 * 20000
+
+
+def test_valid_symbol():
+    for symbol in ('AAPL', 'BRK.B', 'BRK/B', '^GSPC', 'EURUSD=X', 'RDS-A'):
+        assert valid_symbol(symbol)
+    for symbol in ('.', '..', '...', '', 'A\\B', 'A B', 'AAPL\x00'):
+        assert not valid_symbol(symbol)
+
+
+def test_dot_symbols_cannot_escape_the_store(tmp_path):
+    store = HistoryStore(str(tmp_path / 'history'))
+    for symbol in ('.', '..'):
+        with pytest.raises(ValueError):
+            store.record(symbol, {'price': 10.0, 'volume': 100}, DAY)
+        with pytest.raises(ValueError):
+            store.query(symbol, DAY, DAY + 3600)
+    assert not (tmp_path / '1m').exists()
+
+
+def test_query_rejects_non_finite_times(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    store.record('AAPL', {'price': 10.0, 'volume': 100}, DAY + 30)
+    assert store.query('AAPL', DAY, DAY + 60)['close'] == [10.0]
+    for start, end in ((math.nan, DAY), (DAY, math.inf), (-math.inf, DAY)):
+        with pytest.raises(ValueError):
+            store.query('AAPL', start, end)
+
+
+def test_history_endpoint_rejects_bad_input():
+    import app
+
+    client = app.app.test_client()
+    for query in ('from=nan', 'to=inf', 'from=-inf&to=1', 'to=nan'):
+        response = client.get(f'/api/history/AAPL?{query}')
+        assert response.status_code == 400, query
+    assert client.get('/api/history/..').status_code in (400, 404)
+    assert client.get('/api/history/%2E%2E').status_code in (400, 404)
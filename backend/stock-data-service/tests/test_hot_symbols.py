@@ -0,0 +1,21 @@
+import app
+from mock_quotes import mock_quote
+from refresher import HotSymbolTracker
+
+
+def real_quote(symbol):
+    return {**mock_quote(symbol), 'dataSource': 'twelve-data', 'isRealTime': True}
+
+
+def test_only_symbols_with_real_quotes_become_hot(monkeypatch):
+    tracker = HotSymbolTracker()
+    monkeypatch.setattr(app, 'hot_symbols', tracker)
+    monkeypatch.setattr(app.stock_service, 'get_multiple_stock_prices',
+                        lambda symbols: {'AAPL': real_quote('AAPL'), 'NOPE1': mock_quote('NOPE1')})
+    monkeypatch.setattr(app.stock_service, 'get_stock_price', mock_quote)
+
+    client = app.app.test_client()
+    assert client.get('/api/stocks?symbols=AAPL,NOPE1').status_code == 200
+    assert client.get('/api/stock/NOPE2').status_code == 200
+    # Unknown symbols only ever get mock data; the refresher must not keep retrying them
+    assert tracker.top(10) == ['AAPL']
@@ -0,0 +1,51 @@
+import gzip
+
+from flask import Flask, request
+
+from http_cache import CompressedBodyCache, ConditionalResponder, content_etag
+from serialization import dumps
+
+app = Flask(__name__)
+
+
+def quote(price=178.23, **fields):
+    return dumps({'success': True, 'data': {'symbol': 'AAPL', 'price': price, **fields}})
+
+
+def respond(responder, body, headers=None):
+    with app.test_request_context('/api/stock/AAPL', headers=headers or {}):
+        return responder.respond(request, body)
+
+
+def test_volatile_fields_still_revalidate():
+    responder = ConditionalResponder()
+    first = respond(responder, quote(isStale=True, cacheAge=31.2))
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert etag.startswith('W/')
+
+    later = respond(responder, quote(isStale=True, cacheAge=47.9), {'If-None-Match': etag})
+    assert later.status_code == 304
+
+    mock = respond(responder, quote(timestamp='2026-10-18T14:30:00.1'))
+    again = respond(responder, quote(timestamp='2026-10-18T14:30:05.7'), {'If-None-Match': mock.headers['ETag']})
+    assert again.status_code == 304
+
+    moved = respond(responder, quote(price=178.5, isStale=True, cacheAge=50.0), {'If-None-Match': etag})
+    assert moved.status_code == 200
+
+
+def test_stable_bodies_keep_strong_etags():
+    body = quote()
+    response = respond(ConditionalResponder(), body)
+    assert response.headers['ETag'] == f'"{content_etag(body)}"'
+
+
+def test_compressed_bodies_are_not_shared_across_volatile_values():
+    responder = ConditionalResponder(CompressedBodyCache(min_size=0))
+    headers = {'Accept-Encoding': 'gzip'}
+    first = respond(responder, quote(cacheAge=1.0), headers)
+    second = respond(responder, quote(cacheAge=2.0), headers)
+    assert first.headers['ETag'] == second.headers['ETag']
+    assert second.content_encoding == 'gzip'
+    assert b'"cacheAge":2.0' in gzip.decompress(second.get_data())
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from indicators import IndicatorEngine
+
+START = 86400 * 20000 + 14 * 3600
+
+
+def _series(count):
+    rng = np.random.default_rng(3)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, count)))
+    times = START + np.arange(count) * 60.0
+    volumes = rng.integers(100, 1000, count).astype(np.float64)
+    return times, closes, volumes
+
+
+def _assert_same(left, right):
+    assert left.keys() == right.keys()
+    for key in left:
+        assert left[key] == pytest.approx(right[key], rel=1e-9, abs=1e-12), key
+
+
+def test_backfill_then_update_matches_incremental():
+    times, closes, volumes = _series(301)
+
+    incremental = IndicatorEngine(step=60)
+    for t, close, volume in zip(times, closes, volumes):
+        incremental.update('AAPL', close, volume, t)
+
+    backfilled = IndicatorEngine(step=60)
+    backfilled.backfill('AAPL', times[:-2], closes[:-2], volumes[:-2])
+    for t, close, volume in zip(times[-2:], closes[-2:], volumes[-2:]):
+        backfilled.update('AAPL', close, volume, t)
+
+    assert backfilled.snapshot('AAPL')['bars'] == 300
+    _assert_same(backfilled.snapshot('AAPL'), incremental.snapshot('AAPL'))
+
+
+def test_loader_backfill_does_not_commit_last_bar_twice():
+    times, closes, volumes = _series(301)
+    engine = IndicatorEngine(step=60, loader=lambda symbol: (times[:-2], closes[:-2], volumes[:-2]))
+    for t, close, volume in zip(times[-2:], closes[-2:], volumes[-2:]):
+        engine.update('AAPL', close, volume, t)
+
+    incremental = IndicatorEngine(step=60)
+    for t, close, volume in zip(times, closes, volumes):
+        incremental.update('AAPL', close, volume, t)
+    _assert_same(engine.snapshot('AAPL'), incremental.snapshot('AAPL'))
+
+
+def test_backfilled_snapshot_reports_last_close():
+    times, closes, volumes = _series(30)
+    engine = IndicatorEngine(step=60)
+    engine.backfill('AAPL', times, closes, volumes)
+    snapshot = engine.snapshot('AAPL')
+    assert snapshot['bars'] == 30
+    assert snapshot['price'] == closes[-1]
+
+
+def test_loader_failure_starts_empty():
+    def loader(symbol):
+        raise OSError('disk gone')
+
+    engine = IndicatorEngine(step=60, loader=loader)
+    engine.update('AAPL', 100.0, 10.0, START)
+    assert engine.snapshot('AAPL')['bars'] == 0
+    assert engine.snapshot('AAPL')['price'] == 100.0
@@ -0,0 +1,25 @@
+import time
+
+from quote_cache import QuoteCache
+
+
+def test_peek_returns_fresh_values_without_counting():
+    cache = QuoteCache(ttl=0.05, max_stale=10)
+    assert cache.peek('AAPL') is None
+    cache.set('AAPL', {'price': 1.0})
+    assert cache.peek('AAPL') == {'price': 1.0}
+    assert (cache.hits, cache.misses) == (0, 0)
+
+    time.sleep(0.06)
+    assert cache.peek('AAPL') is None  # stale entries are not served by peek
+    assert (cache.hits, cache.misses, cache.stale_hits) == (0, 0, 0)
+
+
+def test_peek_does_not_refresh_lru_position():
+    cache = QuoteCache(ttl=60, max_entries=2)
+    cache.set('AAPL', 1)
+    cache.set('MSFT', 2)
+    cache.peek('AAPL')
+    cache.set('NVDA', 3)
+    assert cache.peek('AAPL') is None
+    assert cache.peek('MSFT') == 2
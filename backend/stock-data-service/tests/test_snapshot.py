@@ -0,0 +1,36 @@
+import threading
+import time
+
+from snapshot import SnapshotJob
+
+
+def test_concurrent_first_requests_share_one_build():
+    def build():
+        time.sleep(0.1)
+        return {'US': [1, 2, 3]}, {'success': True}
+
+    job = SnapshotJob(build, name='test')
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(job.get())) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert job.builds == 1
+    assert len(results) == 5 and len(set(results)) == 1
+
+
+def test_failed_first_build_returns_none_and_retries():
+    attempts = []
+
+    def build():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError('providers down')
+        return {'US': []}, {}
+
+    job = SnapshotJob(build, name='test')
+    assert job.get() is None
+    assert job.get() is not None
+    assert job.errors == 1
@@ -0,0 +1,256 @@
+"""
+Tiered Cache - In-process L1 in front of a shared Redis L2
+Quotes are serialized once on write and stored in both tiers as
+b"<cachedAt>\n<quote JSON>", so their age survives promotion from Redis into
+a worker's L1 and a cache hit can be served as the stored bytes without
+decoding. Every write is broadcast on a Redis pub/sub channel so the other
+workers (and pods) update their L1 copy instead of waiting for it to expire.
+The Redis client must return bytes (decode_responses=False).
+"""
+
+import logging
+import os
+import time
+import uuid
+
+from background import BackgroundThread
+from quote_cache import QuoteCache
+from serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+L1 = 'l1'
+REDIS = 'redis'
+
+
+def _frame(cached_at, payload):
+    return b'%.6f\n' % cached_at + payload
+
+
+def _split(value):
+    """(cachedAt, quote JSON bytes) from a stored value
+
+    Plain quote JSON written before ages were recorded counts as new.
+    """
+    if isinstance(value, str):
+        value = value.encode()
+    if value.startswith(b'{'):
+        return time.time(), value
+    stamp, _, payload = value.partition(b'\n')
+    return float(stamp), payload
+
+
+class TieredCache:
+    """Two-tier quote cache with cross-worker updates over Redis pub/sub
+
+    Lookups return (data, age, tier), with data as the stored JSON bytes when
+    raw=True. A fresh L1 entry is served without touching Redis; a stale one
+    is checked against Redis first in case an update broadcast was missed.
+    Works as an L1-only cache when client is None.
+    """
+
+    def __init__(self, client, redis_ttl, fresh_ttl, l1_ttl=2, l1_max_entries=5000,
+                 prefix='stock:', channel='stock-cache-updates'):
+        self.client = client
+        self.redis_ttl = redis_ttl
+        self.fresh_ttl = fresh_ttl
+        self.prefix = prefix
+        self.channel = channel
+        self.l1 = QuoteCache(ttl=l1_ttl, max_entries=l1_max_entries)
+        self._instance = uuid.uuid4().hex
+        self._worker = BackgroundThread(self._listen, 'cache-updates')
+        self.l2_hits = 0
+        self.l2_misses = 0
+        self.published = 0
+        self.received = 0
+        self.errors = 0
+
+    @property
+    def _origin(self):
+        # Forked workers share the instance id, so tell them apart by pid
+        return f"{self._instance}:{os.getpid()}"
+
+    def _key(self, symbol):
+        return f"{self.prefix}{symbol}"
+
+    def _local(self, symbol):
+        value = self.l1.get(symbol)
+        return _split(value) if value is not None else None
+
+    def get(self, symbol, raw=False):
+        """(data, age, tier) for symbol, or (None, None, None)"""
+        now = time.time()
+        local = self._local(symbol)
+        if local is not None and now - local[0] < self.fresh_ttl:
+            return (local[1] if raw else loads(local[1])), now - local[0], L1
+
+        remote = None
+        if self.client:
+            try:
+                value = self.client.get(self._key(symbol))
+                remote = _split(value) if value else None
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Redis cache error: {e}")
+        return self._resolve(symbol, local, remote, now, raw)
+
+    def get_many(self, symbols, raw=False):
+        """{symbol: (data, age, tier)} for the symbols present, using one MGET for L1 misses"""
+        now = time.time()
+        found = {}
+        local_entries = {}
+        remote_lookups = []
+        for symbol in symbols:
+            local = self._local(symbol)
+            if local is not None and now - local[0] < self.fresh_ttl:
+                found[symbol] = ((local[1] if raw else loads(local[1])), now - local[0], L1)
+            else:
+                local_entries[symbol] = local
+                remote_lookups.append(symbol)
+
+        remote_entries = {}
+        if remote_lookups and self.client:
+            try:
+                values = self.client.mget([self._key(symbol) for symbol in remote_lookups])
+                for symbol, value in zip(remote_lookups, values):
+                    if value:
+                        try:
+                            remote_entries[symbol] = _split(value)
+                        except (ValueError, TypeError) as e:
+                            logger.warning(f"Corrupt cache entry for {symbol}: {e}")
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Redis cache MGET error: {e}")
+
+        for symbol in remote_lookups:
+            data, age, tier = self._resolve(symbol, local_entries[symbol], remote_entries.get(symbol), now, raw)
+            if data is not None:
+                found[symbol] = (data, age, tier)
+        return found
+
+    def _resolve(self, symbol, local, remote, now, raw):
+        """Pick the newer of a stale L1 entry and the Redis entry, promoting the latter"""
+        if remote is not None and (local is None or remote[0] >= local[0]):
+            self.l2_hits += 1
+            self.l1.set(symbol, _frame(*remote))
+            entry = remote
+            tier = REDIS
+        else:
+            if self.client:
+                self.l2_misses += 1
+            if local is None:
+                return None, None, None
+            entry = local
+            tier = L1
+        return (entry[1] if raw else loads(entry[1])), now - entry[0], tier
+
+    def set(self, symbol, data):
+        self.set_many({symbol: data})
+
+    def set_many(self, quotes):
+        """Store quotes in both tiers and broadcast them, in one pipelined round trip"""
+        if not quotes:
+            return
+        cached_at = time.time()
+        payloads = {symbol: dumps(data) for symbol, data in quotes.items()}
+        for symbol, payload in payloads.items():
+            self.l1.set(symbol, _frame(cached_at, payload))
+
+        if not self.client:
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            for symbol, payload in payloads.items():
+                pipe.setex(self._key(symbol), self.redis_ttl, _frame(cached_at, payload))
+            # A JSON header line, then one quote per line in the order of its symbols
+            header = dumps({'origin': self._origin, 'op': 'set', 'cachedAt': cached_at, 'symbols': list(payloads)})
+            pipe.publish(self.channel, b'\n'.join([header, *payloads.values()]))
+            pipe.execute()
+            self.published += 1
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Redis cache pipeline set error: {e}")
+
+    def delete(self, symbols):
+        """Drop symbols from both tiers and tell the other workers to do the same"""
+        for symbol in symbols:
+            self.l1.delete(symbol)
+        if not self.client or not symbols:
+            return
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            pipe.delete(*[self._key(symbol) for symbol in symbols])
+            pipe.publish(self.channel, dumps({'origin': self._origin, 'op': 'delete', 'symbols': list(symbols)}))
+            pipe.execute()
+            self.published += 1
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Redis cache delete error: {e}")
+
+    def _apply(self, payload):
+        if isinstance(payload, str):
+            payload = payload.encode()
+        header, _, body = payload.partition(b'\n')
+        message = loads(header)
+        if message.get('origin') == self._origin:
+            return
+        self.received += 1
+        if message.get('op') == 'set':
+            for symbol, quote in zip(message.get('symbols', []), body.split(b'\n')):
+                self.l1.set(symbol, _frame(message['cachedAt'], quote))
+        elif message.get('op') == 'delete':
+            for symbol in message.get('symbols', []):
+                self.l1.delete(symbol)
+
+    def ensure_subscribed(self):
+        """Start the update listener unless there is no Redis client"""
+        if self.client and self._worker.ensure_started():
+            logger.info(f"📡 Listening for cache updates on {self.channel}")
+
+    def stop(self):
+        self._worker.stop()
+
+    def _listen(self):
+        backoff = 1
+        while not self._worker.stopped.is_set():
+            pubsub = None
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                backoff = 1
+                while not self._worker.stopped.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message.get('type') == 'message':
+                        try:
+                            self._apply(message['data'])
+                        except (ValueError, TypeError, AttributeError) as e:
+                            logger.warning(f"Ignoring malformed cache update: {e}")
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Cache update subscription lost: {e}")
+                # Updates may have been missed while disconnected
+                self.l1.clear()
+                self._worker.stopped.wait(backoff)
+                backoff = min(backoff * 2, 30)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+    def stats(self):
+        l2_lookups = self.l2_hits + self.l2_misses
+        return {
+            'l1': self.l1.stats(),
+            'l2': {
+                'enabled': self.client is not None,
+                'hits': self.l2_hits,
+                'misses': self.l2_misses,
+                'hit_rate': round(self.l2_hits / l2_lookups, 4) if l2_lookups else 0.0
+            },
+            'subscribed': self._worker.running,
+            'published': self.published,
+            'received': self.received,
+            'errors': self.errors
+        }
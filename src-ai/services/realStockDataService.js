@@ -25,8 +25,9 @@ class RealStockDataService {
         return cached.data;
       }
 
-      // Use backend proxy to avoid CORS issues (with cache busting)
-      const response = await axios.get(`${this.backendUrl}/api/stock/${symbol}?t=${Date.now()}`, {
+      // Use backend proxy to avoid CORS issues; the backend sends ETags with no-cache,
+      // so the browser revalidates every time and gets a 304 when nothing changed
+      const response = await axios.get(`${this.backendUrl}/api/stock/${symbol}`, {
         timeout: 15000,
         headers: {
           'Accept': 'application/json',